@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: CSRNetwork
+:synopsis: Compact array-backed storage for the links of a network.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from array import array
+import bisect
+from collections import Mapping
+from itertools import izip
+
+
+class CSRNetwork(Mapping):
+    """
+    The CSRNetwork class stores the links of a network in compressed sparse row (CSR) form. Node names are mapped to \
+    integer indices, and the links leaving each node are kept in a slice of a typed array of target indices and a \
+    parallel typed array of weights; an array of row offsets marks where each node's slice begins. Undirected links \
+    are stored in the rows of both of their nodes. If every link has a weight of 1.0, no weights are stored at all.
+
+    A CSRNetwork is read like the defaultdict(dict) it replaces: network[source] is a read-only mapping of targets to \
+    weights, so network[source][target] returns the weight of a link, and iterating over the network yields every \
+    node with at least one outgoing link.
+
+    :ivar is_directed: Whether or not the links are directed
+    """
+    def __init__(self, sources, targets, values, is_directed=True):
+        """
+        Initializes a CSRNetwork. If a link appears more than once, the last value given for it is kept.
+
+        :param list sources: The source of each link
+        :param list targets: The target of each link
+        :param list values: The value of each link
+        :param bool is_directed: Whether or not the links are directed
+        """
+        self.is_directed = is_directed
+        self._node_index = node_index = {}
+
+        source_codes = array('i', (node_index.setdefault(x, len(node_index)) for x in sources))
+        target_codes = array('i', (node_index.setdefault(x, len(node_index)) for x in targets))
+        link_values = array('d', values)
+        self._node_ids = [None] * len(node_index)
+        for node_id in node_index:
+            self._node_ids[node_index[node_id]] = node_id
+
+        # An undirected link is stored as two adjacent entries, one per direction, so entries stay in link order and
+        # the last of any duplicate links is the last in both of its rows, whichever way round it was given
+        if is_directed:
+            entry_sources, entry_targets, link_shift = source_codes, target_codes, 0
+        else:
+            entry_sources = array('i', [0]) * (2 * len(source_codes))
+            entry_targets = array('i', [0]) * (2 * len(source_codes))
+            entry_sources[0::2] = entry_targets[1::2] = source_codes
+            entry_sources[1::2] = entry_targets[0::2] = target_codes
+            link_shift = 1
+
+        # Two stable counting sorts order entries by source, then target, keeping duplicates in link order
+        node_count = len(self._node_ids)
+        entry_order = _counting_sort(entry_sources, _counting_sort(entry_targets, xrange(len(entry_targets)),
+                                                                   node_count), node_count)
+
+        self._offsets = array('l', [0]) * (node_count + 1)
+        self._targets = array('i')
+        self._weights = array('d')
+        entry_count = len(entry_order)
+        for i in xrange(entry_count):
+            entry = entry_order[i]
+            source = entry_sources[entry]
+            target = entry_targets[entry]
+            if i + 1 < entry_count:
+                next_entry = entry_order[i + 1]
+                if entry_sources[next_entry] == source and entry_targets[next_entry] == target:
+                    continue
+            self._offsets[source + 1] += 1
+            self._targets.append(target)
+            self._weights.append(link_values[entry >> link_shift])
+
+        if all(weight == 1.0 for weight in self._weights):
+            self._weights = None
+
+        self._row_count = 0
+        for i in xrange(node_count):
+            if self._offsets[i + 1] > 0:
+                self._row_count += 1
+            self._offsets[i + 1] += self._offsets[i]
+
+    @classmethod
+    def from_codes(cls, node_ids, sources, targets, values=None, is_directed=True):
+        """
+        Builds a CSRNetwork from NumPy arrays of integer codes into a table of node ids, such as the memory-mapped \
+        columns of a binary file. The links are ordered and deduplicated by NumPy, as :meth:`__init__` would order \
+        them, so no Python object is created per link.
+
+        :param numpy.ndarray node_ids: An object array of node ids
+        :param numpy.ndarray sources: The code in node_ids of the source of each link
+        :param numpy.ndarray targets: The code in node_ids of the target of each link
+        :param numpy.ndarray|None values: The value of each link, or None if every link has a value of 1.0
+        :param bool is_directed: Whether or not the links are directed
+        :rtype: CSRNetwork
+        """
+        import numpy
+
+        link_count = len(sources)
+        node_codes, link_codes = numpy.unique(numpy.concatenate((sources, targets)), return_inverse=True)
+        entry_sources, entry_targets = link_codes[:link_count], link_codes[link_count:]
+        entry_links = numpy.arange(link_count)
+        if not is_directed:
+            # As in __init__, the two entries of an undirected link are adjacent
+            entry_sources, entry_targets = (numpy.column_stack((entry_sources, entry_targets)).ravel(),
+                                            numpy.column_stack((entry_targets, entry_sources)).ravel())
+            entry_links = numpy.repeat(entry_links, 2)
+
+        # lexsort is stable, so duplicate links stay in link order and the last of them is kept
+        entry_order = numpy.lexsort((entry_targets, entry_sources))
+        entry_sources = entry_sources[entry_order]
+        entry_targets = entry_targets[entry_order]
+        is_last = numpy.ones(len(entry_order), dtype=bool)
+        is_last[:-1] = (entry_sources[1:] != entry_sources[:-1]) | (entry_targets[1:] != entry_targets[:-1])
+
+        network = cls.__new__(cls)
+        network.is_directed = is_directed
+        network._node_ids = node_ids[node_codes].tolist()
+        network._node_index = dict(izip(network._node_ids, xrange(len(network._node_ids))))
+
+        row_lengths = numpy.bincount(entry_sources[is_last], minlength=len(node_codes))
+        network._row_count = int(numpy.count_nonzero(row_lengths))
+        network._offsets = _to_array('l', numpy.concatenate(([0], numpy.cumsum(row_lengths))))
+        network._targets = _to_array('i', entry_targets[is_last])
+        network._weights = None
+        if values is not None:
+            weights = numpy.asarray(values, dtype=numpy.float64)[entry_links[entry_order][is_last]]
+            if not numpy.all(weights == 1.0):
+                network._weights = _to_array('d', weights)
+
+        return network
+
+    def __getitem__(self, source):
+        """
+        :param str|unicode source: The name of a node
+        :returns: The targets and weights of the links leaving source
+        :rtype: CSRRow
+        """
+        code = self._node_index[source]
+        if self._offsets[code] == self._offsets[code + 1]:
+            raise KeyError(source)
+        return CSRRow(self, code)
+
+    def __iter__(self):
+        for code in xrange(len(self._node_ids)):
+            if self._offsets[code] != self._offsets[code + 1]:
+                yield self._node_ids[code]
+
+    def __len__(self):
+        return self._row_count
+
+    def __contains__(self, source):
+        code = self._node_index.get(source)
+        return code is not None and self._offsets[code] != self._offsets[code + 1]
+
+    def get_node_ids(self):
+        """
+        :returns: The names of all the nodes in the network, in the order of their indices
+        :rtype: list
+        """
+        return self._node_ids
+
+    def get_link_count(self):
+        """
+        :returns: The number of links in the network, counting each undirected link once
+        :rtype: int
+        """
+        if self.is_directed:
+            return len(self._targets)
+        self_loops = sum(1 for code, target in self._iter_link_codes() if code == target)
+        return (len(self._targets) + self_loops) // 2
+
+    def get_columns(self):
+        """
+        :returns: The sources, targets, and values of the network's links, with each undirected link listed once
+        :rtype: :class:`tuple_(list, list, list)`
+        """
+        sources = []
+        targets = []
+        values = []
+        for source, target, value in self.iter_links():
+            sources.append(source)
+            targets.append(target)
+            values.append(value)
+
+        return sources, targets, values
+
+    def iter_links(self):
+        """
+        :returns: The source, target, and value of each of the network's links, with each undirected link listed once
+        :rtype: generator of :class:`tuple_(str, str, float)`
+        """
+        for i, (source, target) in enumerate(self._iter_link_codes()):
+            # Undirected links are stored in both directions
+            if not self.is_directed and target < source:
+                continue
+            yield self._node_ids[source], self._node_ids[target], self._weights[i] if self._weights is not None else 1.0
+
+    def rename_node(self, node_id, new_node_id):
+        """
+        Renames a node; because links refer to nodes by index, no links need to be changed.
+
+        :param str|unicode node_id: The current name of the node
+        :param str|unicode new_node_id: The new name of the node
+        """
+        if new_node_id in self._node_index:
+            raise KeyError('{0} is already in the network'.format(new_node_id))
+
+        code = self._node_index.pop(node_id)
+        self._node_index[new_node_id] = code
+        self._node_ids[code] = new_node_id
+
+    def _iter_link_codes(self):
+        """:returns: the source and target indices of each stored link, in storage order"""
+        for code in xrange(len(self._node_ids)):
+            for i in xrange(self._offsets[code], self._offsets[code + 1]):
+                yield code, self._targets[i]
+
+
+class CSRRow(Mapping):
+    """A read-only mapping of the targets of the links leaving one node of a :class:`CSRNetwork` to their weights"""
+    def __init__(self, network, code):
+        """
+        :param CSRNetwork network: The network containing the row
+        :param int code: The index of the source node of the row
+        """
+        self._network = network
+        self._start = network._offsets[code]
+        self._end = network._offsets[code + 1]
+
+    def __getitem__(self, target):
+        code = self._network._node_index.get(target)
+        if code is not None:
+            i = bisect.bisect_left(self._network._targets, code, self._start, self._end)
+            if i < self._end and self._network._targets[i] == code:
+                return self._network._weights[i] if self._network._weights is not None else 1.0
+        raise KeyError(target)
+
+    def __iter__(self):
+        for i in xrange(self._start, self._end):
+            yield self._network._node_ids[self._network._targets[i]]
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __contains__(self, target):
+        try:
+            self[target]
+        except KeyError:
+            return False
+        return True
+
+
+def _counting_sort(keys, order, key_count):
+    """
+    Stably sorts indices on their keys in linear time
+
+    :param array keys: The key of each index, between 0 and key_count - 1
+    :param order: The indices to sort, in their current order
+    :param int key_count: The number of distinct keys
+    :returns: The indices, ordered by key
+    :rtype: array
+    """
+    offsets = array('l', [0]) * (key_count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in xrange(key_count):
+        offsets[i + 1] += offsets[i]
+
+    sorted_order = array('l', [0]) * len(keys)
+    for index in order:
+        key = keys[index]
+        sorted_order[offsets[key]] = index
+        offsets[key] += 1
+    return sorted_order
+
+
+def _to_array(typecode, values):
+    """
+    :param str typecode: The typecode of the array
+    :param numpy.ndarray values: The values of the array
+    :returns: A copy of values in a typed array, made without converting each value to a Python object
+    :rtype: array
+    """
+    return array(typecode, values.astype(typecode).tobytes())
@@ -0,0 +1,376 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: DeltaMetaNetworkStore
+:synopsis: Delta-compressed in-memory storage for the meta-networks of a dynamic meta-network.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from collections import OrderedDict
+import dynetmlparsingutils as dmlpu
+from dynetmlrecords import Nodeset
+import numpy
+from SymbolTable import SymbolTable
+
+
+class DeltaMetaNetworkStore:
+    """
+    The DeltaMetaNetworkStore class holds a sequence of meta-networks in which consecutive meta-networks mostly share \
+    the same nodes and links. Every keyframe_interval-th meta-network is stored in full, as a keyframe; each of the \
+    others is stored as the nodes and links that were added, changed, or removed since the meta-network before it. \
+    Links are stored as sorted NumPy arrays of integer codes, each packing the symbol table codes of a link's source \
+    and target, alongside an array of their values that is left out when every value is 1.0.
+
+    Indexing the store rebuilds a meta-network from the nearest preceding keyframe or cached meta-network. The most \
+    recently rebuilt meta-networks are kept in a least-recently-used cache in the store's own form, and each index \
+    returns a new meta-network built from it: changing one doesn't change what the store holds, or what the next \
+    index returns.
+
+    :ivar keyframe_interval: The number of meta-networks from one keyframe to the next
+    :ivar cache_size: The largest number of rebuilt meta-networks that are kept
+    :ivar symbol_table: The :class:`SymbolTable` in which node ids are interned, and whose codes links are stored as
+    """
+    def __init__(self, network_format='dict', keyframe_interval=24, cache_size=8, symbol_table=None):
+        """
+        :param str|unicode network_format: Format in which rebuilt meta-networks store their networks: "dict", \
+        "igraph" or "networkx"
+        :param int keyframe_interval: The number of meta-networks from one keyframe to the next
+        :param int cache_size: The largest number of rebuilt meta-networks that are kept
+        :param SymbolTable|None symbol_table: The symbol table shared with a dynamic meta-network, if any
+        """
+        dmlpu.check_type(network_format, 'network_format', (str, unicode))
+        dmlpu.check_type(keyframe_interval, 'keyframe_interval', int)
+        dmlpu.check_type(cache_size, 'cache_size', int)
+        if network_format.lower() not in ['dict', 'igraph', 'networkx', '']:
+            raise ValueError('network_format must be blank, "dict", "igraph" or "networkx"; got {0}'.
+                             format(network_format))
+        if keyframe_interval < 1:
+            raise ValueError('keyframe_interval must be at least 1; got {0}'.format(keyframe_interval))
+        if cache_size < 0:
+            raise ValueError('cache_size cannot be negative; got {0}'.format(cache_size))
+
+        self.__network_format = network_format.lower()
+        self.keyframe_interval = keyframe_interval
+        self.cache_size = cache_size
+        self.symbol_table = symbol_table if symbol_table is not None else SymbolTable()
+
+        self._frames = []
+        self._last_snapshot = None
+        self._cache = OrderedDict()
+        self._node_ids = numpy.empty(0, dtype=object)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, i):
+        """
+        :param int i: The position of a meta-network in the store
+        :returns: A new copy of the meta-network, rebuilt in the store's network format
+        :rtype: MetaNetwork
+        """
+        dmlpu.check_type(i, 'i', (int, long))
+        if i < 0:
+            i += len(self._frames)
+        if not 0 <= i < len(self._frames):
+            raise IndexError('DeltaMetaNetworkStore index out of range')
+
+        snapshot = self._cache.pop(i, None)
+        if snapshot is None:
+            snapshot = self._rebuild(i)
+        if self.cache_size > 0:
+            self._cache[i] = snapshot
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        if self.__network_format == 'networkx':
+            from MetaNetworkNetworkX import MetaNetworkNX as MetaNetwork
+        elif self.__network_format == 'igraph':
+            from MetaNetworkIGraph import MetaNetworkIG as MetaNetwork
+        else:
+            from MetaNetwork import MetaNetwork
+
+        mn = MetaNetwork(self.symbol_table)
+        mn._import_state(_get_state(snapshot), self._get_node_ids())
+        return mn
+
+    def __iter__(self):
+        for i in xrange(len(self._frames)):
+            yield self[i]
+
+    def get_network_format(self):
+        """Returns the network format"""
+        return self.__network_format
+
+    def is_keyframe(self, i):
+        """
+        :param int i: The position of a meta-network in the store
+        :returns: True if the meta-network is stored in full
+        :rtype: bool
+        """
+        return self._frames[i][0] == 'keyframe'
+
+    def append(self, mn):
+        """
+        Adds a meta-network to the end of the store. The store keeps its own copy, so mn can be discarded afterward.
+
+        :param MetaNetwork mn: A meta-network in any network format
+        """
+        snapshot = _get_snapshot(mn._export_state(), self.symbol_table)
+        if len(self._frames) % self.keyframe_interval == 0:
+            self._frames.append(('keyframe', snapshot))
+        else:
+            self._frames.append(('delta', _get_delta(self._last_snapshot, snapshot)))
+        self._last_snapshot = snapshot
+
+    def extend(self, metanetworks):
+        """
+        :param metanetworks: Meta-networks to add to the end of the store. Only one of them needs to be in memory at \
+        a time, so this may be a generator.
+        """
+        for mn in metanetworks:
+            self.append(mn)
+
+    def clear_cache(self):
+        """Discards every rebuilt meta-network"""
+        self._cache.clear()
+
+    def _rebuild(self, i):
+        """
+        :param int i: The position of a meta-network in the store
+        :returns: The snapshot of the meta-network, rebuilt from its keyframe, or the closest cached snapshot after \
+        it, and the deltas that follow
+        :rtype: dict
+        """
+        start = i - i % self.keyframe_interval
+        snapshot = self._frames[start][1]
+        for j in xrange(i, start, -1):
+            if j in self._cache:
+                start, snapshot = j, self._cache[j]
+                break
+
+        for frame_kind, delta in self._frames[start + 1:i + 1]:
+            snapshot = _apply_delta(snapshot, delta)
+        return snapshot
+
+    def _get_node_ids(self):
+        """
+        :returns: An object array of the symbol table's node ids, which the codes of stored links index into
+        :rtype: numpy.ndarray
+        """
+        # The symbol table only ever grows, so the array only needs extending
+        symbols = self.symbol_table.get_symbols()
+        if len(self._node_ids) < len(symbols):
+            new_ids = numpy.empty(len(symbols) - len(self._node_ids), dtype=object)
+            new_ids[:] = symbols[len(self._node_ids):]
+            self._node_ids = numpy.concatenate((self._node_ids, new_ids))
+        return self._node_ids
+
+
+def _get_snapshot(state, symbol_table):
+    """
+    :param tuple state: A meta-network in the form returned by :meth:`MetaNetwork._export_state`
+    :param SymbolTable symbol_table: The table whose codes links are stored as
+    :returns: The meta-network as plain dictionaries: its attributes, properties, property identities, nodesets keyed \
+    on (nodeclass id, nodeset id), and networks keyed on network id. Each nodeset is its property identities and a \
+    dictionary of (attributes, properties) pairs keyed on node id, and each network is its attributes and the \
+    arrays returned by :func:`_get_links`. A snapshot is never changed once it has been made.
+    :rtype: dict
+    """
+    attributes, properties, property_identities, node_tree, networks = state
+
+    nodesets = OrderedDict()
+    for nodeclass_key in node_tree:
+        for nodeset_key in node_tree[nodeclass_key]:
+            nodeset = node_tree[nodeclass_key][nodeset_key]
+            if not isinstance(nodeset, Nodeset):
+                nodeset = Nodeset(*nodeset)
+            nodes = dict((node_id, (dict(node.attributes), dict(node.iter_properties())))
+                         for node_id, node in nodeset.nodes.items())
+            nodesets[(nodeclass_key, nodeset_key)] = (dict(nodeset.property_identities), nodes)
+
+    snapshot_networks = OrderedDict()
+    for nk_attributes, sources, targets, values in networks:
+        snapshot_networks[nk_attributes['id']] = (dict(nk_attributes.items()),) + _get_links(
+            symbol_table, sources, targets, values, nk_attributes['isDirected'])
+
+    return {'attributes': dict(attributes), 'properties': dict(properties),
+            'propertyIdentities': dict(property_identities), 'nodesets': nodesets, 'networks': snapshot_networks}
+
+
+def _get_links(symbol_table, sources, targets, values, is_directed):
+    """
+    :param SymbolTable symbol_table: The table whose codes links are stored as
+    :param list sources: The source of each link
+    :param list targets: The target of each link
+    :param list values: The value of each link
+    :param bool is_directed: Whether or not the links are directed; undirected links are stored with the smaller code \
+    first, so a link is stored the same way whichever way round it was given
+    :returns: A sorted array of the links, each coded as its source's code shifted into the upper 32 bits plus its \
+    target's code, and an array of their values, or None if every value is 1.0. If a link appears more than once, \
+    the last value given for it is kept.
+    :rtype: :class:`tuple_(numpy.ndarray, numpy.ndarray|None)`
+    """
+    source_codes = numpy.array(symbol_table.get_codes(sources), dtype=numpy.int64)
+    target_codes = numpy.array(symbol_table.get_codes(targets), dtype=numpy.int64)
+    if not is_directed:
+        source_codes, target_codes = (numpy.minimum(source_codes, target_codes),
+                                      numpy.maximum(source_codes, target_codes))
+
+    links = (source_codes << 32) | target_codes
+    link_values = numpy.array(values, dtype=numpy.float64)
+    # A stable sort keeps duplicate links in order, so the last of them can be kept
+    order = numpy.argsort(links, kind='mergesort')
+    links = links[order]
+    link_values = link_values[order]
+    is_last = numpy.ones(len(links), dtype=bool)
+    is_last[:-1] = links[1:] != links[:-1]
+
+    return links[is_last], _compact_values(link_values[is_last])
+
+
+def _compact_values(values):
+    """:returns: values, or None if every value is 1.0"""
+    return None if numpy.all(values == 1.0) else values
+
+
+def _expand_values(values, count):
+    """:returns: values, or an array of count 1.0s if values is None"""
+    return numpy.ones(count, dtype=numpy.float64) if values is None else values
+
+
+def _contains(sorted_links, links):
+    """
+    :param numpy.ndarray sorted_links: A sorted array of links
+    :param numpy.ndarray links: An array of links
+    :returns: A boolean array telling whether each of links is in sorted_links
+    :rtype: numpy.ndarray
+    """
+    positions = numpy.minimum(numpy.searchsorted(sorted_links, links), max(len(sorted_links) - 1, 0))
+    return sorted_links[positions] == links if len(sorted_links) > 0 else numpy.zeros(len(links), dtype=bool)
+
+
+def _get_entry_delta(old_entries, new_entries):
+    """
+    :param dict old_entries: The nodes of a nodeset in one snapshot
+    :param dict new_entries: The nodes of the same nodeset in the next snapshot
+    :returns: The entries that were added or changed, and the keys of the entries that were removed
+    :rtype: :class:`tuple_(dict, list)`
+    """
+    changed = dict((key, value) for key, value in new_entries.items()
+                   if key not in old_entries or old_entries[key] != value)
+    removed = [key for key in old_entries if key not in new_entries]
+    return changed, removed
+
+
+def _get_link_delta(old_links, old_values, new_links, new_values):
+    """
+    :param numpy.ndarray old_links: The links of a network in one snapshot, as returned by :func:`_get_links`
+    :param numpy.ndarray|None old_values: Their values
+    :param numpy.ndarray new_links: The links of the same network in the next snapshot
+    :param numpy.ndarray|None new_values: Their values
+    :returns: The links that were added or whose values changed, their values, and the links that were removed
+    :rtype: :class:`tuple_(numpy.ndarray, numpy.ndarray|None, numpy.ndarray)`
+    """
+    old_values = _expand_values(old_values, len(old_links))
+    new_values = _expand_values(new_values, len(new_links))
+
+    in_old = _contains(old_links, new_links)
+    changed = ~in_old
+    changed[in_old] = old_values[numpy.searchsorted(old_links, new_links[in_old])] != new_values[in_old]
+    removed = old_links[~_contains(new_links, old_links)]
+    return new_links[changed], _compact_values(new_values[changed]), removed
+
+
+def _get_delta(old_snapshot, new_snapshot):
+    """
+    :param dict old_snapshot: A snapshot returned by :func:`_get_snapshot`
+    :param dict new_snapshot: The snapshot that follows it
+    :returns: The changes that turn old_snapshot into new_snapshot
+    :rtype: dict
+    """
+    delta = {'attributes': new_snapshot['attributes'], 'properties': new_snapshot['properties'],
+             'propertyIdentities': new_snapshot['propertyIdentities']}
+
+    old_nodesets = old_snapshot['nodesets']
+    nodeset_changes = OrderedDict()
+    for key, (property_identities, nodes) in new_snapshot['nodesets'].items():
+        if key in old_nodesets:
+            nodeset_changes[key] = (property_identities,) + _get_entry_delta(old_nodesets[key][1], nodes)
+        else:
+            nodeset_changes[key] = (property_identities, nodes, [])
+    delta['nodesets'] = nodeset_changes
+
+    old_networks = old_snapshot['networks']
+    network_changes = OrderedDict()
+    for key, (nk_attributes, links, values) in new_snapshot['networks'].items():
+        if key in old_networks:
+            network_changes[key] = (nk_attributes,) + _get_link_delta(old_networks[key][1], old_networks[key][2],
+                                                                       links, values)
+        else:
+            network_changes[key] = (nk_attributes, links, values, links[:0])
+    delta['networks'] = network_changes
+
+    return delta
+
+
+def _apply_delta(snapshot, delta):
+    """
+    :param dict snapshot: A snapshot returned by :func:`_get_snapshot`, which is left unchanged
+    :param dict delta: The delta returned by :func:`_get_delta` for the following snapshot
+    :returns: The following snapshot. Nodesets that didn't change are shared with snapshot.
+    :rtype: dict
+    """
+    nodesets = OrderedDict()
+    for key, (property_identities, changed, removed) in delta['nodesets'].items():
+        nodes = snapshot['nodesets'][key][1] if key in snapshot['nodesets'] else {}
+        if len(changed) > 0 or len(removed) > 0:
+            nodes = dict(nodes)
+            nodes.update(changed)
+            for node_id in removed:
+                del nodes[node_id]
+        nodesets[key] = (property_identities, nodes)
+
+    networks = OrderedDict()
+    for key, (nk_attributes, added, added_values, removed) in delta['networks'].items():
+        if key not in snapshot['networks']:
+            networks[key] = (nk_attributes, added, added_values)
+            continue
+
+        links, values = snapshot['networks'][key][1:]
+        # Changed links are among the added ones, so their old values are dropped along with the removed links
+        kept = ~_contains(numpy.sort(numpy.concatenate((removed, added))), links)
+        links = numpy.concatenate((links[kept], added))
+        order = numpy.argsort(links, kind='mergesort')
+        if values is not None or added_values is not None:
+            values = numpy.concatenate((_expand_values(values, len(kept))[kept],
+                                        _expand_values(added_values, len(added))))[order]
+        networks[key] = (nk_attributes, links[order], values)
+
+    return {'attributes': delta['attributes'], 'properties': delta['properties'],
+            'propertyIdentities': delta['propertyIdentities'], 'nodesets': nodesets, 'networks': networks}
+
+
+def _get_state(snapshot):
+    """
+    :param dict snapshot: A snapshot returned by :func:`_get_snapshot`
+    :returns: The snapshot in the form accepted by :meth:`MetaNetwork._import_state` along with an array of node ids, \
+    in which each network's sources and targets are arrays of codes. No dictionary is shared with the snapshot.
+    :rtype: tuple
+    """
+    node_tree = dmlpu.node_tree()
+    for (nodeclass_key, nodeset_key), (property_identities, nodes) in snapshot['nodesets'].items():
+        node_tree[nodeclass_key][nodeset_key] = Nodeset(
+            dict(property_identities),
+            dict((node_id, (dict(attributes), dict(properties)))
+                 for node_id, (attributes, properties) in nodes.items()))
+
+    networks = []
+    for nk_attributes, links, values in snapshot['networks'].values():
+        networks.append((dict(nk_attributes), links >> 32, links & 0xffffffff, values))
+
+    return (dict(snapshot['attributes']), dict(snapshot['properties']), dict(snapshot['propertyIdentities']),
+            node_tree, networks)
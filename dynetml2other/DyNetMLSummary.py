@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: DyNetMLSummary
+:synopsis: Summaries of DyNetML files, gathered by counting tags rather than loading the files.
+
+A file is scanned by feeding it to an lxml parser whose target only receives start tags: no element tree is built, \
+text is never handed to Python, and nothing is kept for a node or link beyond a counter being incremented.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from collections import OrderedDict
+import dynetmlparsingutils as dmlpu
+from dynetmlcompression import BLOCK_SIZE
+from lxml import etree
+
+
+class DyNetMLSummary(object):
+    """
+    The DyNetMLSummary class describes the contents of a DyNetML file: its meta-networks, its nodesets and the number \
+    of nodes in them, and its networks and the number of links in them. Counts are totals over every meta-network in \
+    the file, so a node present in three snapshots is counted three times.
+
+    :ivar path: The path of the file, or None if it was scanned from a file-like object
+    :ivar root_tag: The tag of the root of the file: "DynamicMetaNetwork", "DynamicNetwork", or "MetaNetwork"
+    :ivar attributes: The attributes of the root tag
+    :ivar metanetwork_ids: The id of each meta-network, in document order
+    :ivar node_counts: An ordered dictionary of the number of nodes in each nodeset, keyed on a tuple of the nodeset's \
+    nodeclass and id
+    :ivar link_counts: An ordered dictionary of the number of links in each network, keyed on network id
+    """
+    def __init__(self, path=None, root_tag=None, attributes=None, metanetwork_ids=None, node_counts=None,
+                 link_counts=None):
+        self.path = path
+        self.root_tag = root_tag
+        self.attributes = attributes if attributes is not None else {}
+        self.metanetwork_ids = metanetwork_ids if metanetwork_ids is not None else []
+        self.node_counts = node_counts if node_counts is not None else OrderedDict()
+        self.link_counts = link_counts if link_counts is not None else OrderedDict()
+
+    @classmethod
+    def from_file(cls, source):
+        """
+        Scans a DyNetML file, which may be compressed
+
+        :param str|unicode|file source: A path to a DyNetML file, or a file-like object containing one
+        :returns: A summary of the file
+        :rtype: DyNetMLSummary
+        :raises ValueError: if the file isn't DyNetML
+        :raises lxml.etree.XMLSyntaxError: if the file isn't well-formed XML
+        """
+        summary = cls(source if not hasattr(source, 'read') else None)
+        parser = etree.XMLParser(target=_SummaryTarget(summary), huge_tree=True)
+
+        dynetml_file = dmlpu.open_dynetml(source)
+        try:
+            chunk = dynetml_file.read(BLOCK_SIZE)
+            while chunk:
+                parser.feed(chunk)
+                chunk = dynetml_file.read(BLOCK_SIZE)
+        finally:
+            if dynetml_file is not source:
+                dynetml_file.close()
+        parser.close()
+
+        if summary.root_tag is None:
+            raise ValueError('{0} is empty'.format(summary.path or 'source'))
+        return summary
+
+    def __repr__(self):
+        return 'DyNetMLSummary(<{0} meta-networks, {1} nodesets, {2} networks>)'.format(
+            len(self.metanetwork_ids), len(self.node_counts), len(self.link_counts))
+
+    def get_metanetwork_count(self):
+        """:returns: The number of meta-networks in the file"""
+        return len(self.metanetwork_ids)
+
+    def get_timestamps(self):
+        """
+        :returns: The timestamp of each meta-network whose id is a timestamp, in document order
+        :rtype: list
+        """
+        timestamps = []
+        for mn_id in self.metanetwork_ids:
+            try:
+                timestamps.append(dmlpu.parse_timestamp(mn_id))
+            except ValueError:
+                continue
+        return timestamps
+
+    def get_start(self):
+        """:returns: The earliest meta-network timestamp in the file, or None if no meta-network id is a timestamp"""
+        timestamps = self.get_timestamps()
+        return min(timestamps) if len(timestamps) > 0 else None
+
+    def get_end(self):
+        """:returns: The latest meta-network timestamp in the file, or None if no meta-network id is a timestamp"""
+        timestamps = self.get_timestamps()
+        return max(timestamps) if len(timestamps) > 0 else None
+
+    def to_dict(self):
+        """
+        :returns: The summary as a dictionary of strings, numbers, lists and dictionaries, suitable for JSON
+        :rtype: dict
+        """
+        start = self.get_start()
+        end = self.get_end()
+        return {'path': self.path,
+                'root_tag': self.root_tag,
+                'attributes': self.attributes,
+                'metanetwork_count': self.get_metanetwork_count(),
+                'start': start.isoformat() if start is not None else None,
+                'end': end.isoformat() if end is not None else None,
+                'nodesets': [{'nodeclass': nodeclass_key, 'id': nodeset_key, 'node_count': node_count}
+                             for (nodeclass_key, nodeset_key), node_count in self.node_counts.items()],
+                'networks': [{'id': network_id, 'link_count': link_count}
+                             for network_id, link_count in self.link_counts.items()]}
+
+
+class _SummaryTarget(object):
+    """An lxml parser target that counts the meta-networks, nodes and links of a DyNetML file into a summary"""
+    def __init__(self, summary):
+        """:param DyNetMLSummary summary: The summary to be filled in"""
+        self.summary = summary
+        self.nodeset_key = None
+        self.network_id = None
+
+    def start(self, tag, attrib):
+        if self.summary.root_tag is None:
+            if tag not in ('DynamicMetaNetwork', 'DynamicNetwork', 'MetaNetwork'):
+                raise ValueError('{0} is not a DyNetML file'.format(self.summary.path or 'source'))
+            self.summary.root_tag = tag
+            self.summary.attributes = dict(attrib)
+
+        if tag == 'link':
+            self.summary.link_counts[self.network_id] += 1
+        elif tag == 'node':
+            self.summary.node_counts[self.nodeset_key] += 1
+        elif tag == 'nodeclass':
+            self.nodeset_key = attrib['type'], attrib['id']
+            self.summary.node_counts.setdefault(self.nodeset_key, 0)
+        elif tag == 'network':
+            self.network_id = attrib['id']
+            self.summary.link_counts.setdefault(self.network_id, 0)
+        elif tag == 'MetaNetwork':
+            self.summary.metanetwork_ids.append(attrib.get('id'))
+
+    def end(self, tag):
+        pass
+
+    def close(self):
+        return self.summary
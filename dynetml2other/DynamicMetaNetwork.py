@@ -9,11 +9,18 @@
 """
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
-import codecs
-from datetime import datetime
+import bisect
+from datetime import datetime, timedelta
 import dynetmlparsingutils as dmlpu
+import hashlib
+from itertools import izip
 from lxml import etree
+from MetaNetwork import MetaNetwork
+from MetaNetworkList import MetaNetworkList
+from MetaNetworkView import MetaNetworkView
+import multiprocessing
 import os
+from SymbolTable import SymbolTable
 
 
 class DynamicMetaNetwork:
@@ -23,14 +30,27 @@ class DynamicMetaNetwork:
 
     :ivar __network_format: the format in which the networks should be stored:"dict", "igraph" or "networkx". \
     It cannot be changed after initialization.
+    :ivar __include_nodes: If True, NetworkX networks hold every node of their source and target nodesets; see \
+    :class:`MetaNetworkNetworkX.MetaNetworkNX`
+    :ivar __lazy_networks: If True, the networks of each meta-network are built when they are first read; see \
+    :class:`LazyNetworkDict.LazyNetworkDict`
     :ivar attributes: A dictionary of attributes associated with the dynamic network
-    :ivar metanetworks: The list of the Meta-Networks associated with the dynamic meta-network.
+    :ivar metanetworks: The list of the Meta-Networks associated with the dynamic meta-network, a \
+    :class:`MetaNetworkList.MetaNetworkList` that counts its changes so that the time index is only rebuilt after one.
+    :ivar symbol_table: The :class:`SymbolTable` shared by all of the Meta-Networks, in which node ids are interned \
+    and given integer codes that are stable across snapshots.
     """
-    def __init__(self, network_format="dict"):
+    def __init__(self, network_format="dict", include_nodes=False, lazy_networks=False):
         """
         Initializes a DynamicMetaNetwork
 
         :param str|unicode network_format: Format in which graphs should be stored: "dict", "igraph" or "networkx"
+        :param bool include_nodes: If True, each network is built with every node of its source and target nodesets, \
+        whose attribute dictionaries are shared with the node tree. Only supported by the "networkx" format.
+        :param bool lazy_networks: If True, the links of each network are only parsed, and the network only built, \
+        when it is first read. Meta-networks loaded from a path are scanned rather than parsed, and each network \
+        only records the offsets of its links in the file. Meta-networks loaded from a binary file are built as they \
+        are loaded.
         """
         if not isinstance(network_format, (str, unicode)):
             raise TypeError('network_format must be a str or unicode')
@@ -38,9 +58,18 @@ class DynamicMetaNetwork:
         if self.__network_format not in ['dict', 'igraph', 'networkx', '']:
             raise ValueError('network_format must be blank, "dict", "igraph" or "networkx"; got {0}'.
                              format(network_format))
+        dmlpu.check_type(include_nodes, 'include_nodes', bool)
+        if include_nodes and self.__network_format != 'networkx':
+            raise ValueError('include_nodes is only supported by the "networkx" format')
+        self.__include_nodes = include_nodes
+        dmlpu.check_type(lazy_networks, 'lazy_networks', bool)
+        self.__lazy_networks = lazy_networks
 
         self.attributes = {}
-        self.metanetworks = []
+        self.metanetworks = MetaNetworkList()
+        self.symbol_table = SymbolTable()
+        self.__time_index = None
+        self.__refresh_state = None
 
     def get_network_format(self):
         """Returns the network format"""
@@ -94,39 +123,520 @@ class DynamicMetaNetwork:
         for attrib_key in dmn_tag.attrib:
             self.attributes[attrib_key] = dmlpu.format_prop(dmn_tag.attrib[attrib_key])
 
-        if self.__network_format == 'networkx':
+        for mn_tag in dmn_tag.iterfind('MetaNetwork'):
+            if not self._is_in_date_range(mn_tag.attrib['id'], start_date, end_date):
+                continue
+
+            self.metanetworks.append(self._new_metanetwork())
+            self.metanetworks[-1].load_from_tag(mn_tag, properties_to_include, properties_to_ignore,
+                                                nodeclasses_to_include, nodeclasses_to_ignore, networks_to_include,
+                                                networks_to_ignore)
+
+    def load_from_dynetml_file(self, dynetml_path, properties_to_include=None, properties_to_ignore=None,
+                               nodeclasses_to_include=None, nodeclasses_to_ignore=None, networks_to_include=None,
+                               networks_to_ignore=None, start_date=None, end_date=None, workers=None):
+        """
+        Incrementally parses a DyNetML file containing a dynamic meta-network and loads the contents. Unlike \
+        :meth:`load_from_dynetml`, the document is never held in memory as a whole: each <MetaNetwork> is discarded \
+        as soon as it has been loaded, so peak memory depends on the largest meta-network rather than on the file.
+
+        If more than one worker is requested, the raw bytes of the file are scanned for <MetaNetwork> boundaries \
+        without being parsed, and the meta-networks are parsed by a pool of processes. Each worker reads the byte \
+        range of its meta-network from an uncompressed file itself; the text of the meta-networks in a compressed file \
+        or a file-like object is sent to the workers instead. Workers return each meta-network in a compact, \
+        library-independent form, and the networks are only built in the chosen format once they are back in this \
+        process, in document order. Files in an encoding the scan can't read, such as UTF-16, are parsed in this \
+        process instead. With lazy_networks set, a file named by its path is always scanned in this process, by \
+        :meth:`load_time_window`.
+
+        :param str|unicode|file dynetml_path: Path to a DyNetML file, or a file-like object containing one
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        :param datetime.datetime start_date: MetaNetworks from before this datetime should not be imported
+        :param datetime.datetime end_date: MetaNetworks from after this datetime should not be imported
+        :param int|None workers: The number of processes that should parse meta-networks. Defaults to parsing in \
+        this process.
+        """
+        if workers is not None:
+            dmlpu.check_type(workers, 'workers', int)
+            if workers < 1:
+                raise ValueError('workers must be at least 1; got {0}'.format(workers))
+
+        load_args = (properties_to_include, properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore,
+                     networks_to_include, networks_to_ignore)
+
+        if self.__lazy_networks and isinstance(dynetml_path, (str, unicode)):
+            # Links aren't parsed until they're read, so there is nothing for workers to do; the file is scanned, and
+            # each network only records where its links are
+            self.load_time_window(dynetml_path, start_date, end_date, *load_args)
+            return
+
+        if workers is not None and workers > 1:
+            position = dynetml_path.tell() if hasattr(dynetml_path, 'read') else None
+            encoding = dmlpu.get_encoding(dynetml_path)
+            if position is not None:
+                dynetml_path.seek(position)
+            # A file whose markup can't be found in its raw bytes can't be split between workers
+            if not dmlpu.can_scan_encoding(encoding):
+                workers = None
+
+        if workers is None or workers == 1:
+            for mn in self._iter_metanetworks_from_file(dynetml_path, *(load_args + (start_date, end_date))):
+                self.metanetworks.append(mn)
+            return
+
+        # The root attributes are read here, before the pool starts; the arguments below are produced on the pool's
+        # feeder thread, which must not touch this dynamic meta-network
+        position = dynetml_path.tell() if hasattr(dynetml_path, 'read') else None
+        dmn_tag = dmlpu.get_root_tag(dynetml_path)
+        if position is not None:
+            dynetml_path.seek(position)
+        if dmn_tag.tag not in ['DynamicMetaNetwork', 'DynamicNetwork']:
+            return
+
+        for attrib_key in dmn_tag.attrib:
+            self.attributes[attrib_key] = dmlpu.format_prop(dmn_tag.attrib[attrib_key])
+
+        inclusion_test = lambda mn_id: self._is_in_date_range(mn_id, start_date, end_date)
+        mn_args = ((mn_range, encoding) + load_args
+                   for mn_range in _iter_metanetwork_ranges(dynetml_path, inclusion_test, encoding))
+
+        pool = multiprocessing.Pool(workers)
+        try:
+            for mn_state in pool.imap(_load_metanetwork_state, mn_args):
+                self.metanetworks.append(self._new_metanetwork())
+                self.metanetworks[-1]._import_state(mn_state)
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def load_time_window(self, dynetml_path, start_date=None, end_date=None, properties_to_include=None,
+                         properties_to_ignore=None, nodeclasses_to_include=None, nodeclasses_to_ignore=None,
+                         networks_to_include=None, networks_to_ignore=None):
+        """
+        Loads the meta-networks in a DyNetML file that fall between start_date and end_date. The file is scanned \
+        without being parsed: only the opening tag of each <MetaNetwork> is read to check its date, and the rest of \
+        any meta-network outside of the window is skipped over, so only the meta-networks in the window are parsed. \
+        Files in an encoding the scan can't read, such as UTF-16, are instead parsed incrementally from beginning to \
+        end.
+
+        :param str|unicode dynetml_path: Path to a DyNetML file
+        :param datetime.datetime start_date: MetaNetworks from before this datetime should not be imported
+        :param datetime.datetime end_date: MetaNetworks from after this datetime should not be imported
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        """
+        dmlpu.check_type(dynetml_path, 'dynetml_path', (str, unicode))
+        dmlpu.check_type(start_date, 'start_date', (datetime, type(None)))
+        dmlpu.check_type(end_date, 'end_date', (datetime, type(None)))
+
+        load_args = (properties_to_include, properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore,
+                     networks_to_include, networks_to_ignore)
+
+        encoding = dmlpu.get_encoding(dynetml_path)
+        if not dmlpu.can_scan_encoding(encoding):
+            for mn in self._iter_metanetworks_from_file(dynetml_path, *(load_args + (start_date, end_date))):
+                self.metanetworks.append(mn)
+            return
+
+        dmn_tag = dmlpu.get_root_tag(dynetml_path)
+        if dmn_tag.tag not in ['DynamicMetaNetwork', 'DynamicNetwork']:
+            return
+
+        for attrib_key in dmn_tag.attrib:
+            self.attributes[attrib_key] = dmlpu.format_prop(dmn_tag.attrib[attrib_key])
+
+        inclusion_test = lambda mn_id: self._is_in_date_range(mn_id, start_date, end_date)
+
+        fragment_path = self._get_fragment_path(dynetml_path)
+        with dmlpu.open_dynetml(dynetml_path) as dynetml_file:
+            for mn_id, mn_start, mn_end, mn_text in dmlpu.scan_metanetworks(dynetml_file, inclusion_test,
+                                                                            encoding=encoding):
+                if mn_text is None:
+                    continue
+
+                self.metanetworks.append(self._new_metanetwork())
+                self.metanetworks[-1].load_from_fragment(mn_text, encoding, fragment_path, mn_start, *load_args)
+
+    def load_from_index(self, dynetml_path, mn_ids=None, start_date=None, end_date=None, properties_to_include=None,
+                        properties_to_ignore=None, nodeclasses_to_include=None, nodeclasses_to_ignore=None,
+                        networks_to_include=None, networks_to_ignore=None):
+        """
+        Loads selected meta-networks from a DyNetML file using a :class:`MetaNetworkIndex`. The index is built and \
+        saved next to the file the first time the file is loaded, and after that each selected meta-network is read \
+        by seeking straight to it.
+
+        :param str|unicode dynetml_path: Path to a DyNetML file
+        :param list mn_ids: If set, only meta-networks with these ids are imported
+        :param datetime.datetime start_date: MetaNetworks from before this datetime should not be imported
+        :param datetime.datetime end_date: MetaNetworks from after this datetime should not be imported
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        :returns: The index of the file
+        :rtype: MetaNetworkIndex
+        """
+        from MetaNetworkIndex import MetaNetworkIndex
+
+        index = MetaNetworkIndex(dynetml_path).load_or_build()
+        if index.root_tag not in ['DynamicMetaNetwork', 'DynamicNetwork']:
+            return index
+
+        for attrib_key in index.root_attributes:
+            self.attributes[attrib_key] = dmlpu.format_prop(index.root_attributes[attrib_key])
+
+        fragment_path = self._get_fragment_path(dynetml_path)
+        entries = index.select(mn_ids, start_date, end_date)
+        for (mn_id, mn_offset, mn_length), mn_text in izip(entries, index.iter_texts(entries)):
+            self.metanetworks.append(self._new_metanetwork())
+            self.metanetworks[-1].load_from_fragment(mn_text, index.encoding, fragment_path, mn_offset,
+                                                     properties_to_include, properties_to_ignore,
+                                                     nodeclasses_to_include, nodeclasses_to_ignore,
+                                                     networks_to_include, networks_to_ignore)
+
+        return index
+
+    def refresh(self, dynetml_path, properties_to_include=None, properties_to_ignore=None,
+                nodeclasses_to_include=None, nodeclasses_to_ignore=None, networks_to_include=None,
+                networks_to_ignore=None):
+        """
+        Loads the meta-networks that have been appended to a DyNetML file since it was last refreshed. The first \
+        refresh loads the whole file. Each refresh remembers the offset at which the last complete <MetaNetwork> in \
+        the file ended, along with that meta-network's id, and the next refresh scans the file from that offset, \
+        without parsing anything before it. A <MetaNetwork> that is still being written is left for a later refresh.
+
+        If the file was rewritten rather than appended to, so that the last meta-network loaded is no longer where it \
+        was, metanetworks and attributes are cleared and the whole file is loaded again.
+
+        Only meta-networks loaded by refresh are tracked, so a dynamic meta-network that already holds meta-networks \
+        loaded some other way, such as by :meth:`load_from_dynetml_file`, can't be refreshed; refreshing it would \
+        load every meta-network in the file a second time.
+
+        :param str|unicode dynetml_path: Path to a DyNetML file
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        :returns: The number of meta-networks that were loaded
+        :rtype: int
+        """
+        dmlpu.check_type(dynetml_path, 'dynetml_path', (str, unicode))
+
+        if self.__refresh_state is None and len(self.metanetworks) > 0:
+            raise ValueError('refresh can only add to meta-networks loaded by refresh; clear metanetworks first')
+
+        loaded_count = 0
+
+        with dmlpu.open_dynetml(dynetml_path) as dynetml_file:
+            refresh_state = self.__refresh_state
+            if refresh_state is None or refresh_state[0] != os.path.abspath(dynetml_path) or \
+                    not self._is_appended(dynetml_file, refresh_state):
+                if refresh_state is not None:
+                    # Attributes that the rewritten file no longer has mustn't outlive it
+                    self.metanetworks[:] = []
+                    self.attributes = {}
+
+                dmn_tag = dmlpu.get_root_tag(dynetml_path)
+                if dmn_tag.tag not in ['DynamicMetaNetwork', 'DynamicNetwork']:
+                    return 0
+                for attrib_key in dmn_tag.attrib:
+                    self.attributes[attrib_key] = dmlpu.format_prop(dmn_tag.attrib[attrib_key])
+
+                refresh_state = (os.path.abspath(dynetml_path), 0, 0, None, None)
+
+            encoding = dmlpu.get_encoding(dynetml_path)
+            fragment_path = self._get_fragment_path(dynetml_path)
+            offset = refresh_state[2]
+            dynetml_file.seek(offset)
+            for mn_id, mn_start, mn_end, mn_text in dmlpu.scan_metanetworks(dynetml_file, offset=offset,
+                                                                            encoding=encoding):
+                self.metanetworks.append(self._new_metanetwork())
+                self.metanetworks[-1].load_from_fragment(mn_text, encoding, fragment_path, mn_start,
+                                                         properties_to_include, properties_to_ignore,
+                                                         nodeclasses_to_include, nodeclasses_to_ignore,
+                                                         networks_to_include, networks_to_ignore)
+                refresh_state = refresh_state[:1] + (mn_start, mn_end, mn_id, hashlib.sha1(mn_text).hexdigest())
+                loaded_count += 1
+
+            self.__refresh_state = refresh_state
+
+        return loaded_count
+
+    def _is_appended(self, dynetml_file, refresh_state):
+        """
+        :param file dynetml_file: A DyNetML file opened in binary mode
+        :param tuple refresh_state: The path of the file as of the last refresh, the offsets at which the last \
+        meta-network loaded from it starts and ends, its id, and the SHA-1 hash of its text
+        :returns: True if the last meta-network loaded is unchanged, so that the file can only have been appended to
+        :rtype: bool
+        """
+        path, mn_start, mn_end, mn_id, mn_hash = refresh_state
+        if mn_id is None:
+            return False
+
+        dynetml_file.seek(mn_start)
+        return hashlib.sha1(dynetml_file.read(mn_end - mn_start)).hexdigest() == mn_hash
+
+    def load_delta_store(self, dynetml_path, keyframe_interval=24, cache_size=8, properties_to_include=None,
+                         properties_to_ignore=None, nodeclasses_to_include=None, nodeclasses_to_ignore=None,
+                         networks_to_include=None, networks_to_ignore=None, start_date=None, end_date=None):
+        """
+        Incrementally parses a DyNetML file into a :class:`DeltaMetaNetworkStore` rather than into metanetworks. \
+        Each meta-network is delta-encoded against the one before it and then discarded, so memory grows with the \
+        changes between meta-networks rather than with their number. The attributes of the dynamic meta-network are \
+        loaded as usual.
+
+        :param str|unicode|file dynetml_path: Path to a DyNetML file, or a file-like object containing one
+        :param int keyframe_interval: The number of meta-networks from one keyframe to the next
+        :param int cache_size: The largest number of rebuilt meta-networks the store keeps
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        :param datetime.datetime start_date: MetaNetworks from before this datetime should not be imported
+        :param datetime.datetime end_date: MetaNetworks from after this datetime should not be imported
+        :returns: The meta-networks in the file
+        :rtype: DeltaMetaNetworkStore
+        """
+        from DeltaMetaNetworkStore import DeltaMetaNetworkStore
+
+        store = DeltaMetaNetworkStore(self.__network_format, keyframe_interval, cache_size, self.symbol_table)
+        store.extend(self._iter_metanetworks_from_file(dynetml_path, properties_to_include, properties_to_ignore,
+                                                       nodeclasses_to_include, nodeclasses_to_ignore,
+                                                       networks_to_include, networks_to_ignore, start_date, end_date))
+        return store
+
+    def to_delta_store(self, keyframe_interval=24, cache_size=8):
+        """
+        :param int keyframe_interval: The number of meta-networks from one keyframe to the next
+        :param int cache_size: The largest number of rebuilt meta-networks the store keeps
+        :returns: A delta-encoded copy of the meta-networks. Clearing metanetworks afterward frees the memory they use.
+        :rtype: DeltaMetaNetworkStore
+        """
+        from DeltaMetaNetworkStore import DeltaMetaNetworkStore
+
+        store = DeltaMetaNetworkStore(self.__network_format, keyframe_interval, cache_size, self.symbol_table)
+        store.extend(self.metanetworks)
+        return store
+
+    def _iter_metanetworks_from_file(self, dynetml_path, properties_to_include=None, properties_to_ignore=None,
+                                     nodeclasses_to_include=None, nodeclasses_to_ignore=None,
+                                     networks_to_include=None, networks_to_ignore=None, start_date=None,
+                                     end_date=None, share_symbol_table=True):
+        """
+        Incrementally parses a DyNetML file and yields each of its meta-networks as soon as it has been loaded.
+
+        :param bool share_symbol_table: If True, node ids are interned in the dynamic meta-network's symbol table; \
+        otherwise each meta-network gets a table of its own, which is dropped along with it.
+        :returns: the meta-networks in the file, in document order
+        :rtype: generator of :class:`MetaNetwork`
+        """
+        for mn_tag in self._iter_metanetwork_tags(dynetml_path, start_date, end_date):
+            mn = self._new_metanetwork(None if share_symbol_table else SymbolTable())
+            mn.load_from_tag(mn_tag, properties_to_include, properties_to_ignore, nodeclasses_to_include,
+                             nodeclasses_to_ignore, networks_to_include, networks_to_ignore)
+            yield mn
+
+    def _iter_metanetwork_tags(self, dynetml_path, start_date=None, end_date=None):
+        """
+        Incrementally parses a DyNetML file and yields each <MetaNetwork> tag that falls between start_date and \
+        end_date. The attributes of the dynamic meta-network are loaded when its opening tag is read. Each tag is \
+        cleared once the next one is requested.
+
+        :returns: the <MetaNetwork> tags in the file, in document order
+        :rtype: generator of :class:`lxml._Element`
+        """
+        dmn_tag = None
+        for root_tag, mn_tag in dmlpu.iterparse_metanetworks(dynetml_path):
+            if root_tag.tag not in ['DynamicMetaNetwork', 'DynamicNetwork']:
+                return
+
+            if dmn_tag is None:
+                dmn_tag = root_tag
+                for attrib_key in dmn_tag.attrib:
+                    self.attributes[attrib_key] = dmlpu.format_prop(dmn_tag.attrib[attrib_key])
+
+            if self._is_in_date_range(mn_tag.attrib['id'], start_date, end_date):
+                yield mn_tag
+
+    def _get_metanetwork_class(self, network_format=None):
+        """
+        :param str|None network_format: A network format; defaults to the format of the dynamic meta-network
+        :returns: The subclass of :class:`MetaNetwork` that stores networks in this network format
+        """
+        if network_format is None:
+            network_format = self.__network_format
+
+        if network_format == 'networkx':
             from MetaNetworkNetworkX import MetaNetworkNX as MetaNetwork
-        elif self.__network_format == 'igraph':
+        elif network_format == 'igraph':
             from MetaNetworkIGraph import MetaNetworkIG as MetaNetwork
         else:
             from MetaNetwork import MetaNetwork
 
-        for mn_tag in dmn_tag.iterfind('MetaNetwork'):
+        return MetaNetwork
 
-            if start_date is not None:
-                if start_date > datetime.strptime(mn_tag.attrib['id'], '%Y%m%dT%H:%M:%S'):
-                    continue
+    def _new_metanetwork(self, symbol_table=None):
+        """
+        :param SymbolTable|None symbol_table: The table in which the meta-network interns node ids; defaults to the \
+        symbol table of the dynamic meta-network
+        :returns: An empty meta-network in this network format
+        """
+        options = {'lazy_networks': self.__lazy_networks}
+        if self.__include_nodes:
+            options['include_nodes'] = True
+        return self._get_metanetwork_class()(symbol_table if symbol_table is not None else self.symbol_table,
+                                             **options)
 
-            if end_date is not None:
-                if end_date < datetime.strptime(mn_tag.attrib['id'], '%Y%m%dT%H:%M:%S'):
-                    continue
+    def _get_fragment_path(self, dynetml_path):
+        """
+        :param str|unicode dynetml_path: Path to a DyNetML file
+        :returns: The absolute path of the file, from which lazily loaded networks can be read back by their offsets, \
+        or None if the file is compressed and they can't
+        :rtype: str|unicode|None
+        """
+        return os.path.abspath(dynetml_path) if dmlpu.get_compression(dynetml_path) is None else None
 
-            self.metanetworks.append(MetaNetwork())
-            self.metanetworks[-1].load_from_tag(mn_tag, properties_to_include, properties_to_ignore,
-                                                nodeclasses_to_include, nodeclasses_to_ignore, networks_to_include,
-                                                networks_to_ignore)
+    def _is_in_date_range(self, mn_id, start_date, end_date):
+        """
+        :param str|unicode mn_id: The id of a meta-network, formatted as a timestamp
+        :param datetime.datetime start_date: The earliest allowable datetime, or None
+        :param datetime.datetime end_date: The latest allowable datetime, or None
+        :returns: True if the meta-network falls between start_date and end_date
+        :rtype: bool
+        """
+        if start_date is None and end_date is None:
+            return True
+
+        mn_date = dmlpu.parse_timestamp(mn_id)
+        return (start_date is None or start_date <= mn_date) and (end_date is None or mn_date <= end_date)
+
+    def get_metanetworks_between(self, start_date=None, end_date=None):
+        """
+        :param datetime.datetime start_date: The earliest allowable datetime, or None
+        :param datetime.datetime end_date: The latest allowable datetime, or None
+        :returns: The meta-networks that fall between start_date and end_date, in their current order
+        :rtype: list
+        """
+        dmlpu.check_type(start_date, 'start_date', (datetime, type(None)))
+        dmlpu.check_type(end_date, 'end_date', (datetime, type(None)))
+
+        timestamps, positions = self._get_time_index()
+        first = 0 if start_date is None else bisect.bisect_left(timestamps, start_date)
+        last = len(timestamps) if end_date is None else bisect.bisect_right(timestamps, end_date)
+        return [self.metanetworks[i] for i in sorted(positions[first:last])]
+
+    def get_view(self):
+        """
+        :returns: A view of all of the meta-networks, in order of their timestamps
+        :rtype: MetaNetworkView
+        """
+        timestamps, metanetworks = self._get_time_ordered()
+        return MetaNetworkView(metanetworks, timestamps)
+
+    def at(self, timestamp):
+        """
+        :param datetime.datetime timestamp: A datetime
+        :returns: A view of the meta-networks whose timestamp is exactly timestamp
+        :rtype: MetaNetworkView
+        """
+        dmlpu.check_type(timestamp, 'timestamp', datetime)
+        return self.between(timestamp, timestamp)
+
+    def between(self, start_date=None, end_date=None):
+        """
+        Unlike :meth:`get_metanetworks_between`, this returns a view rather than a list, ordered by timestamp.
+
+        :param datetime.datetime start_date: The earliest allowable datetime, or None
+        :param datetime.datetime end_date: The latest allowable datetime, or None
+        :returns: A view of the meta-networks that fall between start_date and end_date
+        :rtype: MetaNetworkView
+        """
+        dmlpu.check_type(start_date, 'start_date', (datetime, type(None)))
+        dmlpu.check_type(end_date, 'end_date', (datetime, type(None)))
+        return self.get_view().between(start_date, end_date)
+
+    def nearest(self, timestamp):
+        """
+        :param datetime.datetime timestamp: A datetime
+        :returns: The meta-network whose timestamp is closest to timestamp; ties go to the earlier meta-network. \
+        Returns None if there are no meta-networks.
+        :rtype: MetaNetwork|None
+        """
+        dmlpu.check_type(timestamp, 'timestamp', datetime)
+
+        timestamps, positions = self._get_time_index()
+        if len(timestamps) == 0:
+            return None
+
+        i = bisect.bisect_left(timestamps, timestamp)
+        if i == len(timestamps) or (i > 0 and timestamp - timestamps[i - 1] <= timestamps[i] - timestamp):
+            i -= 1
+        return self.metanetworks[positions[i]]
+
+    def resample(self, interval, start_date=None, end_date=None):
+        """
+        Splits the meta-networks into consecutive windows of a fixed length. Each window includes its start and \
+        excludes its end; windows without any meta-networks are still returned, with an empty view.
+
+        :param datetime.timedelta interval: The length of each window
+        :param datetime.datetime start_date: The start of the first window; defaults to the earliest timestamp
+        :param datetime.datetime end_date: The last window is the one containing end_date; defaults to the latest \
+        timestamp
+        :returns: The start of each window and a view of the meta-networks in it, in order
+        :rtype: list of :class:`tuple_(datetime.datetime, MetaNetworkView)`
+        """
+        dmlpu.check_type(interval, 'interval', timedelta)
+        dmlpu.check_type(start_date, 'start_date', (datetime, type(None)))
+        dmlpu.check_type(end_date, 'end_date', (datetime, type(None)))
+        if interval <= timedelta(0):
+            raise ValueError('interval must be positive; got {0}'.format(interval))
+
+        timestamps, metanetworks = self._get_time_ordered()
+        if len(timestamps) == 0 and (start_date is None or end_date is None):
+            return []
+
+        window_start = timestamps[0] if start_date is None else start_date
+        end_date = timestamps[-1] if end_date is None else end_date
+
+        windows = []
+        first = bisect.bisect_left(timestamps, window_start)
+        while window_start <= end_date:
+            window_end = window_start + interval
+            last = bisect.bisect_left(timestamps, window_end, first)
+            windows.append((window_start, MetaNetworkView(metanetworks, timestamps, first, last)))
+            window_start, first = window_end, last
+
+        return windows
 
     def drop_metanetworks_before(self, start_date):
         """:param datetime.datetime start_date: Drop meta-networks that occur before this datetime."""
-        while len(self.metanetworks) > 0 and \
-                datetime.strptime(self.metanetworks[0].attributes['id'], '%Y%m%dT%H:%M:%S') < start_date:
-            self.metanetworks.remove(0)
+        dmlpu.check_type(start_date, 'start_date', datetime)
+
+        timestamps, positions = self._get_time_index()
+        self._drop_positions(positions[:bisect.bisect_left(timestamps, start_date)])
 
     def drop_metanetworks_after(self, end_date):
         """:param datetime.datetime end_date: Drop meta-networks that occur after this datetime."""
-        while len(self.metanetworks) > 0 and \
-                datetime.strptime(self.metanetworks[-1].attributes['id'], '%Y%m%dT%H:%M:%S') > end_date:
-            self.metanetworks.remove(-1)
+        dmlpu.check_type(end_date, 'end_date', datetime)
+
+        timestamps, positions = self._get_time_index()
+        self._drop_positions(positions[bisect.bisect_right(timestamps, end_date):])
 
     def drop_metanetworks_for_ranges(self, range_tuples, keep_in_range=True):
         """
@@ -134,32 +644,305 @@ class DynamicMetaNetwork:
         :param list keep_in_range: If true, dates outside of any tuple are dropped. If false, dates within any tuple \
         are dropped.
         """
-        dmlpu.check_contained_types(range_tuples, 'range_tuples', datetime)
+        dmlpu.check_contained_types(range_tuples, 'range_tuples', tuple)
+        for r_t in range_tuples:
+            dmlpu.check_contained_types(r_t, 'range_tuples', datetime)
+            if len(r_t) != 2:
+                raise ValueError('range_tuples must contain pairs of datetimes; got {0}'.format(r_t))
+
+        timestamps, positions = self._get_time_index()
+        in_range = set()
+        for start_date, end_date in range_tuples:
+            in_range.update(positions[bisect.bisect_left(timestamps, start_date):
+                                      bisect.bisect_right(timestamps, end_date)])
+
+        if keep_in_range:
+            self._drop_positions(set(xrange(len(self.metanetworks))) - in_range)
+        else:
+            self._drop_positions(in_range)
+
+    def _get_time_index(self):
+        """
+        Returns the time index of the meta-networks: their timestamps in sorted order, and the position in \
+        self.metanetworks of the meta-network with each timestamp. The index is rebuilt only when the list of \
+        meta-networks or the id of a meta-network has changed since it was last built, which is checked against the \
+        version counters of the list and of each meta-network's attributes rather than by parsing any ids; a list \
+        assigned to self.metanetworks is first wrapped in a :class:`MetaNetworkList.MetaNetworkList`.
 
+        :returns: The sorted timestamps, and the position of the meta-network with each one
+        :rtype: :class:`tuple_(list, list)`
+        :raises ValueError: if the id of a meta-network isn't a timestamp
+        """
+        if not isinstance(self.metanetworks, MetaNetworkList):
+            self.metanetworks = MetaNetworkList(self.metanetworks)
+
+        versions = self.metanetworks.version, [mn.attributes.id_version for mn in self.metanetworks]
+        if self.__time_index is None or self.__time_index[0] is not self.metanetworks or \
+                self.__time_index[1] != versions:
+            entries = sorted((mn.get_timestamp(), i) for i, mn in enumerate(self.metanetworks))
+            self.__time_index = (self.metanetworks, versions, [entry[0] for entry in entries],
+                                 [entry[1] for entry in entries],
+                                 tuple(self.metanetworks[entry[1]] for entry in entries))
+
+        return self.__time_index[2], self.__time_index[3]
+
+    def _get_time_ordered(self):
+        """
+        :returns: The sorted timestamps of the meta-networks, and a tuple of the meta-networks in the same order, \
+        which views hold so that they aren't affected by later changes to self.metanetworks
+        :rtype: :class:`tuple_(list, tuple)`
+        """
+        timestamps = self._get_time_index()[0]
+        return timestamps, self.__time_index[4]
+
+    def _drop_positions(self, positions):
+        """:param positions: The positions in self.metanetworks of the meta-networks to be dropped"""
+        positions = set(positions)
+        if len(positions) > 0:
+            self.metanetworks[:] = [mn for i, mn in enumerate(self.metanetworks) if i not in positions]
+
+    def to_sparse_stack(self, network_id, sparse_format='csr'):
+        """
+        Converts a network in each of the meta-networks to a SciPy sparse matrix. Every matrix shares the same row and \
+        column labels: the union of the nodes of the network's source and target nodesets across all meta-networks.
+
+        :param str|unicode network_id: The id of the network to be converted
+        :param str sparse_format: The format of the matrices; "csr", "csc", or "coo"
+        :returns: A list with a matrix for each meta-network (or None for meta-networks without the network), and \
+        sorted arrays of the labels of the rows and columns
+        :rtype: :class:`tuple_(list, numpy.ndarray, numpy.ndarray)`
+        """
+        dmlpu.check_type(network_id, 'network_id', (str, unicode))
+        if sparse_format not in ['csr', 'csc', 'coo']:
+            raise ValueError('sparse_format must be "csr", "csc" or "coo"; got {0}'.format(sparse_format))
+
+        import numpy
+
+        columns = []
+        row_ids = []
+        col_ids = []
+        is_one_mode = False
+        is_symmetric = False
         for mn in self.metanetworks:
-            date_val = datetime.strptime(self.metanetworks[-1].attributes['id'], '%Y%m%dT%H:%M:%S')
-            for r_t in range_tuples:
-                if (keep_in_range and r_t[0] > date_val or r_t[1] < date_val) or \
-                        (keep_in_range is False and r_t[0] <= date_val <= r_t[1]):
-                    self.metanetworks.remove(mn)
+            if network_id not in mn.networks:
+                columns.append(None)
+                continue
+
+            columns.append(mn._get_network_columns(network_id))
+            source_ids, target_ids = mn._get_network_nodeset_ids(network_id)
+            row_ids.extend(source_ids)
+            row_ids.extend(columns[-1][0])
+            col_ids.extend(target_ids)
+            col_ids.extend(columns[-1][1])
+            is_one_mode = mn._is_one_mode(network_id)
+            is_symmetric = is_one_mode and not mn._get_network_attributes(network_id)['isDirected']
+
+        if is_one_mode:
+            row_labels = col_labels = numpy.unique(numpy.array(row_ids + col_ids))
+        else:
+            row_labels = numpy.unique(numpy.array(row_ids))
+            col_labels = numpy.unique(numpy.array(col_ids))
 
-    def write_dynetml(self, out_file_path):
-        """:param str|unicode out_file_path: Write the dynamic meta-network to this path."""
-        if type(out_file_path) not in [str, unicode]:
-            raise TypeError('out_file_path must be str or unicode')
+        matrices = []
+        for mn_columns in columns:
+            if mn_columns is None:
+                matrices.append(None)
+            else:
+                matrices.append(dmlpu.get_sparse_matrix(mn_columns[0], mn_columns[1], mn_columns[2], row_labels,
+                                                        col_labels, is_symmetric, sparse_format))
+
+        return matrices, row_labels, col_labels
+
+    def aggregate(self, network_id, reducer='sum', start_date=None, end_date=None, half_life=None,
+                  reference_date=None, network_format=None):
+        """
+        Collapses a network in each of the meta-networks between start_date and end_date into a single network. Links \
+        are merged as arrays of the integer codes their nodes have in the symbol table, so the time taken grows with \
+        the total number of links being merged.
+
+        :param str|unicode network_id: The id of the network to be aggregated
+        :param str reducer: How the links between a pair of nodes are combined: "sum" adds their values, "count" \
+        counts the meta-networks containing the link, "union" gives every link that appears a value of 1.0, and \
+        "decay" adds their values after halving them for every half_life by which their meta-network precedes \
+        reference_date
+        :param datetime.datetime start_date: The earliest allowable datetime, or None
+        :param datetime.datetime end_date: The latest allowable datetime, or None
+        :param datetime.timedelta half_life: The half-life of link values; required by the "decay" reducer
+        :param datetime.datetime reference_date: The datetime at which decayed values are undiminished; defaults to \
+        the latest timestamp of the meta-networks being aggregated
+        :param str|unicode|None network_format: The format of the aggregate network: "dict", "igraph" or "networkx"; \
+        defaults to the format of the dynamic meta-network
+        :returns: The aggregate network, stored as the network format stores networks (see \
+        :attr:`MetaNetwork.networks`), or None if no meta-network between start_date and end_date has the network
+        """
+        network_format = self._check_aggregate_arguments(network_id, reducer, half_life, network_format)
+        dmlpu.check_type(reference_date, 'reference_date', (datetime, type(None)))
+        return self._aggregate(network_id, self.between(start_date, end_date), reducer, half_life, reference_date,
+                               network_format)
+
+    def aggregate_windows(self, network_id, interval, reducer='sum', start_date=None, end_date=None, half_life=None,
+                          network_format=None):
+        """
+        Aggregates a network over consecutive windows of a fixed length; see :meth:`resample` and :meth:`aggregate`. \
+        With the "decay" reducer, the values in each window are decayed relative to the window's latest timestamp.
+
+        :param str|unicode network_id: The id of the network to be aggregated
+        :param datetime.timedelta interval: The length of each window
+        :param str reducer: "sum", "count", "union", or "decay"; see :meth:`aggregate`
+        :param datetime.datetime start_date: The start of the first window; defaults to the earliest timestamp
+        :param datetime.datetime end_date: The last window is the one containing end_date; defaults to the latest \
+        timestamp
+        :param datetime.timedelta half_life: The half-life of link values; required by the "decay" reducer
+        :param str|unicode|None network_format: The format of the aggregate networks; defaults to the format of the \
+        dynamic meta-network
+        :returns: The start of each window and the aggregate network for it, or None if no meta-network in the window \
+        has the network
+        :rtype: list of tuple
+        """
+        network_format = self._check_aggregate_arguments(network_id, reducer, half_life, network_format)
+        return [(window_start, self._aggregate(network_id, view, reducer, half_life, None, network_format))
+                for window_start, view in self.resample(interval, start_date, end_date)]
+
+    def _check_aggregate_arguments(self, network_id, reducer, half_life, network_format):
+        """
+        Validates the arguments shared by :meth:`aggregate` and :meth:`aggregate_windows`
+
+        :returns: The network format of the aggregate networks
+        :rtype: str
+        """
+        dmlpu.check_type(network_id, 'network_id', (str, unicode))
+        if reducer not in ['sum', 'count', 'union', 'decay']:
+            raise ValueError('reducer must be "sum", "count", "union" or "decay"; got {0}'.format(reducer))
+        dmlpu.check_type(half_life, 'half_life', (timedelta, type(None)))
+        if reducer == 'decay' and (half_life is None or half_life <= timedelta(0)):
+            raise ValueError('the "decay" reducer needs a positive half_life')
+
+        if network_format is None:
+            return self.__network_format
+        dmlpu.check_type(network_format, 'network_format', (str, unicode))
+        if network_format.lower() not in ['dict', 'igraph', 'networkx', '']:
+            raise ValueError('network_format must be blank, "dict", "igraph" or "networkx"; got {0}'.
+                             format(network_format))
+        return network_format.lower()
+
+    def _aggregate(self, network_id, view, reducer, half_life, reference_date, network_format):
+        """
+        Aggregates a network across the meta-networks in a view; see :meth:`aggregate`
+
+        :param MetaNetworkView view: The meta-networks to be aggregated
+        :returns: The aggregate network, or None if no meta-network in the view has the network
+        """
+        import numpy
+
+        timestamps = view.get_timestamps()
+        if reference_date is None and len(timestamps) > 0:
+            reference_date = timestamps[-1]
+
+        nk_attributes = None
+        code_columns = []
+        for mn, timestamp in izip(view, timestamps):
+            if network_id not in mn.networks:
+                continue
+            if nk_attributes is None:
+                nk_attributes = dict(mn._get_network_attributes(network_id))
+
+            sources, targets, values = mn._get_network_columns(network_id)
+            if len(sources) == 0:
+                continue
+
+            source_codes = numpy.frombuffer(self.symbol_table.get_codes(sources), dtype='l').astype(numpy.int64)
+            target_codes = numpy.frombuffer(self.symbol_table.get_codes(targets), dtype='l').astype(numpy.int64)
+            if not nk_attributes['isDirected']:
+                # An undirected link is the same link whichever way round its nodes are listed
+                source_codes, target_codes = numpy.minimum(source_codes, target_codes), \
+                    numpy.maximum(source_codes, target_codes)
+
+            if reducer in ('count', 'union'):
+                weights = numpy.ones(len(sources))
+            else:
+                weights = numpy.array(values, dtype=float)
+                if reducer == 'decay':
+                    weights *= 0.5 ** ((reference_date - timestamp).total_seconds() / half_life.total_seconds())
+
+            code_columns.append((source_codes, target_codes, weights))
+
+        if nk_attributes is None:
+            return None
+
+        sources = []
+        targets = []
+        values = []
+        if len(code_columns) > 0:
+            # Each pair of codes becomes a single integer key, so links are merged by a sort and a weighted count
+            code_count = len(self.symbol_table)
+            keys = numpy.concatenate([columns[0] * code_count + columns[1] for columns in code_columns])
+            unique_keys, inverse = numpy.unique(keys, return_inverse=True)
+            totals = numpy.bincount(inverse, weights=numpy.concatenate([columns[2] for columns in code_columns]))
+
+            symbols = self.symbol_table.get_symbols()
+            sources = [symbols[code] for code in (unique_keys // code_count).tolist()]
+            targets = [symbols[code] for code in (unique_keys % code_count).tolist()]
+            values = [1.0] * len(sources) if reducer == 'union' else totals.tolist()
+
+        nk_attributes['isBinary'] = reducer == 'union'
+        mn = self._get_metanetwork_class(network_format)(self.symbol_table)
+        mn._add_network(nk_attributes, sources, targets, values)
+        return mn.networks[network_id]
+
+    def write_dynetml(self, out_file_path, pretty_print=True, compress=None):
+        """
+        Writes the dynamic meta-network to DyNetML. Each meta-network's nodes and links are streamed straight to the \
+        file, so no element tree or string holding the whole document is ever built.
+
+        :param str|unicode|file out_file_path: Write the dynamic meta-network to this path, or to this file-like object
+        :param bool pretty_print: If True, elements are indented and placed on their own lines
+        :param bool|str|None compress: The compression of the output: "gzip", "bz2", "xz", or "zstd". True means \
+        gzip and False no compression; by default, the compression is taken from the extension of out_file_path.
+        """
+        if not hasattr(out_file_path, 'write'):
+            if type(out_file_path) not in [str, unicode]:
+                raise TypeError('out_file_path must be str or unicode')
+
+            if os.path.exists(out_file_path) and os.path.isdir(out_file_path):
+                raise IOError('out_file_path cannot be a directory')
+
+        import dynetmlwriter
+        dynetmlwriter.write_dynetml(out_file_path, self.metanetworks, self.attributes, pretty_print, compress)
+
+    def save_binary(self, out_file_path):
+        """
+        Writes the dynamic meta-network to a compact binary file that can be reloaded with :meth:`load_binary` \
+        without parsing any XML. A single table of node ids is shared by every meta-network in the file.
+
+        :param str|unicode out_file_path: Write the dynamic meta-network to this path.
+        """
+        dmlpu.check_type(out_file_path, 'out_file_path', (str, unicode))
 
         if os.path.exists(out_file_path) and os.path.isdir(out_file_path):
             raise IOError('out_file_path cannot be a directory')
 
-        # bs = self.convert_to_dynetml(True)
-        #
-        # with codecs.open(out_file_path, 'w', 'utf8') as outfile:
-        #     outfile.write(bs.prettify())
-        xml_root = self.convert_to_dynetml()
+        import dynetmlbinary
+        dynetmlbinary.write_metanetwork_states(out_file_path,
+                                               {'kind': 'DynamicMetaNetwork', 'attributes': self.attributes},
+                                               [mn._export_state() for mn in self.metanetworks])
+
+    def load_binary(self, in_file_path):
+        """
+        :param str|unicode in_file_path: Load a dynamic meta-network from a file written by :meth:`save_binary`. \
+        Networks are stored in this dynamic meta-network's format, whatever format they were saved from.
+        """
+        dmlpu.check_type(in_file_path, 'in_file_path', (str, unicode))
 
-        with codecs.open(out_file_path, 'w', 'utf8') as outfile:
-            outfile.write('<?xml version="1.0" standalone="yes"?>\n\n')
-            outfile.write(etree.tostring(xml_root, pretty_print=True))
+        import dynetmlbinary
+        header, node_ids, states = dynetmlbinary.read_metanetwork_states(in_file_path, self.symbol_table)
+        if header.get('kind') != 'DynamicMetaNetwork':
+            raise ValueError('{0} does not contain a dynamic meta-network'.format(in_file_path))
+
+        self.attributes.update(header['attributes'])
+
+        for mn_state in states:
+            self.metanetworks.append(self._new_metanetwork())
+            self.metanetworks[-1]._import_state(mn_state, node_ids)
 
     def convert_to_dynetml(self):
         """Return the dynamic meta-network as an :class:`lxml._Element`"""
@@ -192,4 +975,68 @@ class DynamicMetaNetwork:
             print u' {0}: {1}'.format(attr, self.attributes[attr]).encode('utf8')
 
         for mm in self.metanetworks:
-            mm.pretty_print()
\ No newline at end of file
+            mm.pretty_print()
+
+
+def _iter_metanetwork_ranges(dynetml_path, inclusion_test, encoding):
+    """
+    Scans a DyNetML file for <MetaNetwork> elements without parsing them; used by \
+    :meth:`DynamicMetaNetwork.load_from_dynetml_file` to split a file between worker processes
+
+    :param str|unicode|file dynetml_path: Path to a DyNetML file, or a file-like object containing one
+    :param lambda inclusion_test: Test for whether a meta-network should be loaded, given its id
+    :param str encoding: The encoding of the file, as returned by :func:`dynetmlparsingutils.get_encoding`
+    :returns: The path of the file, and the offsets at which each element starts and ends. Workers can't seek into \
+    compressed data or a file-like object, so for those the path is None and the text of the element follows instead.
+    :rtype: generator of :class:`tuple_(str|None, int, int, str|None)`
+    """
+    if hasattr(dynetml_path, 'read') or dmlpu.get_compression(dynetml_path) is not None:
+        dynetml_file = dmlpu.open_dynetml(dynetml_path)
+        try:
+            for mn_id, mn_start, mn_end, mn_text in dmlpu.scan_metanetworks(dynetml_file, inclusion_test,
+                                                                            encoding=encoding):
+                if mn_text is not None:
+                    yield None, mn_start, mn_end, mn_text
+        finally:
+            if dynetml_file is not dynetml_path:
+                dynetml_file.close()
+        return
+
+    with open(dynetml_path, 'rb') as dynetml_file:
+        for mn_id, mn_start, mn_end, mn_text in dmlpu.scan_metanetworks(dynetml_file, lambda mn_id: False,
+                                                                        encoding=encoding):
+            if inclusion_test(mn_id):
+                yield dynetml_path, mn_start, mn_end, None
+
+
+def _load_metanetwork_state(args):
+    """
+    Parses a <MetaNetwork> element; used by worker processes in :meth:`DynamicMetaNetwork.load_from_dynetml_file`
+
+    :param tuple args: A range from :func:`_iter_metanetwork_ranges` and the encoding of the file, followed by the \
+    arguments to :meth:`MetaNetwork.load_from_tag`
+    :returns: The meta-network in the compact form returned by :meth:`MetaNetwork._export_state`, with each network \
+    as the link columns read from its <network> tag, so that it is only built once, by the process loading it
+    :rtype: tuple
+    """
+    dynetml_path, mn_start, mn_end, mn_text = args[0]
+    if mn_text is None:
+        with open(dynetml_path, 'rb') as dynetml_file:
+            dynetml_file.seek(mn_start)
+            mn_text = dynetml_file.read(mn_end - mn_start)
+
+    mn = _LinkColumnsMetaNetwork()
+    mn.load_from_tag(dmlpu.parse_fragment(mn_text, args[1]), *args[2:])
+    return mn._export_state()
+
+
+class _LinkColumnsMetaNetwork(MetaNetwork):
+    """
+    A meta-network that keeps each network as the columns returned by \
+    :func:`dynetmlparsingutils.get_link_columns`, without building it; used by :func:`_load_metanetwork_state`
+    """
+    def _add_network(self, nk_attributes, sources, targets, values):
+        self.networks[nk_attributes['id']] = nk_attributes, (sources, targets, values)
+
+    def _get_network_columns(self, network_id):
+        return self.networks[network_id][1]
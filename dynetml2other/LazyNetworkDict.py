@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: LazyNetworkDict
+:synopsis: A dictionary of networks that are only built when they are first accessed.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from collections import MutableMapping
+import dynetmlparsingutils as dmlpu
+from lxml import etree
+
+
+class LazyNetworkDict(MutableMapping):
+    """
+    The LazyNetworkDict class holds the networks of a :class:`MetaNetwork.MetaNetwork` loaded with lazy_networks set. \
+    When a meta-network is loaded, each network is added unbuilt: only its attributes and where to find its \
+    <network> element are kept, so no graph is built. The first time a network is read, its element is parsed and \
+    built by the meta-network's back-end, and replaces its unbuilt entry.
+
+    Checking for a network id, counting the networks, and iterating over their ids never builds a network; reading \
+    a network, or calling :meth:`values` or :meth:`items`, does.
+    """
+    def __init__(self, build_network):
+        """
+        :param build_network: A function that builds the network in a <network> tag and adds it to this dictionary, \
+        such as :meth:`MetaNetwork.MetaNetwork._parse_and_add_graph_tag`
+        """
+        self._networks = {}
+        self._build_network = build_network
+
+    def __len__(self):
+        return len(self._networks)
+
+    def __iter__(self):
+        return iter(self._networks)
+
+    def __contains__(self, network_id):
+        return network_id in self._networks
+
+    def __getitem__(self, network_id):
+        network = self._networks[network_id]
+        if isinstance(network, UnbuiltNetwork):
+            # Building replaces the value of an existing key, so it is safe during iteration over the ids
+            self._build_network(network.get_tag())
+            network = self._networks[network_id]
+        return network
+
+    def __setitem__(self, network_id, network):
+        self._networks[network_id] = network
+
+    def __delitem__(self, network_id):
+        del self._networks[network_id]
+
+    def __repr__(self):
+        return 'LazyNetworkDict(<{0} networks, {1} built>)'.format(len(self), len(self) - len(self.get_unbuilt_ids()))
+
+    def add_unbuilt(self, nk_attributes, network_text=None, encoding='utf-8', dynetml_path=None, span=None):
+        """
+        Adds a network without building it. Its <network> element is either given as text, or found by its offsets \
+        in an uncompressed DyNetML file, which is read again when the network is built.
+
+        :param dict nk_attributes: The attributes of the network, as returned by \
+        :func:`dynetmlparsingutils.get_network_attributes`
+        :param str|None network_text: The text of the <network> element
+        :param str encoding: The encoding of the text or the file
+        :param str|unicode|None dynetml_path: The path to the file holding the element, if network_text is None
+        :param tuple|None span: The offsets in the file at which the element starts and ends
+        """
+        self._networks[nk_attributes['id']] = UnbuiltNetwork(nk_attributes, network_text, encoding, dynetml_path, span)
+
+    def is_built(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: True if the network has been built
+        :rtype: bool
+        """
+        return not isinstance(self._networks[network_id], UnbuiltNetwork)
+
+    def get_unbuilt_ids(self):
+        """
+        :returns: The ids of the networks that haven't been built yet
+        :rtype: list
+        """
+        return [network_id for network_id in self._networks if not self.is_built(network_id)]
+
+    def get_unbuilt_attributes(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network that hasn't been built
+        :returns: The attributes of the network, read without building it
+        :rtype: dict
+        :raises ValueError: if the network has been built
+        """
+        if self.is_built(network_id):
+            raise ValueError('{0} has already been built'.format(network_id))
+        return self._networks[network_id].nk_attributes
+
+
+class UnbuiltNetwork(object):
+    """
+    A network that has been loaded but not built
+
+    :ivar nk_attributes: The attributes of the network
+    :ivar network_text: The text of the <network> element holding the network's links, or None if it is read from \
+    dynetml_path
+    :ivar encoding: The encoding of the text or the file
+    :ivar dynetml_path: The path to the uncompressed DyNetML file holding the element
+    :ivar span: The offsets in the file at which the element starts and ends
+    """
+    __slots__ = ('nk_attributes', 'network_text', 'encoding', 'dynetml_path', 'span')
+
+    def __init__(self, nk_attributes, network_text=None, encoding='utf-8', dynetml_path=None, span=None):
+        if network_text is None and (dynetml_path is None or span is None):
+            raise ValueError('either network_text or both dynetml_path and span must be set')
+        self.nk_attributes = nk_attributes
+        self.network_text = network_text
+        self.encoding = encoding
+        self.dynetml_path = dynetml_path
+        self.span = span
+
+    def get_tag(self):
+        """
+        :returns: The parsed <network> element
+        :rtype: :class:`lxml._Element`
+        :raises ValueError: if the element was read from a file that has changed since the network was loaded
+        """
+        if self.network_text is not None:
+            return dmlpu.parse_fragment(self.network_text, self.encoding)
+
+        with open(self.dynetml_path, 'rb') as dynetml_file:
+            dynetml_file.seek(self.span[0])
+            network_text = dynetml_file.read(self.span[1] - self.span[0])
+        try:
+            nk_tag = dmlpu.parse_fragment(network_text, self.encoding)
+        except etree.XMLSyntaxError:
+            nk_tag = None
+        if nk_tag is None or nk_tag.tag != 'network' or nk_tag.attrib.get('id') != self.nk_attributes['id']:
+            raise ValueError('network {0} is no longer at offset {1} of {2}; the file has changed since it was loaded'.
+                             format(self.nk_attributes['id'], self.span[0], self.dynetml_path))
+        return nk_tag
@@ -10,39 +10,66 @@
 
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
-import codecs
-from collections import defaultdict
+from CSRNetwork import CSRNetwork
 import dynetmlparsingutils as dmlpu
+from dynetmlrecords import NetworkAttributes, Nodeset
+from itertools import izip
+from LazyNetworkDict import LazyNetworkDict
 from lxml import etree
+from MetaNetworkList import MetaNetworkAttributes
 import os
+from SymbolTable import SymbolTable
 
 
-class MetaNetwork:
+class MetaNetwork(object):
     """
-    The MetaNetwork class is a container for a meta-network extracted from DyNetML. The base class stores network data \
-    in dictionaries; using a graphing library to store network data requires that you use one of the two SubClasses. \
+    The MetaNetwork class is a container for a meta-network extracted from DyNetML. The base class stores each network \
+    as a tuple of a :class:`dynetmlrecords.NetworkAttributes` record, which is read like a dictionary of \
+    attributes, and a :class:`CSRNetwork`, which can be read like a dictionary of \
+    dictionaries of link weights; using a graphing library to store network data requires that you use one of the two SubClasses. \
     Manipulating networks will *not* guarantee corresponding modifications of data contained in __node_tree; you will \
     need to make any desired transformations to the nodes yourself.
 
+    :ivar attributes: A :class:`MetaNetworkList.MetaNetworkAttributes` dictionary of the meta-network's attributes, \
+    such as its id. Any other mapping assigned to it is copied into one.
     :ivar properties: A dictionary of the different properties associated with the meta-network.
     :ivar propertyIdentities: A dictionary of the two defining traits of each property associated with the network
     :ivar __node_tree: A three-layer dictionary laying out node sets grouped into classes, nodes with node sets, and \
     properties associated with each node: self.nodesets[node class][node set][node][node property] = <property>. \
     *Note* that node attributes are also stored in the dictionary. If an attribute and a property colide on some \
     value, the property value will be retained. __node_tree is private in order to regulate how properties are added \
-    and to help insure that networks are valid. This may change in future updates.
-    :ivar networks: A dictionary of the different networks in the meta-network.
+    and to help insure that networks are valid. This may change in future updates. Nodesets and nodes are stored as \
+    :class:`dynetmlrecords.Nodeset` and :class:`dynetmlrecords.Node` records, which can still be indexed like tuples.
+    :ivar networks: A dictionary of the different networks in the meta-network. If lazy_networks is set, it is a \
+    :class:`LazyNetworkDict`, and each network is only built the first time it is read.
+    :ivar lazy_networks: If True, loading a meta-network only records each network's attributes and where to find \
+    its <network> element, and its links are parsed when the network is first read. Links are only skipped without \
+    being parsed when the meta-network is loaded with :meth:`load_from_fragment`; a tag that has already been \
+    parsed keeps each network's XML instead.
     :ivar sources: A dictionary of source materials; it exists exclusively in networks generated by AutoMap, and is \
     not yet fully handled.
+    :ivar symbol_table: The :class:`SymbolTable` in which node ids are interned. Meta-networks belonging to the same \
+    :class:`DynamicMetaNetwork` share a single table, so each node id is only stored once across all of them.
     """
-    def __init__(self):
-        """Initializes a MetaNetwork"""
-        self.attributes = {}
+    def __init__(self, symbol_table=None, lazy_networks=False):
+        """
+        Initializes a MetaNetwork
+
+        :param SymbolTable|None symbol_table: The table in which node ids should be interned. Defaults to a new table.
+        :param bool lazy_networks: If True, networks are built when they are first read rather than when they are \
+        loaded
+        """
+        dmlpu.check_type(symbol_table, 'symbol_table', (SymbolTable, type(None)))
+        dmlpu.check_type(lazy_networks, 'lazy_networks', bool)
+        self.symbol_table = symbol_table if symbol_table is not None else SymbolTable()
+        self.attributes = MetaNetworkAttributes()
         self.properties = {}
         self.propertyIdentities = {}
         self.__node_tree = dmlpu.node_tree()
-        self.networks = {}
+        self.lazy_networks = lazy_networks
+        self.networks = LazyNetworkDict(self._parse_and_add_graph_tag) if lazy_networks else {}
         self.sources = {}
+        self.__timestamp = None
 
     def __validate_tree_branch(self, nodeclass_name, nodeset_name=None, node_name=None):
         """
@@ -53,8 +80,8 @@ class MetaNetwork:
         :param unicode|str|None node_name: The name of a node
         """
         dmlpu.check_type(nodeclass_name, 'nodeclass_name', (str, unicode))
-        dmlpu.check_type(nodeset_name, 'nodeset_name', (str, unicode, None))
-        dmlpu.check_type(node_name, 'node_name', (str, unicode, None))
+        dmlpu.check_type(nodeset_name, 'nodeset_name', (str, unicode, type(None)))
+        dmlpu.check_type(node_name, 'node_name', (str, unicode, type(None)))
 
         dmlpu.check_key(nodeclass_name, 'nodeclass_name', self.__node_tree, 'self.__node_tree')
         if nodeset_name is not None:
@@ -86,6 +113,43 @@ class MetaNetwork:
         self.load_from_tag(mn_tag, properties_to_include, properties_to_ignore, nodeclasses_to_include,
                            nodeclasses_to_ignore, networks_to_include, networks_to_ignore)
 
+    def load_from_fragment(self, mn_text, encoding='utf-8', dynetml_path=None, mn_offset=0,
+                           properties_to_include=None, properties_to_ignore=None, nodeclasses_to_include=None,
+                           nodeclasses_to_ignore=None, networks_to_include=None, networks_to_ignore=None):
+        """
+        Loads a meta-network from the text of a <MetaNetwork> element cut out of a DyNetML file, such as the text \
+        returned by :func:`dynetmlparsingutils.scan_metanetworks`. If lazy_networks is set, the links are cut out of \
+        the text before it is parsed, and each network only keeps the offsets of its <network> element in the file, \
+        or the element's text if no uncompressed file is given, until the network is first read.
+
+        :param str mn_text: The text of the element
+        :param str encoding: The encoding of the file, as returned by :func:`dynetmlparsingutils.get_encoding`
+        :param str|unicode|None dynetml_path: The path to the uncompressed DyNetML file holding the element, if any
+        :param int mn_offset: The offset in the file at which the element starts
+        :param list properties_to_include: a list of nodeclass properties that should be included
+        :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+        :param list nodeclasses_to_include: a list of nodeclasses that should be included
+        :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+        :param list networks_to_include: a list of networks that should be included
+        :param list networks_to_ignore: a list of networks that should be ignored
+        """
+        load_args = (properties_to_include, properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore,
+                     networks_to_include, networks_to_ignore)
+        if not self.lazy_networks or not dmlpu.can_scan_encoding(encoding):
+            self.load_from_tag(dmlpu.parse_fragment(mn_text, encoding), *load_args)
+            return
+
+        skeleton_text, spans = dmlpu.split_networks(mn_text)
+        mn_tag = dmlpu.parse_fragment(skeleton_text, encoding)
+        network_sources = {}
+        for nk_tag, (start, end) in izip(mn_tag.iter('network'), spans):
+            if dynetml_path is not None:
+                network_sources[nk_tag.attrib['id']] = {'encoding': encoding, 'dynetml_path': dynetml_path,
+                                                        'span': (mn_offset + start, mn_offset + end)}
+            else:
+                network_sources[nk_tag.attrib['id']] = {'encoding': encoding, 'network_text': mn_text[start:end]}
+        self._load_from_tag(mn_tag, load_args, network_sources)
+
     def load_from_tag(self, mn_tag, properties_to_include=None, properties_to_ignore=None, nodeclasses_to_include=None,
                       nodeclasses_to_ignore=None, networks_to_include=None, networks_to_ignore=None):
         """
@@ -99,6 +163,19 @@ class MetaNetwork:
         :param list networks_to_include: a list of networks that should be included
         :param list networks_to_ignore: a list of networks that should be ignored
         """
+        self._load_from_tag(mn_tag, (properties_to_include, properties_to_ignore, nodeclasses_to_include,
+                                     nodeclasses_to_ignore, networks_to_include, networks_to_ignore))
+
+    def _load_from_tag(self, mn_tag, load_args, network_sources=None):
+        """
+        :param lxml._Element mn_tag: A tag containing a dynamic meta-network
+        :param tuple load_args: The properties, nodeclasses, and networks to include and to ignore, as passed to \
+        :meth:`load_from_tag`
+        :param dict|None network_sources: If set, the arguments to :meth:`LazyNetworkDict.add_unbuilt` locating the \
+        <network> element of each network, by id, whose links have been cut out of mn_tag
+        """
+        properties_to_include, properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore, \
+            networks_to_include, networks_to_ignore = load_args
         prop_inclusion_test = dmlpu.validate_and_get_inclusion_test(
             (properties_to_include, 'properties_to_include'),
             (properties_to_ignore, 'properties_to_ignore'))
@@ -122,13 +199,46 @@ class MetaNetwork:
         self.propertyIdentities = \
             dmlpu.get_property_identities_dict(mn_tag.find('propertyIdentities'), prop_inclusion_test)
 
-        self.__node_tree = dmlpu.get_nodeclass_dict(mn_tag.find('nodes'), prop_inclusion_test, nodeclass_inclusion_test)
+        self.__node_tree = dmlpu.get_nodeclass_dict(mn_tag.find('nodes'), prop_inclusion_test, nodeclass_inclusion_test,
+                                                    self.symbol_table)
 
         for nk_tag in mn_tag.find('networks').iterfind('network'):
             if not network_inclusion_test(nk_tag.attrib['id']):
                 continue
 
-            self._parse_and_add_graph_tag(nk_tag)
+            if network_sources is not None:
+                self.networks.add_unbuilt(dmlpu.get_network_attributes(nk_tag), **network_sources[nk_tag.attrib['id']])
+            elif self.lazy_networks:
+                self.networks.add_unbuilt(dmlpu.get_network_attributes(nk_tag), etree.tostring(nk_tag, with_tail=False))
+            else:
+                self._parse_and_add_graph_tag(nk_tag)
+
+    @property
+    def attributes(self):
+        """
+        :returns: The meta-network's attributes
+        :rtype: :class:`MetaNetworkList.MetaNetworkAttributes`
+        """
+        return self.__attributes
+
+    @attributes.setter
+    def attributes(self, attributes):
+        """:param attributes: A mapping of attributes, which is copied unless it is a MetaNetworkAttributes"""
+        if not isinstance(attributes, MetaNetworkAttributes):
+            attributes = MetaNetworkAttributes(attributes)
+        self.__attributes = attributes
+
+    def get_timestamp(self):
+        """
+        :returns: The datetime in the meta-network's id, which is formatted as a '%Y%m%dT%H:%M:%S' timestamp. The id \
+        is only parsed again if it changes.
+        :rtype: datetime.datetime
+        :raises ValueError: if the id isn't a timestamp
+        """
+        mn_id = self.attributes['id']
+        if self.__timestamp is None or self.__timestamp[0] != mn_id:
+            self.__timestamp = mn_id, dmlpu.parse_timestamp(mn_id)
+        return self.__timestamp[1]
 
     def get_node_tree(self):
         """
@@ -150,7 +260,7 @@ class MetaNetwork:
         :param str|unicode nodeclass_name: name of the parent of nodeset_name
         :param str|unicode nodeset_name: name of the nodeset to be returned
         :return: self.__node_tree[nodeclass_name][nodeset_name]
-        :rtype: :class:`dmlpu.nodeset_tuple`
+        :rtype: :class:`dynetmlrecords.Nodeset`
         """
         self.__validate_tree_branch(nodeclass_name, nodeset_name)
         return self.__node_tree[nodeclass_name][nodeset_name]
@@ -161,10 +271,29 @@ class MetaNetwork:
         :param str|unicode nodeset_name: name of the parent of node_name
         :param str|unicode node_name: name of the node to be returned
         :return: self.__node_tree[nodeclass_name][nodeset_name][node]
-        :rtype: :class:`dynetmlparsingutils.node_tuple`
+        :rtype: :class:`dynetmlrecords.Node`
         """
         self.__validate_tree_branch(nodeclass_name, nodeset_name, node_name)
-        return self.__node_tree[nodeclass_name][nodeset_name][node_name]
+        return self.__node_tree[nodeclass_name][nodeset_name][1][node_name]
+
+    def get_property_column(self, nodeclass_name, nodeset_name, property_name):
+        """
+        Returns the values of a property for every node in a nodeset at once, read straight from the nodeset's \
+        columnar :class:`PropertyTable.PropertyTable`.
+
+        :param str|unicode nodeclass_name: name of the parent of nodeset_name
+        :param str|unicode nodeset_name: name of the nodeset
+        :param str|unicode property_name: name of the property
+        :returns: The ids of the nodes, a NumPy array of their values for the property (see \
+        :meth:`PropertyTable.PropertyTable.get_column`), and a boolean array marking the nodes that have a value
+        :rtype: :class:`tuple_(list, numpy.ndarray, numpy.ndarray)`
+        """
+        self.__validate_tree_branch(nodeclass_name, nodeset_name)
+        dmlpu.check_key(property_name, 'property_name', self.__node_tree[nodeclass_name][nodeset_name][0], nodeset_name)
+
+        property_table = self.__node_tree[nodeclass_name][nodeset_name].property_table
+        return property_table.get_node_ids(), property_table.get_column(property_name), \
+            property_table.get_mask(property_name)
 
     def set_node_property(self, nodeclass_name, nodeset_name, node_name, property_name, value):
         """
@@ -180,8 +309,9 @@ class MetaNetwork:
         dmlpu.check_type(property_name, 'property_name', (str, unicode))
         dmlpu.check_key(property_name, 'property_name', self.__node_tree[nodeclass_name][nodeset_name][0], nodeset_name)
 
-        self.__node_tree[nodeclass_name][nodeset_name][1][node_name][property_name] = \
-            dmlpu.format_prop(value, self.__node_tree[nodeclass_name][nodeset_name][0][property_name][0])
+        if isinstance(value, (str, unicode)):
+            value = dmlpu.format_prop(value, self.__node_tree[nodeclass_name][nodeset_name][0][property_name][0])
+        self.__node_tree[nodeclass_name][nodeset_name][1][node_name][1][property_name] = value
 
     def create_nodeset_property(self, nodeclass_name, nodeset_name, property_name, type_str, singlevalued_bool):
         """
@@ -203,6 +333,7 @@ class MetaNetwork:
         dmlpu.check_type(singlevalued_bool, 'singlevalued_bool', bool)
 
         self.__node_tree[nodeclass_name][nodeset_name][0][property_name] = type_str, singlevalued_bool
+        self.__node_tree[nodeclass_name][nodeset_name].property_table.add_column(property_name)
 
     def create_node(self, nodeclass_name, nodeset_name, node_name, property_dict=None):
         """
@@ -216,13 +347,23 @@ class MetaNetwork:
         self.__validate_tree_branch(nodeclass_name, nodeset_name)
         dmlpu.check_type(node_name, 'node_name', (str, unicode))
         dmlpu.check_key(node_name, 'node_name', self.__node_tree[nodeclass_name][nodeset_name][1], nodeset_name, False)
-        dmlpu.check_type(property_dict, 'property_dict', (dict, None))
+        dmlpu.check_type(property_dict, 'property_dict', (dict, type(None)))
+        if property_dict is None:
+            property_dict = {}
         for property_name in property_dict.keys():
             dmlpu.check_key(
                 property_name, 'property_name',
                 self.__node_tree[nodeclass_name][nodeset_name][0], '{0} properties'.format(nodeset_name))
 
-        self.__node_tree[nodeclass_name][nodeset_name][1][node_name] = property_dict
+        p_i_dict = self.__node_tree[nodeclass_name][nodeset_name][0]
+        properties = {}
+        for property_name in property_dict:
+            properties[property_name] = property_dict[property_name]
+            if isinstance(properties[property_name], (str, unicode)):
+                properties[property_name] = dmlpu.format_prop(properties[property_name], p_i_dict[property_name][0])
+
+        node_name = self.symbol_table.intern(node_name)
+        self.__node_tree[nodeclass_name][nodeset_name].add_node(node_name, {'id': node_name}, properties)
 
     def rename_node(self, nodeclass_name, nodeset_name, node_name, new_node_name):
         """
@@ -238,12 +379,11 @@ class MetaNetwork:
         dmlpu.check_key(new_node_name, 'new_node_name',
                         self.__node_tree[nodeclass_name][nodeset_name][1], nodeset_name, False)
 
-        self.__node_tree[nodeclass_name][nodeset_name][1][new_node_name] = \
-            self.__node_tree[nodeclass_name][nodeset_name][1][node_name]
-        del self.__node_tree[nodeclass_name][nodeset_name][1][node_name]
+        new_node_name = self.symbol_table.intern(new_node_name)
+        self.__node_tree[nodeclass_name][nodeset_name].rename_node(node_name, new_node_name)
 
         # We assume 'id' exists. If it doesn't, the data has bigger problems.
-        self.__node_tree[nodeclass_name][nodeset_name][new_node_name]['id'] = new_node_name
+        self.__node_tree[nodeclass_name][nodeset_name][1][new_node_name].attributes['id'] = new_node_name
 
         self._rename_network_nodes(nodeclass_name, nodeset_name, node_name, new_node_name)
 
@@ -267,31 +407,113 @@ class MetaNetwork:
         dmlpu.check_key(args[-1], 'union_nodeset', self.__node_tree[nodeclass_name], nodeclass_name,
                         False)
 
-        merge_nodeset = self.__node_tree[nodeclass_name][args[-2]]
-        for i in range(len(args)-3, -1, -1):
+        merge_nodeset = Nodeset()
+        for i in range(len(args)-2, -1, -1):
+            merge_nodeset[0].update(self.__node_tree[nodeclass_name][args[i]][0])
+        for i in range(len(args)-2, -1, -1):
             for entry in self.__node_tree[nodeclass_name][args[i]][1]:
-                merge_nodeset[1][entry] = self.__node_tree[nodeclass_name][args[i]][1][entry]
-            for entry in self.__node_tree[nodeclass_name][args[i]][0]:
-                merge_nodeset[0][entry] = self.__node_tree[nodeclass_name][args[i]][0][entry]
+                node = self.__node_tree[nodeclass_name][args[i]][1][entry]
+                merge_nodeset.add_node(entry, dict(node.attributes), dict(node.iter_properties()))
 
         self.__node_tree[nodeclass_name][args[-1]] = merge_nodeset
 
-    def write_dynetml(self, out_file_path):
-        """:param str|unicode out_file_path: Write the meta-network to this path."""
+    def to_sparse(self, network_id, sparse_format='csr'):
+        """
+        Converts a network to a SciPy sparse matrix. Rows are labelled with the nodes of the network's source nodeset \
+        and columns with the nodes of its target nodeset, including nodes without links. Undirected networks within \
+        a single nodeset produce symmetric matrices.
+
+        :param str|unicode network_id: The id of the network to be converted
+        :param str sparse_format: The format of the matrix; "csr", "csc", or "coo"
+        :returns: The matrix, and sorted arrays of the labels of its rows and columns
+        :rtype: :class:`tuple_(scipy.sparse.spmatrix, numpy.ndarray, numpy.ndarray)`
+        """
+        dmlpu.check_key(network_id, 'network_id', self.networks, 'self.networks')
+        if sparse_format not in ['csr', 'csc', 'coo']:
+            raise ValueError('sparse_format must be "csr", "csc" or "coo"; got {0}'.format(sparse_format))
+
+        import numpy
+
+        sources, targets, values = self._get_network_columns(network_id)
+        source_ids, target_ids = self._get_network_nodeset_ids(network_id)
+        if self._is_one_mode(network_id):
+            row_labels = col_labels = numpy.unique(numpy.array(source_ids + sources + targets))
+        else:
+            row_labels = numpy.unique(numpy.array(source_ids + sources))
+            col_labels = numpy.unique(numpy.array(target_ids + targets))
+
+        is_symmetric = self._is_one_mode(network_id) and not self._get_network_attributes(network_id)['isDirected']
+        return dmlpu.get_sparse_matrix(sources, targets, values, row_labels, col_labels, is_symmetric,
+                                       sparse_format), row_labels, col_labels
+
+    def _get_network_nodeset_ids(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: The ids of the nodes in the network's source nodeset and in its target nodeset
+        :rtype: :class:`tuple_(list, list)`
+        """
+        nk_attributes = self._get_network_attributes(network_id)
+        nodeset_ids = []
+        for nodeclass_key, nodeset_key in [('sourceType', 'source'), ('targetType', 'target')]:
+            nodeset = self.__node_tree.get(nk_attributes[nodeclass_key], {}).get(nk_attributes[nodeset_key])
+            nodeset_ids.append(list(nodeset[1]) if nodeset is not None else [])
+
+        return nodeset_ids[0], nodeset_ids[1]
+
+    def _is_one_mode(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: True if the network's sources and targets come from the same nodeset
+        :rtype: bool
+        """
+        nk_attributes = self._get_network_attributes(network_id)
+        return nk_attributes['sourceType'] == nk_attributes['targetType'] and \
+            nk_attributes['source'] == nk_attributes['target']
+
+    def write_dynetml(self, out_file_path, pretty_print=True, compress=None):
+        """
+        Writes the meta-network to DyNetML. Nodes and links are streamed straight to the file, so no element tree or \
+        string holding the whole document is ever built.
+
+        :param str|unicode|file out_file_path: Write the meta-network to this path, or to this file-like object
+        :param bool pretty_print: If True, elements are indented and placed on their own lines
+        :param bool|str|None compress: The compression of the output: "gzip", "bz2", "xz", or "zstd". True means \
+        gzip and False no compression; by default, the compression is taken from the extension of out_file_path.
+        """
+        if not hasattr(out_file_path, 'write'):
+            dmlpu.check_type(out_file_path, 'out_file_path', (str, unicode))
+
+            if os.path.exists(out_file_path) and os.path.isdir(out_file_path):
+                raise IOError('out_file_path cannot be a directory')
+
+        import dynetmlwriter
+        dynetmlwriter.write_dynetml(out_file_path, [self], None, pretty_print, compress)
+
+    def save_binary(self, out_file_path):
+        """
+        Writes the meta-network to a compact binary file that can be reloaded with :meth:`load_binary` without \
+        parsing any XML or converting any property values.
+
+        :param str|unicode out_file_path: Write the meta-network to this path.
+        """
         dmlpu.check_type(out_file_path, 'out_file_path', (str, unicode))
 
         if os.path.exists(out_file_path) and os.path.isdir(out_file_path):
             raise IOError('out_file_path cannot be a directory')
 
-        # bs = self.convert_to_dynetml(True)
-        #
-        # with codecs.open(out_file_path, 'w', 'utf8') as outfile:
-        #     outfile.write(bs.prettify())
-        xml_root = self.convert_to_dynetml()
+        import dynetmlbinary
+        dynetmlbinary.write_metanetwork_states(out_file_path, {'kind': 'MetaNetwork'}, [self._export_state()])
+
+    def load_binary(self, in_file_path):
+        """:param str|unicode in_file_path: Load a meta-network from a file written by :meth:`save_binary`."""
+        dmlpu.check_type(in_file_path, 'in_file_path', (str, unicode))
 
-        with codecs.open(out_file_path, 'w', 'utf8') as outfile:
-            outfile.write('<?xml version="1.0" standalone="yes"?>\n\n')
-            outfile.write(etree.tostring(xml_root, pretty_print=True))
+        import dynetmlbinary
+        header, node_ids, states = dynetmlbinary.read_metanetwork_states(in_file_path, self.symbol_table)
+        if header.get('kind') != 'MetaNetwork':
+            raise ValueError('{0} does not contain a meta-network'.format(in_file_path))
+
+        self._import_state(states[0], node_ids)
 
     def convert_to_dynetml(self):
         """Converts the graph to DyNetML and returns an :class:`lxml._Element`"""
@@ -376,12 +598,11 @@ class MetaNetwork:
 
                 for node in self.__node_tree[n_c][n_s][1]:
                     print u'    Node {0}'.format(node).encode('utf8')
-                    for attr in self.__node_tree[n_c][n_s][1][node][0]:
-                        print u'     {0}: {1}'.format(attr,
-                                                      self.__node_tree[n_c][n_s][1][node][0][attr]).encode('utf8')
-                    for prop in self.__node_tree[n_c][n_s][1][node][1]:
-                        print u'     {0}: {1}'.format(prop,
-                                                      self.__node_tree[n_c][n_s][1][node][1][prop]).encode('utf8')
+                    for attr in self.__node_tree[n_c][n_s][1][node].attributes:
+                        print u'     {0}: {1}'.format(
+                            attr, self.__node_tree[n_c][n_s][1][node].attributes[attr]).encode('utf8')
+                    for prop, value in self.__node_tree[n_c][n_s][1][node].iter_properties():
+                        print u'     {0}: {1}'.format(prop, value).encode('utf8')
 
         self._pretty_print_networks()
 
@@ -394,15 +615,11 @@ class MetaNetwork:
         :param str|unicode node_name: current node name
         :param str|unicode new_node_name: new name for the node
         """
-        for nk in self.networks:
+        for nk in self.networks.values():
             if nk[0]['sourceType'] == nodeclass_name and nk[0]['source'] == nodeset_name or \
                     nk[0]['targetType'] == nodeclass_name and nk[0]['target'] == nodeset_name:
-                nk[new_node_name] = nk[node_name]
-                del nk[node_name]
-                for src in nk:
-                    if node_name in nk[src]:
-                        nk[src][new_node_name] = nk[src][node_name]
-                        del nk[src][node_name]
+                if node_name in nk[1].get_node_ids():
+                    nk[1].rename_node(node_name, new_node_name)
 
     def _get_networks_tag(self):
         """Generates an :class:`lxml._Element` from the networks"""
@@ -450,30 +667,98 @@ class MetaNetwork:
 
     def _parse_and_add_graph_tag(self, nk_tag):
         """:param lxml._Element nk_tag: The tag to be parsed and added to the MetaNetwork"""
-        g = {}, defaultdict(dict)
-
-        g[0]['sourceType'] = nk_tag.attrib['sourceType']
-        g[0]['source'] = nk_tag.attrib['source']
-        g[0]['targetType'] = nk_tag.attrib['targetType']
-        g[0]['target'] = nk_tag.attrib['target']
-        g[0]['id'] = nk_tag.attrib['id']
-        g[0]['isDirected'] = nk_tag.attrib['isDirected'] == 'true'
-        g[0]['allowSelfLoops'] = nk_tag.attrib['allowSelfLoops'] == 'true'
-        g[0]['isBinary'] = nk_tag.attrib['isBinary'] == 'true'
-        #for attrib_key in nk_tag.attrib:
-        #   g[0][attrib_key] = format_prop(nk_tag.attrib[attrib_key])
-
-        if g[0]['isDirected']:
-            for link in nk_tag.iterfind('link'):
-                weight = float(link.attrib['value']) if 'value' in link.attrib else 1.0
-                g[1][link.attrib['source']][link.attrib['target']] = weight
-        else:
-            for link in nk_tag.iterfind('link'):
-                weight = float(link.attrib['value']) if 'value' in link.attrib else 1.0
-                g[1][link.attrib['source']][link.attrib['target']] = weight
-                g[1][link.attrib['target']][link.attrib['source']] = weight
+        sources, targets, values = dmlpu.get_link_columns(nk_tag, self.symbol_table)
+        self._add_network(dmlpu.get_network_attributes(nk_tag), sources, targets, values)
 
-        self.networks[nk_tag.attrib['id']] = g
+    def _add_network(self, nk_attributes, sources, targets, values):
+        """
+        Builds a network and adds it to the MetaNetwork
+
+        :param dict nk_attributes: The attributes of the network, as returned by \
+        :func:`dynetmlparsingutils.get_network_attributes`
+        :param list sources: The source of each link
+        :param list targets: The target of each link
+        :param list values: The value of each link
+        """
+        g = NetworkAttributes.from_dict(nk_attributes), CSRNetwork(sources, targets, values, nk_attributes['isDirected'])
+        self.networks[g[0]['id']] = g
+
+    def _add_network_codes(self, nk_attributes, node_ids, sources, targets, values):
+        """
+        Builds a network from arrays of integer codes into a table of node ids and adds it to the MetaNetwork, without \
+        looking up the node id of each link
+
+        :param dict nk_attributes: The attributes of the network
+        :param numpy.ndarray node_ids: An object array of node ids
+        :param numpy.ndarray sources: The code in node_ids of the source of each link
+        :param numpy.ndarray targets: The code in node_ids of the target of each link
+        :param numpy.ndarray|None values: The value of each link, or None if every link has a value of 1.0
+        """
+        g = NetworkAttributes.from_dict(nk_attributes), CSRNetwork.from_codes(node_ids, sources, targets, values,
+                                                                              nk_attributes['isDirected'])
+        self.networks[g[0]['id']] = g
+
+    def _get_network_attributes(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: The attributes of the network
+        :rtype: dict
+        """
+        return self.networks[network_id][0]
+
+    def _get_network_columns(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: The sources, targets, and values of the network's links, with each undirected link listed once
+        :rtype: :class:`tuple_(list, list, list)`
+        """
+        return self.networks[network_id][1].get_columns()
+
+    def _iter_network_links(self, network_id):
+        """
+        :param str|unicode network_id: The id of a network
+        :returns: The source, target, and value of each of the network's links, with each undirected link listed once. \
+        Unlike :meth:`_get_network_columns`, the links are never all held in memory at once.
+        :rtype: generator of :class:`tuple_(str, str, float)`
+        """
+        return self.networks[network_id][1].iter_links()
+
+    def _export_state(self):
+        """
+        :returns: A compact, picklable copy of the meta-network in which each network is reduced to its attributes \
+        and the columns returned by :meth:`_get_network_columns`, independent of the library storing the networks.
+        :rtype: tuple
+        """
+        networks = [(self._get_network_attributes(key),) + self._get_network_columns(key) for key in self.networks]
+        return dict(self.attributes), self.properties, self.propertyIdentities, self.__node_tree, networks
+
+    def _import_state(self, state, node_ids=None):
+        """
+        :param tuple state: A meta-network in the form returned by :meth:`_export_state`. Its node ids are interned in \
+        the symbol table, since a state that was pickled or read from a file has its own copy of each of them.
+        :param numpy.ndarray|None node_ids: If set, an object array of node ids that are already interned, and the \
+        sources and targets of each network in state are arrays of codes into it, as read by \
+        :func:`dynetmlbinary.read_metanetwork_states`; the values of a binary network may then be None.
+        """
+        attributes, self.properties, self.propertyIdentities, node_tree, networks = state
+        self.attributes = MetaNetworkAttributes(attributes)
+
+        self.__node_tree = dmlpu.node_tree()
+        for nodeclass_key in node_tree:
+            for nodeset_key in node_tree[nodeclass_key]:
+                nodeset = node_tree[nodeclass_key][nodeset_key]
+                if not isinstance(nodeset, Nodeset):
+                    # States saved before nodesets were records hold a tuple of dictionaries
+                    nodeset = Nodeset(*nodeset)
+                nodeset.intern_node_ids(self.symbol_table)
+                self.__node_tree[nodeclass_key][nodeset_key] = nodeset
+
+        for nk_attributes, sources, targets, values in networks:
+            if node_ids is not None:
+                self._add_network_codes(nk_attributes, node_ids, sources, targets, values)
+            else:
+                self._add_network(nk_attributes, self.symbol_table.intern_all(sources),
+                                  self.symbol_table.intern_all(targets), values)
 
     def _pretty_print_networks(self):
         """Pretty-print the networks"""
@@ -4,7 +4,6 @@
 
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
-from collections import defaultdict
 import dynetmlparsingutils as dmlpu
 from lxml import etree
 from MetaNetwork import MetaNetwork
@@ -13,47 +12,9 @@ from MetaNetwork import MetaNetwork
 class MetaNetworkDict (MetaNetwork):
     """
     A subclass of the MetaNetwork class that handles networks by storing them as a tuple of a dictionary of
-    attributes and a defaultdict(dict) of edges.
+    attributes and a :class:`CSRNetwork` of edges.
     """
 
-    def _rename_network_nodes(self, nodeclass_name, nodeset_name, node_name, new_node_name):
-        for nk in self.networks:
-            if nk[0]['sourceType'] == nodeclass_name and nk[0]['source'] == nodeset_name or \
-             nk[0]['targetType'] == nodeclass_name and nk[0]['target'] == nodeset_name:
-                nk[new_node_name] = nk[node_name]
-                del nk[node_name]
-                for src in nk:
-                    if node_name in nk[src]:
-                        nk[src][new_node_name] = nk[src][node_name]
-                        del nk[src][node_name]
-
-    def _parse_and_add_graph_tag(self, nk_tag):
-
-        g = {}, defaultdict(dict)
-
-        g[0]['sourceType'] = nk_tag.attrib['sourceType']
-        g[0]['source'] = nk_tag.attrib['source']
-        g[0]['targetType'] = nk_tag.attrib['targetType']
-        g[0]['target'] = nk_tag.attrib['target']
-        g[0]['id'] = nk_tag.attrib['id']
-        g[0]['isDirected'] = nk_tag.attrib['isDirected'] == 'true'
-        g[0]['allowSelfLoops'] = nk_tag.attrib['allowSelfLoops'] == 'true'
-        g[0]['isBinary'] = nk_tag.attrib['isBinary'] == 'true'
-        #for attrib_key in nk_tag.attrib:
-        #   g[0][attrib_key] = format_prop(nk_tag.attrib[attrib_key])
-
-        if g[0]['isDirected']:
-            for link in nk_tag.iterfind('link'):
-                weight = float(link.attrib['value']) if 'value' in link.attrib else 1.0
-                g[1][link.attrib['source']][link.attrib['target']] = weight
-        else:
-            for link in nk_tag.iterfind('link'):
-                weight = float(link.attrib['value']) if 'value' in link.attrib else 1.0
-                g[1][link.attrib['source']][link.attrib['target']] = weight
-                g[1][link.attrib['target']][link.attrib['source']] = weight
-
-        self.networks[nk_tag.attrib['id']] = g
-
     def _get_networks_tag(self):
         # bs = BeautifulSoup()
         # networks_tag = bs.new_tag('networks')
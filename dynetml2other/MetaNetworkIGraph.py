@@ -3,63 +3,91 @@
 
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
-from collections import OrderedDict
 import dynetmlparsingutils as dmlpu
 import igraph
+from itertools import chain
 from lxml import etree
 from MetaNetwork import MetaNetwork
 
 
 class MetaNetworkIG (MetaNetwork):
     """
-    A subclass of the MetaNetwork class that stores networks as tuples. The first element of each tuple is a \
-    dictionary that matches node names to igraph node numbers. The second element is an :class:`igraph.Graph` \
-    containing the network itself.
+    A subclass of the MetaNetwork class that stores networks as instances of :class:`igraph.Graph`. The id of the node \
+    behind each vertex is held in the vertex's "name" attribute, and the value of each link in its edge's "weight" \
+    attribute.
     """
 
     def _rename_network_nodes(self, nodeclass_name, nodeset_name, node_name, new_node_name):
-        for nk in self.networks:
-            if nk[1]['sourceType'] == nodeclass_name and nk[1]['source'] == nodeset_name or \
-                    nk[1]['targetType'] == nodeclass_name and nk[1]['target'] == nodeset_name:
-                if node_name in nk[0]:
-                    nk[0][new_node_name] = nk[0][node_name]
-                    del nk[0][node_name]
-
-    def _parse_and_add_graph_tag(self, nk_tag):
-        g = igraph.Graph(directed=nk_tag.attrib['isDirected'] == 'true')
-        g['sourceType'] = nk_tag.attrib['sourceType']
-        g['source'] = nk_tag.attrib['source']
-        g['targetType'] = nk_tag.attrib['targetType']
-        g['target'] = nk_tag.attrib['target']
-        g['id'] = nk_tag.attrib['id']
-        g['isDirected'] = nk_tag.attrib['isDirected'] == 'true'
-        g['allowSelfLoops'] = nk_tag.attrib['allowSelfLoops'] == 'true'
-        g['isBinary'] = nk_tag.attrib['isBinary'] == 'true'
-        #for attrib_key in nk_tag.attrib:
-        #   g[nk_tag.attrib['id']][attrib_key] = format_prop(nk_tag.attrib[attrib_key])
-
-        edge_list = list()
-        id_vertex_dict = OrderedDict()
-        weight_list = list()
-        for link_tag in nk_tag.iterfind('link'):
-            if link_tag.attrib['source'] not in id_vertex_dict:
-                id_vertex_dict[link_tag.attrib['source']] = len(id_vertex_dict)
-            if link_tag.attrib['target'] not in id_vertex_dict:
-                id_vertex_dict[link_tag.attrib['target']] = len(id_vertex_dict)
-
-            edge_list.append((id_vertex_dict[link_tag.attrib['source']], id_vertex_dict[link_tag.attrib['target']]))
-
-            try:
-                weight_list.append(float(link_tag.attrib['weight']))
-            except KeyError:
-                weight_list.append(1.0)
-
-        g.add_vertices(len(id_vertex_dict))
-        g.add_edges(edge_list)
-        if not g['isBinary']:
-            g.es['weight'] = weight_list
-
-        self.networks[nk_tag.attrib['id']] = id_vertex_dict, g
+        for g in self.networks.values():
+            if g['sourceType'] == nodeclass_name and g['source'] == nodeset_name or \
+                    g['targetType'] == nodeclass_name and g['target'] == nodeset_name:
+                vertex_ids = g.vs['name']
+                if node_name in vertex_ids:
+                    g.vs[vertex_ids.index(node_name)]['name'] = new_node_name
+
+    def _add_network(self, nk_attributes, sources, targets, values):
+        import numpy
+
+        # The node ids are coded by the symbol table, which holds them already, so the graph is built by the same
+        # NumPy path as _add_network_codes rather than by hashing each id into a dictionary of its own
+        link_codes = numpy.array(self.symbol_table.get_codes(chain(sources, targets)), dtype=numpy.int64)
+        symbols = self.symbol_table.get_symbols()
+        self._add_graph(nk_attributes, link_codes, values,
+                        lambda vertex_codes: map(symbols.__getitem__, vertex_codes.tolist()))
+
+    def _add_network_codes(self, nk_attributes, node_ids, sources, targets, values):
+        import numpy
+
+        self._add_graph(nk_attributes, numpy.concatenate((sources, targets)), values,
+                        lambda vertex_codes: node_ids[vertex_codes].tolist())
+
+    def _add_graph(self, nk_attributes, link_codes, values, get_vertex_ids):
+        """
+        Builds a network in a single call to :class:`igraph.Graph` and adds it to the MetaNetwork. Vertices are \
+        numbered by the order of their codes, so the edge list is just the codes made dense.
+
+        :param dict nk_attributes: The attributes of the network
+        :param numpy.ndarray link_codes: The codes of the sources of the links, followed by those of their targets
+        :param values: The value of each link, or None if every link has a value of 1.0
+        :param get_vertex_ids: A function returning the node id of each code in a sorted array of codes
+        """
+        import numpy
+
+        vertex_codes, edge_codes = numpy.unique(link_codes, return_inverse=True)
+        edge_list = edge_codes.reshape(2, -1).T.tolist()
+
+        edge_attrs = {}
+        if not nk_attributes['isBinary']:
+            edge_attrs['weight'] = numpy.asarray(values, dtype=numpy.float64).tolist() if values is not None else \
+                [1.0] * len(edge_list)
+        g = igraph.Graph(len(vertex_codes), edge_list, nk_attributes['isDirected'], graph_attrs=dict(nk_attributes),
+                         vertex_attrs={'name': get_vertex_ids(vertex_codes)}, edge_attrs=edge_attrs)
+
+        self.networks[nk_attributes['id']] = g
+
+    def _get_network_attributes(self, network_id):
+        g = self.networks[network_id]
+        return dict((attrib_key, g[attrib_key]) for attrib_key in g.attributes())
+
+    def _get_network_columns(self, network_id):
+        g = self.networks[network_id]
+        vertex_ids = g.vs['name']
+        edge_list = g.get_edgelist()
+        sources = [vertex_ids[source] for source, target in edge_list]
+        targets = [vertex_ids[target] for source, target in edge_list]
+        if g['isBinary']:
+            values = [1.0] * len(edge_list)
+        else:
+            values = g.es['weight']
+
+        return sources, targets, values
+
+    def _iter_network_links(self, network_id):
+        g = self.networks[network_id]
+        vertex_ids = g.vs['name']
+        is_binary = g['isBinary']
+        for edge in g.es:
+            yield vertex_ids[edge.source], vertex_ids[edge.target], 1.0 if is_binary else edge['weight']
 
     def _get_networks_tag(self):
         # bs = BeautifulSoup()
@@ -89,21 +117,19 @@ class MetaNetworkIG (MetaNetwork):
         # return networks_tag
         networks_tag = etree.Element('networks')
         for key in self.networks:
+            g = self.networks[key]
             network_tag = etree.SubElement(networks_tag, 'network', attrib={
-                'sourceType': self.networks[key][1]['sourceType'], 'source': self.networks[key][1]['source'],
-                'targetType': self.networks[key][1]['targetType'], 'target': self.networks[key][1]['target'],
-                'id': key, 'isDirected': dmlpu.unformat_prop(self.networks[key]['isDirected']),
-                'allowSelfLoops': dmlpu.unformat_prop(self.networks[key]['allowSelfLoops']),
-                'isBinary': dmlpu.unformat_prop(self.networks[key]['isBinary'])})
-
-            e_l = self.networks[key].edge_list()
-            if self.networks[key]['isBinary']:
-                for i in range(len(e_l)):
-                    etree.SubElement(network_tag, 'link', attrib={'source': e_l[i][0], 'target': e_l[i][1]})
-            else:
-                for i in range(len(e_l)):
-                    etree.SubElement(network_tag, 'link', attrib={'source': e_l[i][0], 'target': e_l[i][1],
-                                                                  'value': self.networks[key].es[i]['weight']})
+                'sourceType': g['sourceType'], 'source': g['source'], 'targetType': g['targetType'],
+                'target': g['target'], 'id': key, 'isDirected': dmlpu.unformat_prop(g['isDirected']),
+                'allowSelfLoops': dmlpu.unformat_prop(g['allowSelfLoops']),
+                'isBinary': dmlpu.unformat_prop(g['isBinary'])})
+
+            for source, target, value in self._iter_network_links(key):
+                if g['isBinary']:
+                    etree.SubElement(network_tag, 'link', attrib={'source': source, 'target': target})
+                else:
+                    etree.SubElement(network_tag, 'link', attrib={'source': source, 'target': target,
+                                                                  'value': dmlpu.unformat_prop(value)})
 
         return networks_tag
 
@@ -111,9 +137,9 @@ class MetaNetworkIG (MetaNetwork):
         print ' == Networks =='
         network_count = 0
         for nk_key in self.networks:
-            nk = self.networks[nk_key][1]
+            nk = self.networks[nk_key]
             print u'  Network {0}: {1}'.format(network_count, nk_key).encode('utf8')
-            for prop in nk:
+            for prop in nk.attributes():
                 print u'   {0}: {1}'.format(prop, nk[prop]).encode('utf8')
             print '   {0} nodes'.format(len(nk.vs))
             print '   {0} edges'.format(len(nk.es))
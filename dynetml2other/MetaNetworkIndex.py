@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: MetaNetworkIndex
+:synopsis: A persistent index of the byte offsets of the meta-networks in a DyNetML file.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from datetime import datetime
+import dynetmlparsingutils as dmlpu
+import hashlib
+import json
+import mmap
+import os
+
+
+class MetaNetworkIndex:
+    """
+    The MetaNetworkIndex class records the id, byte offset, and length of every <MetaNetwork> element in a DyNetML \
+    file, so that individual meta-networks can be read without parsing the file from the beginning. The index is saved \
+    in a sidecar file next to the DyNetML file the first time the file is scanned, and is rebuilt whenever the size, \
+    modification time, or a hash of the beginning and end of the DyNetML file no longer match the saved index.
+
+    :ivar dynetml_path: The path to the indexed DyNetML file
+    :ivar index_path: The path to the sidecar file containing the index
+    :ivar root_tag: The name of the root tag of the DyNetML file
+    :ivar root_attributes: A dictionary of the attributes of the root tag of the DyNetML file
+    :ivar encoding: The encoding of the DyNetML file, which the text of each meta-network is left in
+    :ivar entries: A list of (id, offset, length) tuples, one for each meta-network in document order
+    """
+    index_suffix = '.mnidx'
+    index_version = 2
+    hash_block_size = 65536
+
+    def __init__(self, dynetml_path, index_path=None):
+        """
+        Initializes a MetaNetworkIndex
+
+        :param str|unicode dynetml_path: The path to a DyNetML file
+        :param str|unicode|None index_path: The path to the sidecar file. Defaults to dynetml_path followed by .mnidx
+        """
+        dmlpu.check_type(dynetml_path, 'dynetml_path', (str, unicode))
+        dmlpu.check_type(index_path, 'index_path', (str, unicode, type(None)))
+
+        if not os.path.isfile(dynetml_path):
+            raise IOError('{0} isn\'t a file'.format(dynetml_path))
+
+        self.dynetml_path = dynetml_path
+        self.index_path = index_path if index_path is not None else dynetml_path + self.index_suffix
+        self.root_tag = None
+        self.root_attributes = {}
+        self.encoding = 'utf-8'
+        self.entries = []
+
+    def load_or_build(self):
+        """
+        Loads the index from its sidecar file, or scans the DyNetML file and saves a new index if the sidecar file \
+        is missing or out of date.
+
+        :returns: self
+        :rtype: MetaNetworkIndex
+        """
+        if not self.load():
+            self.build()
+            self.save()
+
+        return self
+
+    def load(self):
+        """
+        Loads the index from its sidecar file
+
+        :returns: True if the sidecar file existed and matched the DyNetML file, otherwise False
+        :rtype: bool
+        """
+        try:
+            with open(self.index_path, 'r') as index_file:
+                index_dict = json.load(index_file)
+        except (IOError, OSError, ValueError):
+            return False
+
+        if index_dict.get('version') != self.index_version or index_dict.get('fingerprint') != self.get_fingerprint():
+            return False
+
+        self.root_tag = index_dict['root_tag']
+        self.root_attributes = index_dict['root_attributes']
+        self.encoding = index_dict['encoding']
+        self.entries = [tuple(entry) for entry in index_dict['metanetworks']]
+        return True
+
+    def build(self):
+        """Scans the DyNetML file and records the offset and length of each meta-network"""
+        root = dmlpu.get_root_tag(self.dynetml_path)
+        self.root_tag = root.tag
+        self.root_attributes = dict(root.attrib)
+        self.encoding = dmlpu.get_encoding(self.dynetml_path)
+
+        with dmlpu.open_dynetml(self.dynetml_path) as dynetml_file:
+            self.entries = [(mn_id, mn_start, mn_end - mn_start) for mn_id, mn_start, mn_end, mn_text in
+                            dmlpu.scan_metanetworks(dynetml_file, lambda x: False, encoding=self.encoding)]
+
+    def save(self):
+        """
+        Writes the index to its sidecar file. The index is left in memory only if the sidecar file can't be written.
+
+        :returns: True if the sidecar file was written
+        :rtype: bool
+        """
+        index_dict = {'version': self.index_version, 'fingerprint': self.get_fingerprint(),
+                      'root_tag': self.root_tag, 'root_attributes': self.root_attributes, 'encoding': self.encoding,
+                      'metanetworks': self.entries}
+
+        temp_path = '{0}.{1}.tmp'.format(self.index_path, os.getpid())
+        try:
+            with open(temp_path, 'w') as index_file:
+                json.dump(index_dict, index_file)
+            if os.path.exists(self.index_path):
+                os.remove(self.index_path)
+            os.rename(temp_path, self.index_path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+        return True
+
+    def get_fingerprint(self):
+        """
+        :returns: The size and modification time of the DyNetML file, and a hash of its first and last blocks
+        :rtype: list
+        """
+        file_stat = os.stat(self.dynetml_path)
+        file_hash = hashlib.sha1()
+        with open(self.dynetml_path, 'rb') as dynetml_file:
+            file_hash.update(dynetml_file.read(self.hash_block_size))
+            if file_stat.st_size > self.hash_block_size:
+                dynetml_file.seek(max(self.hash_block_size, file_stat.st_size - self.hash_block_size))
+                file_hash.update(dynetml_file.read(self.hash_block_size))
+
+        return [file_stat.st_size, file_stat.st_mtime, file_hash.hexdigest()]
+
+    def get_ids(self):
+        """
+        :returns: The ids of the indexed meta-networks, in document order
+        :rtype: list
+        """
+        return [entry[0] for entry in self.entries]
+
+    def select(self, mn_ids=None, start_date=None, end_date=None):
+        """
+        :param list mn_ids: If set, only entries for meta-networks with these ids are selected
+        :param datetime.datetime start_date: Entries for meta-networks before this datetime are not selected
+        :param datetime.datetime end_date: Entries for meta-networks after this datetime are not selected
+        :returns: The selected entries, in document order
+        :rtype: list
+        """
+        if mn_ids is not None:
+            dmlpu.check_contained_types(mn_ids, 'mn_ids', (str, unicode))
+            mn_ids = set(mn_ids)
+        dmlpu.check_type(start_date, 'start_date', (datetime, type(None)))
+        dmlpu.check_type(end_date, 'end_date', (datetime, type(None)))
+
+        selected = []
+        for entry in self.entries:
+            if mn_ids is not None and entry[0] not in mn_ids:
+                continue
+
+            if start_date is not None or end_date is not None:
+                mn_date = dmlpu.parse_timestamp(entry[0])
+                if start_date is not None and mn_date < start_date or end_date is not None and mn_date > end_date:
+                    continue
+
+            selected.append(entry)
+
+        return selected
+
+    def iter_texts(self, entries):
+        """
+        Reads the text of a set of meta-networks by seeking directly to each one in a memory map of the DyNetML file. \
+        Offsets in a compressed file are offsets in its decompressed data, which is read forward to reach each one.
+
+        :param list entries: Entries from ``entries``
+        :returns: The text of each <MetaNetwork> element
+        :rtype: generator of str
+        """
+        if len(entries) == 0:
+            return
+
+        if dmlpu.get_compression(self.dynetml_path) is not None:
+            # A compressed file can't be mapped, so it is decompressed up to each entry in turn, and only reopened if
+            # an entry comes before the one read last
+            dynetml_file = dmlpu.open_dynetml(self.dynetml_path)
+            try:
+                for mn_id, mn_offset, mn_length in entries:
+                    if mn_offset < dynetml_file.tell():
+                        dynetml_file.close()
+                        dynetml_file = dmlpu.open_dynetml(self.dynetml_path)
+                    dynetml_file.seek(mn_offset)
+                    yield dynetml_file.read(mn_length)
+            finally:
+                dynetml_file.close()
+            return
+
+        with open(self.dynetml_path, 'rb') as dynetml_file:
+            dynetml_map = mmap.mmap(dynetml_file.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                for mn_id, mn_offset, mn_length in entries:
+                    yield dynetml_map[mn_offset:mn_offset + mn_length]
+            finally:
+                dynetml_map.close()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: MetaNetworkList
+:synopsis: Lists of meta-networks and dictionaries of meta-network attributes that count their own changes.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from itertools import count
+
+_id_versions = count()
+
+
+def _counts_changes(method):
+    """
+    :param method: A method of list that changes the list
+    :returns: A version of the method that increments the list's version before making the change
+    """
+    def change(self, *args):
+        self.version += 1
+        return method(self, *args)
+    change.__name__ = method.__name__
+    change.__doc__ = method.__doc__
+    return change
+
+
+class MetaNetworkList(list):
+    """
+    The MetaNetworkList class is the list of meta-networks held by a :class:`DynamicMetaNetwork.DynamicMetaNetwork`. \
+    It behaves exactly like a list, but every change to it increments its version, so the dynamic meta-network can \
+    tell whether its time index is still current without looking at each meta-network.
+
+    :ivar version: The number of changes made to the list
+    """
+    def __init__(self, metanetworks=()):
+        """:param metanetworks: The meta-networks the list starts with"""
+        list.__init__(self, metanetworks)
+        self.version = 0
+
+    append = _counts_changes(list.append)
+    extend = _counts_changes(list.extend)
+    insert = _counts_changes(list.insert)
+    pop = _counts_changes(list.pop)
+    remove = _counts_changes(list.remove)
+    reverse = _counts_changes(list.reverse)
+    __setitem__ = _counts_changes(list.__setitem__)
+    __delitem__ = _counts_changes(list.__delitem__)
+    __setslice__ = _counts_changes(list.__setslice__)
+    __delslice__ = _counts_changes(list.__delslice__)
+    __iadd__ = _counts_changes(list.__iadd__)
+    __imul__ = _counts_changes(list.__imul__)
+
+    def sort(self, *args, **kwargs):
+        self.version += 1
+        return list.sort(self, *args, **kwargs)
+
+
+class MetaNetworkAttributes(dict):
+    """
+    The MetaNetworkAttributes class is the dictionary of a :class:`MetaNetwork.MetaNetwork`'s attributes. Creating \
+    one, or changing or removing its id, gives it a new :attr:`id_version`. Versions are drawn from a single counter, \
+    so no two dictionaries ever share one, and the time index of a dynamic meta-network only needs to compare the \
+    version of each of its meta-networks' attributes to decide whether it needs rebuilding.
+
+    :ivar id_version: A number that changes whenever the id is set, changed or removed
+    """
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.id_version = next(_id_versions)
+
+    def __reduce__(self):
+        # A copy gets a version of its own rather than the version of the dictionary it was copied from
+        return MetaNetworkAttributes, (dict(self),)
+
+    def __setitem__(self, key, value):
+        if key == 'id':
+            self.id_version = next(_id_versions)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        if key == 'id':
+            self.id_version = next(_id_versions)
+        dict.__delitem__(self, key)
+
+    def update(self, *args, **kwargs):
+        self.id_version = next(_id_versions)
+        dict.update(self, *args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        if key == 'id':
+            self.id_version = next(_id_versions)
+        return dict.setdefault(self, key, default)
+
+    def pop(self, key, *args):
+        if key == 'id':
+            self.id_version = next(_id_versions)
+        return dict.pop(self, key, *args)
+
+    def popitem(self):
+        self.id_version = next(_id_versions)
+        return dict.popitem(self)
+
+    def clear(self):
+        self.id_version = next(_id_versions)
+        dict.clear(self)
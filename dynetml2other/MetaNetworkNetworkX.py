@@ -4,6 +4,7 @@
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
 import dynetmlparsingutils as dmlpu
+from itertools import izip, repeat
 from lxml import etree
 from MetaNetwork import MetaNetwork
 from networkx import nx
@@ -13,44 +14,90 @@ class MetaNetworkNX (MetaNetwork):
     """
     A subclass of the MetaNetwork class that handles networks by storing them as instances of :class:`networkx.Graph` \
     and :class:`networkx.DiGraph`.
+
+    :ivar include_nodes: If True, each network holds every node of its source and target nodesets, including nodes \
+    without links, and the attribute dictionary of each of those nodes in the network is the attributes dictionary \
+    of its :class:`dynetmlrecords.Node` record, shared rather than copied.
     """
+    def __init__(self, symbol_table=None, include_nodes=False, lazy_networks=False):
+        """
+        Initializes a MetaNetworkNX
+
+        :param SymbolTable|None symbol_table: The table in which node ids should be interned. Defaults to a new table.
+        :param bool include_nodes: If True, networks are built with every node of their source and target nodesets
+        :param bool lazy_networks: If True, networks are built when they are first read rather than when they are \
+        loaded
+        """
+        MetaNetwork.__init__(self, symbol_table, lazy_networks)
+        dmlpu.check_type(include_nodes, 'include_nodes', bool)
+        self.include_nodes = include_nodes
 
     def _rename_network_nodes(self, nodeclass_name, nodeset_name, node_name, new_node_name):
         new_mapping = {node_name: new_node_name}
-        for nk in self.networks:
+        for nk in self.networks.values():
             if nk.graph['sourceType'] == nodeclass_name and nk.graph['source'] == nodeset_name or \
                                     nk.graph['targetType'] == nodeclass_name and nk.graph['target'] == nodeset_name:
-                nx.relabel_nodes(nk, new_mapping)
+                if node_name in nk:
+                    nx.relabel_nodes(nk, new_mapping, copy=False)
 
-    def _parse_and_add_graph_tag(self, nk_tag):
-        if nk_tag.attrib['isDirected'] == 'true':
+    def _add_network(self, nk_attributes, sources, targets, values):
+        if nk_attributes['isDirected']:
             g = nx.DiGraph()
         else:
             g = nx.Graph()
 
-        g.graph['sourceType'] = nk_tag.attrib['sourceType']
-        g.graph['source'] = nk_tag.attrib['source']
-        g.graph['targetType'] = nk_tag.attrib['targetType']
-        g.graph['target'] = nk_tag.attrib['target']
-        g.graph['id'] = nk_tag.attrib['id']
-        g.graph['isDirected'] = nk_tag.attrib['isDirected'] == 'true'
-        g.graph['allowSelfLoops'] = nk_tag.attrib['allowSelfLoops'] == 'true'
-        g.graph['isBinary'] = nk_tag.attrib['isBinary'] == 'true'
-        #for attrib_key in nk_tag.attrib:
-        #   g.graph[attrib_key] = format_prop(nk_tag.attrib[attrib_key])
-
-        link_list = list()
+        g.graph.update(nk_attributes)
+        if self.include_nodes:
+            self._add_nodeset_nodes(g)
+
         if g.graph['isBinary']:
-            for link in nk_tag.iterfind('link'):
-                link_list.append((link.attrib['source'], link.attrib['target']))
-            g.add_edges_from(link_list)
+            g.add_edges_from(izip(sources, targets))
         else:
-            for link in nk_tag.iterfind('link'):
-                weight = float(link.attrib['value']) if 'value' in link.attrib else 1.0
-                link_list.append((link.attrib['source'], link.attrib['target'], weight))
-            g.add_weighted_edges_from(link_list)
+            g.add_weighted_edges_from(izip(sources, targets, values))
+
+        self.networks[nk_attributes['id']] = g
+
+    def _add_network_codes(self, nk_attributes, node_ids, sources, targets, values):
+        import numpy
+
+        # NetworkX graphs are keyed on node ids, so the codes are decoded, in bulk, into the interned ids
+        self._add_network(nk_attributes, node_ids[sources], node_ids[targets],
+                          numpy.asarray(values, dtype=numpy.float64) if values is not None else repeat(1.0))
+
+    def _add_nodeset_nodes(self, g):
+        """
+        Adds every node of a network's source and target nodesets to it, in bulk, before any of its links
+
+        :param networkx.Graph g: The network, with its attributes set
+        """
+        node_tree = self.get_node_tree()
+        for nodeclass_key, nodeset_key in ((g.graph['sourceType'], g.graph['source']),
+                                           (g.graph['targetType'], g.graph['target'])):
+            if nodeclass_key not in node_tree or nodeset_key not in node_tree[nodeclass_key]:
+                continue
+
+            nodes = node_tree[nodeclass_key][nodeset_key].nodes
+            g.add_nodes_from(nodes)
+            # add_nodes_from gives each node a new dictionary, so the records' own dictionaries replace them
+            g.node.update((node_id, nodes[node_id].attributes) for node_id in nodes)
+
+    def _get_network_attributes(self, network_id):
+        return self.networks[network_id].graph
+
+    def _get_network_columns(self, network_id):
+        sources = []
+        targets = []
+        values = []
+        for source, target, data in self.networks[network_id].edges_iter(data=True):
+            sources.append(source)
+            targets.append(target)
+            values.append(data.get('weight', 1.0))
+
+        return sources, targets, values
 
-        self.networks[nk_tag.attrib['id']] = g
+    def _iter_network_links(self, network_id):
+        for source, target, data in self.networks[network_id].edges_iter(data=True):
+            yield source, target, data.get('weight', 1.0)
 
     def _get_networks_tag(self):
         # bs = BeautifulSoup()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: MetaNetworkView
+:synopsis: Read-only, time-ordered views over the meta-networks of a dynamic meta-network.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+import bisect
+from collections import Sequence
+
+
+class MetaNetworkView(Sequence):
+    """
+    The MetaNetworkView class is a read-only sequence of some of the meta-networks of a \
+    :class:`DynamicMetaNetwork.DynamicMetaNetwork`, in order of their timestamps. A view only holds a range of a \
+    tuple of the meta-networks taken along with the dynamic meta-network's time index: no meta-network or network is \
+    copied, and slicing a view or narrowing it to a time range returns another view over the same tuple.
+
+    A view holds the meta-networks as they were when it was taken, so it stays valid when meta-networks are later \
+    added to or dropped from the dynamic meta-network; a meta-network renamed since keeps its old place in the view. \
+    A new view should be taken from the dynamic meta-network to see those changes.
+    """
+    def __init__(self, metanetworks, timestamps, first=0, last=None):
+        """
+        :param tuple metanetworks: The meta-networks of a dynamic meta-network, in order of their timestamps
+        :param list timestamps: The sorted timestamps of the meta-networks
+        :param int first: The index of the first meta-network in the view
+        :param int|None last: One past the index of the last meta-network in the view; defaults to the end of \
+        timestamps
+        """
+        self._metanetworks = metanetworks
+        self._timestamps = timestamps
+        self._first = first
+        self._last = len(timestamps) if last is None else last
+
+    def __len__(self):
+        return self._last - self._first
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in xrange(start, stop, step)]
+            return MetaNetworkView(self._metanetworks, self._timestamps, self._first + start,
+                                   self._first + max(start, stop))
+
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('MetaNetworkView index out of range')
+        return self._metanetworks[self._first + i]
+
+    def __iter__(self):
+        for i in xrange(self._first, self._last):
+            yield self._metanetworks[i]
+
+    def __repr__(self):
+        if len(self) == 0:
+            return 'MetaNetworkView(<empty>)'
+        return 'MetaNetworkView(<{0} meta-networks from {1} to {2}>)'.format(len(self), self.get_start(),
+                                                                             self.get_end())
+
+    def get_timestamps(self):
+        """
+        :returns: The timestamp of each meta-network in the view, in order
+        :rtype: list
+        """
+        return self._timestamps[self._first:self._last]
+
+    def get_start(self):
+        """:returns: The earliest timestamp in the view, or None if the view is empty"""
+        return self._timestamps[self._first] if len(self) > 0 else None
+
+    def get_end(self):
+        """:returns: The latest timestamp in the view, or None if the view is empty"""
+        return self._timestamps[self._last - 1] if len(self) > 0 else None
+
+    def between(self, start_date=None, end_date=None):
+        """
+        :param datetime.datetime start_date: The earliest allowable datetime, or None
+        :param datetime.datetime end_date: The latest allowable datetime, or None
+        :returns: A view of the meta-networks in this view that fall between start_date and end_date
+        :rtype: MetaNetworkView
+        """
+        first = self._first if start_date is None else \
+            bisect.bisect_left(self._timestamps, start_date, self._first, self._last)
+        last = self._last if end_date is None else \
+            bisect.bisect_right(self._timestamps, end_date, first, self._last)
+        return MetaNetworkView(self._metanetworks, self._timestamps, first, last)
+
+    def to_list(self):
+        """
+        :returns: The meta-networks in the view, in order
+        :rtype: list
+        """
+        return list(self)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: ParseCache
+:synopsis: An on-disk cache of loaded DyNetML files.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+import dynetmlparsingutils as dmlpu
+import hashlib
+import os
+
+# os.rename replaces an existing file atomically on POSIX; os.replace does the same on every platform where it exists.
+# Where neither can replace a file, the existing entry is kept, which is harmless because entries with the same key
+# hold the same network
+_replace_file = getattr(os, 'replace', os.rename)
+
+
+class ParseCache:
+    """
+    The ParseCache class stores loaded meta-networks and dynamic meta-networks in a directory using the binary format \
+    written by :meth:`MetaNetwork.save_binary`. Entries are keyed on a hash of the contents of the DyNetML file, the \
+    network format, and the filters used to load it, so a file that has changed can never be matched to an old entry. \
+    Once the directory grows past its size limit, the least recently used entries are deleted.
+
+    :ivar cache_dir: The directory holding the cache entries
+    :ivar size_limit: The largest number of bytes the cache entries may take up
+    """
+    entry_suffixes = {'DynamicMetaNetwork': '.dmn.dmlb', 'MetaNetwork': '.mn.dmlb'}
+    hash_block_size = 1048576
+
+    def __init__(self, cache_dir, size_limit=1073741824):
+        """
+        Initializes a ParseCache, creating cache_dir if it doesn't exist
+
+        :param str|unicode cache_dir: The directory holding the cache entries
+        :param int size_limit: The largest number of bytes the cache entries may take up
+        """
+        dmlpu.check_type(cache_dir, 'cache_dir', (str, unicode))
+        dmlpu.check_type(size_limit, 'size_limit', (int, long))
+
+        if os.path.exists(cache_dir) and not os.path.isdir(cache_dir):
+            raise IOError('{0} isn\'t a directory'.format(cache_dir))
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+
+        self.cache_dir = cache_dir
+        self.size_limit = size_limit
+
+    @staticmethod
+    def get_file_signature(dynetml_path):
+        """
+        :param str|unicode dynetml_path: Path to a file
+        :returns: The size, modification time, and inode of the file, which are checked to see whether the file was \
+        replaced or written to while it was being loaded
+        :rtype: :class:`tuple_(int, float, int)`
+        """
+        file_stat = os.stat(dynetml_path)
+        return file_stat.st_size, file_stat.st_mtime, file_stat.st_ino
+
+    def get_file_hash(self, dynetml_path):
+        """
+        :param str|unicode dynetml_path: Path to a file
+        :returns: The SHA-1 hash of the contents of the file
+        :rtype: str
+        """
+        file_hash = hashlib.sha1()
+        with open(dynetml_path, 'rb') as dynetml_file:
+            for block in iter(lambda: dynetml_file.read(self.hash_block_size), b''):
+                file_hash.update(block)
+
+        return file_hash.hexdigest()
+
+    def get_key(self, file_hash, network_format, load_options):
+        """
+        :param str file_hash: The hash of the contents of a DyNetML file, as returned by :meth:`get_file_hash`
+        :param str|unicode network_format: The network format; "networkx", "igraph", or "dict"
+        :param tuple load_options: The filters used to load the file
+        :returns: The key of the cache entry for the file loaded with these options
+        :rtype: str
+        """
+        network_format = network_format.lower() or 'dict'
+        # The order of the items in a filter doesn't change what is loaded
+        load_options = [sorted(option) if isinstance(option, (list, tuple)) else option for option in load_options]
+
+        key_hash = hashlib.sha1(file_hash.encode('ascii'))
+        key_hash.update(repr((network_format, load_options)).encode('utf8'))
+        return key_hash.hexdigest()
+
+    def get(self, key, network_format):
+        """
+        :param str key: The key of a cache entry, as returned by :meth:`get_key`
+        :param str|unicode network_format: The network format; "networkx", "igraph", or "dict"
+        :returns: The cached network, or None if there is no entry for key
+        :rtype: DynamicMetaNetwork|MetaNetwork|None
+        """
+        from DynamicMetaNetwork import DynamicMetaNetwork
+
+        for kind in self.entry_suffixes:
+            entry_path = os.path.join(self.cache_dir, key + self.entry_suffixes[kind])
+            if not os.path.isfile(entry_path):
+                continue
+
+            if kind == 'DynamicMetaNetwork':
+                network = DynamicMetaNetwork(network_format)
+            else:
+                network = DynamicMetaNetwork(network_format)._get_metanetwork_class()()
+
+            try:
+                network.load_binary(entry_path)
+                # Mark the entry as recently used
+                os.utime(entry_path, None)
+            except (IOError, OSError, ValueError):
+                return None
+
+            return network
+
+        return None
+
+    def put(self, key, network, dynetml_path, file_signature):
+        """
+        Adds a network to the cache and then evicts the least recently used entries if the cache is too large. \
+        Nothing is stored if the DyNetML file changed while it was being loaded.
+
+        :param str key: The key of the cache entry, as returned by :meth:`get_key`
+        :param DynamicMetaNetwork|MetaNetwork network: The network loaded from the DyNetML file
+        :param str|unicode dynetml_path: Path to the DyNetML file
+        :param tuple file_signature: The signature of the DyNetML file, as returned by :meth:`get_file_signature`, \
+        taken before the hash that key was built from was computed, so that the file isn't read a second time
+        """
+        from DynamicMetaNetwork import DynamicMetaNetwork
+
+        try:
+            if self.get_file_signature(dynetml_path) != file_signature:
+                return
+        except OSError:
+            return
+
+        kind = 'DynamicMetaNetwork' if isinstance(network, DynamicMetaNetwork) else 'MetaNetwork'
+        entry_path = os.path.join(self.cache_dir, key + self.entry_suffixes[kind])
+        temp_path = '{0}.{1}.tmp'.format(entry_path, os.getpid())
+
+        # Write to a temporary file first so other processes never see a partial entry
+        try:
+            network.save_binary(temp_path)
+            _replace_file(temp_path, entry_path)
+        except (IOError, OSError):
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache is no larger than its size limit"""
+        entries = []
+        for file_name in os.listdir(self.cache_dir):
+            entry_path = os.path.join(self.cache_dir, file_name)
+            if not any(file_name.endswith(suffix) for suffix in self.entry_suffixes.values()):
+                continue
+            try:
+                entry_stat = os.stat(entry_path)
+            except OSError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+
+        cache_size = sum(entry[1] for entry in entries)
+        for mtime, size, entry_path in sorted(entries):
+            if cache_size <= self.size_limit:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                continue
+            cache_size -= size
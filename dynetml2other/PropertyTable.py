@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: PropertyTable
+:synopsis: Columnar storage for the properties of the nodes in a nodeset.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from array import array
+import calendar
+from collections import MutableMapping
+from datetime import datetime, timedelta
+from itertools import izip
+
+EPOCH = datetime(1970, 1, 1)
+
+
+class PropertyTable(object):
+    """
+    The PropertyTable class stores the properties of every node in a nodeset as columns, one per property identity, \
+    with a row for each node. Columns are typed according to the type of their property identity: "number" and "date" \
+    properties are kept in arrays of doubles (dates as seconds since the epoch), "bool" properties in an array of \
+    bytes, and "categoryText" properties as an array of integer codes into a list of their distinct values. Other \
+    properties are kept in lists. Each column has a validity mask marking the rows that have a value.
+
+    A column is only created once some node has a value for its property.
+
+    :ivar property_identities: The property identities of the nodeset, shared with its :class:`dynetmlrecords.Nodeset`
+    """
+    def __init__(self, property_identities=None):
+        """
+        :param dict|None property_identities: The property identities of the nodeset
+        """
+        self.property_identities = property_identities if property_identities is not None else {}
+        self._node_ids = []
+        self._columns = {}
+
+    @classmethod
+    def from_columns(cls, property_identities, node_ids, columns):
+        """
+        :param dict property_identities: The property identities of the nodeset
+        :param list node_ids: The id of the node each row belongs to, in row order
+        :param dict columns: A :class:`PropertyColumn` with a value for each row, keyed on property id
+        :returns: A table holding the columns as they are
+        :rtype: PropertyTable
+        """
+        table = cls(property_identities)
+        table._node_ids = node_ids
+        table._columns = columns
+        return table
+
+    def __len__(self):
+        return len(self._node_ids)
+
+    def add_row(self, node_id):
+        """
+        :param str|unicode node_id: The id of the node that the row belongs to
+        :returns: The index of a new row with no values
+        :rtype: int
+        """
+        self._node_ids.append(node_id)
+        for column in self._columns.values():
+            column.append_missing()
+        return len(self._node_ids) - 1
+
+    def rename_row(self, row, node_id):
+        """
+        :param int row: The index of a row
+        :param str|unicode node_id: The new id of the node the row belongs to
+        """
+        self._node_ids[row] = node_id
+
+    def get_node_ids(self):
+        """
+        :returns: The id of the node each row belongs to, in row order
+        :rtype: list
+        """
+        return self._node_ids
+
+    def get_property_ids(self):
+        """
+        :returns: The ids of the properties that have a column
+        :rtype: list
+        """
+        return self._columns.keys()
+
+    def iter_columns(self):
+        """
+        :returns: The id and :class:`PropertyColumn` of each property that has a column
+        :rtype: generator of :class:`tuple_(str, PropertyColumn)`
+        """
+        return self._columns.iteritems()
+
+    def get(self, row, property_id):
+        """
+        :param int row: The index of a row
+        :param str|unicode property_id: The id of a property
+        :returns: The value of the property in the row
+        :raises KeyError: if the row has no value for the property
+        """
+        column = self._columns.get(property_id)
+        if column is None or not column.mask[row]:
+            raise KeyError(property_id)
+        return column.get(row)
+
+    def set(self, row, property_id, value):
+        """
+        :param int row: The index of a row
+        :param str|unicode property_id: The id of a property; it must have a property identity
+        :param value: The value of the property, already converted to the type of its property identity
+        """
+        self._get_or_add_column(property_id).set(row, value)
+
+    def set_values(self, property_id, rows, values):
+        """
+        :param str|unicode property_id: The id of a property; it must have a property identity
+        :param list rows: The indices of a number of rows
+        :param list|numpy.ndarray values: The value of the property in each row, already converted to the type of \
+        its identity, as returned by :func:`dynetmlparsingutils.format_prop_column`
+        """
+        self._get_or_add_column(property_id).set_values(rows, values)
+
+    def delete(self, row, property_id):
+        """
+        :param int row: The index of a row
+        :param str|unicode property_id: The id of a property whose value should be removed from the row
+        """
+        column = self._columns.get(property_id)
+        if column is None or not column.mask[row]:
+            raise KeyError(property_id)
+        column.mask[row] = 0
+
+    def has_values(self, row):
+        """:returns: True if the row has a value for at least one property"""
+        return any(column.mask[row] for column in self._columns.values())
+
+    def iter_row(self, row):
+        """:returns: The id and value of each property that has a value in the row"""
+        for property_id, column in self._columns.items():
+            if column.mask[row]:
+                yield property_id, column.get(row)
+
+    def add_column(self, property_id):
+        """
+        Adds an empty column for a property, if it doesn't have one already
+
+        :param str|unicode property_id: The id of a property; it must have a property identity
+        """
+        self._get_or_add_column(property_id)
+
+    def get_values(self, property_id):
+        """
+        :param str|unicode property_id: The id of a property
+        :returns: The value of the property in each row, or None in rows without a value
+        :rtype: list
+        """
+        column = self._columns.get(property_id)
+        if column is None:
+            self._check_property_identity(property_id)
+            return [None] * len(self._node_ids)
+        return [column.get(row) if column.mask[row] else None for row in xrange(len(self._node_ids))]
+
+    def get_column(self, property_id):
+        """
+        Returns an entire column as a NumPy array: float64 for "number" properties, datetime64[us] for "date" \
+        properties, bool for "bool" properties, and object for the rest. Rows without a value hold NaN, NaT, False, \
+        or None respectively; use :meth:`get_mask` to tell them apart from real values.
+
+        :param str|unicode property_id: The id of a property
+        :returns: The values of the property, in row order
+        :rtype: :class:`numpy.ndarray`
+        """
+        import numpy
+
+        column = self._columns.get(property_id)
+        if column is None:
+            self._check_property_identity(property_id)
+            column = PropertyColumn(self.property_identities[property_id][0], len(self._node_ids))
+        return column.to_numpy(numpy)
+
+    def get_mask(self, property_id):
+        """
+        :param str|unicode property_id: The id of a property
+        :returns: An array that is True in each row that has a value for the property
+        :rtype: :class:`numpy.ndarray`
+        """
+        import numpy
+
+        column = self._columns.get(property_id)
+        if column is None:
+            self._check_property_identity(property_id)
+            return numpy.zeros(len(self._node_ids), dtype=bool)
+        return numpy.frombuffer(bytes(column.mask), dtype=numpy.uint8).astype(bool)
+
+    def get_categories(self, property_id):
+        """
+        :param str|unicode property_id: The id of a "categoryText" property
+        :returns: The codes of the property's values in each row (-1 where there is no value), and the list of \
+        categories that the codes index into
+        :rtype: :class:`tuple_(numpy.ndarray, list)`
+        """
+        import numpy
+
+        self._check_property_identity(property_id)
+        if self.property_identities[property_id][0] != 'categoryText':
+            raise ValueError('{0} is not a categoryText property'.format(property_id))
+
+        column = self._columns.get(property_id)
+        if column is None:
+            return -numpy.ones(len(self._node_ids), dtype=numpy.int32), []
+        codes = numpy.frombuffer(column.values, dtype=numpy.int32).copy()
+        codes[numpy.frombuffer(bytes(column.mask), dtype=numpy.uint8) == 0] = -1
+        return codes, list(column.categories)
+
+    def _get_or_add_column(self, property_id):
+        """:returns: The column of a property, which is added if the property doesn't have one yet"""
+        column = self._columns.get(property_id)
+        if column is None:
+            self._check_property_identity(property_id)
+            column = PropertyColumn(self.property_identities[property_id][0], len(self._node_ids))
+            self._columns[property_id] = column
+        return column
+
+    def _check_property_identity(self, property_id):
+        """Raises a KeyError if property_id has no property identity"""
+        if property_id not in self.property_identities:
+            raise KeyError('property_id not in property_identities; looked for {0}'.format(property_id))
+
+
+class PropertyColumn(object):
+    """
+    A typed column of property values with a validity mask
+
+    :ivar type_str: The type of the property: "number", "date", "bool", "categoryText", "text" or "URI"
+    :ivar values: The stored values, one per row
+    :ivar mask: A bytearray that is 1 in each row that has a value
+    :ivar categories: For "categoryText" columns, the distinct values that codes in values refer to
+    """
+    __slots__ = ('type_str', 'values', 'mask', 'categories', '_category_codes')
+
+    def __init__(self, type_str, row_count=0):
+        """
+        :param str|unicode type_str: The type of the property
+        :param int row_count: The number of empty rows the column should start with
+        """
+        self.type_str = type_str
+        self.mask = bytearray(row_count)
+        self.categories = None
+        self._category_codes = None
+        if type_str in ('number', 'date'):
+            self.values = array('d', [float('nan')]) * row_count
+        elif type_str == 'bool':
+            self.values = array('b', [0]) * row_count
+        elif type_str == 'categoryText':
+            self.values = array('i', [0]) * row_count
+            self.categories = []
+            self._category_codes = {}
+        else:
+            self.values = [None] * row_count
+
+    @classmethod
+    def from_values(cls, type_str, values, mask, categories=None):
+        """
+        :param str|unicode type_str: The type of the property
+        :param values: The stored values, one per row, in the typed array or list used for the type
+        :param bytearray mask: A bytearray that is 1 in each row that has a value
+        :param list|None categories: For "categoryText" columns, the distinct values that codes in values refer to
+        :returns: A column holding the values as they are
+        :rtype: PropertyColumn
+        """
+        column = cls.__new__(cls)
+        column.__setstate__((type_str, values, mask, categories))
+        return column
+
+    def append_missing(self):
+        """Adds an empty row to the column"""
+        self.mask.append(0)
+        if isinstance(self.values, list):
+            self.values.append(None)
+        elif self.values.typecode == 'd':
+            self.values.append(float('nan'))
+        else:
+            self.values.append(0)
+
+    def get(self, row):
+        """:returns: The value in a row, converted back to the type of the property"""
+        value = self.values[row]
+        if self.type_str == 'number':
+            return value
+        elif self.type_str == 'date':
+            return EPOCH + timedelta(seconds=value)
+        elif self.type_str == 'bool':
+            return value == 1
+        elif self.type_str == 'categoryText':
+            return self.categories[value]
+        return value
+
+    def set(self, row, value):
+        """:param value: The value of the property in a row, of the type of the property"""
+        if self.type_str == 'number':
+            self.values[row] = value
+        elif self.type_str == 'date':
+            self.values[row] = calendar.timegm(value.timetuple()) + value.microsecond / 1e6
+        elif self.type_str == 'bool':
+            self.values[row] = 1 if value else 0
+        elif self.type_str == 'categoryText':
+            code = self._category_codes.get(value)
+            if code is None:
+                code = self._category_codes[value] = len(self.categories)
+                self.categories.append(value)
+            self.values[row] = code
+        else:
+            self.values[row] = value
+        self.mask[row] = 1
+
+    def set_values(self, rows, values):
+        """
+        Sets the values in a number of rows at once. "number", "date", and "bool" values are converted by NumPy, when \
+        it is available, and written straight into the column's array, rather than one row at a time.
+
+        :param list rows: The indices of the rows
+        :param list|numpy.ndarray values: The value of the property in each row, of the type of the property; a \
+        "date" column may also be given a NumPy datetime64 array
+        """
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        converted = None
+        if numpy is not None and len(rows) > 0:
+            try:
+                if self.type_str == 'number':
+                    converted = numpy.asarray(values, dtype=numpy.float64)
+                elif self.type_str == 'date':
+                    # Naive datetimes are taken to be UTC, as calendar.timegm takes them in set
+                    dates = numpy.asarray(values)
+                    if dates.dtype.kind != 'M':
+                        dates = numpy.array(values, dtype='datetime64[us]')
+                    converted = dates.astype('datetime64[us]').astype(numpy.int64) / 1e6
+                elif self.type_str == 'bool':
+                    converted = numpy.array(values, dtype=bool).astype(numpy.int8)
+            except (ValueError, TypeError):
+                converted = None
+
+        if converted is None:
+            for row, value in izip(rows, values):
+                self.set(row, value)
+            return
+
+        rows = numpy.asarray(rows, dtype=numpy.intp)
+        numpy.frombuffer(self.values, dtype=converted.dtype)[rows] = converted
+        numpy.frombuffer(self.mask, dtype=numpy.uint8)[rows] = 1
+
+    def to_numpy(self, numpy):
+        """
+        :param module numpy: The numpy module
+        :returns: The column as a NumPy array
+        :rtype: :class:`numpy.ndarray`
+        """
+        mask = numpy.frombuffer(bytes(self.mask), dtype=numpy.uint8) != 0
+        if self.type_str == 'number':
+            column = numpy.frombuffer(self.values, dtype=numpy.float64).copy()
+            column[~mask] = numpy.nan
+        elif self.type_str == 'date':
+            microseconds = numpy.round(numpy.frombuffer(self.values, dtype=numpy.float64) * 1e6)
+            column = numpy.where(mask, microseconds, 0).astype(numpy.int64).astype('datetime64[us]')
+            column[~mask] = numpy.datetime64('NaT')
+        elif self.type_str == 'bool':
+            column = (numpy.frombuffer(self.values, dtype=numpy.int8) != 0) & mask
+        else:
+            column = numpy.array([self.get(row) if self.mask[row] else None for row in xrange(len(self.mask))],
+                                 dtype=object)
+        return column
+
+    def __getstate__(self):
+        return self.type_str, self.values, self.mask, self.categories
+
+    def __setstate__(self, state):
+        self.type_str, self.values, self.mask, self.categories = state
+        self._category_codes = None
+        if self.categories is not None:
+            self._category_codes = dict((value, code) for code, value in enumerate(self.categories))
+
+
+class PropertyRow(MutableMapping):
+    """A mapping of the properties of one node to their values, read from and written to a :class:`PropertyTable`"""
+    def __init__(self, table, row):
+        """
+        :param PropertyTable table: The table containing the row
+        :param int row: The index of the row
+        """
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, property_id):
+        return self._table.get(self._row, property_id)
+
+    def __setitem__(self, property_id, value):
+        self._table.set(self._row, property_id, value)
+
+    def __delitem__(self, property_id):
+        self._table.delete(self._row, property_id)
+
+    def __iter__(self):
+        for property_id, value in self._table.iter_row(self._row):
+            yield property_id
+
+    def __len__(self):
+        return sum(1 for entry in self._table.iter_row(self._row))
+
+    def __repr__(self):
+        return repr(dict(self._table.iter_row(self._row)))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: SymbolTable
+:synopsis: Interns node ids and gives them stable integer codes.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from array import array
+
+
+class SymbolTable:
+    """
+    The SymbolTable class interns strings such as node ids. Every distinct string is stored once, and each occurrence \
+    of it in node trees and networks refers to that single object rather than to a copy of its own. Each string is \
+    also given an integer code, in the order in which it was first seen; codes never change, so they can be used to \
+    compare and join nodes across all the meta-networks sharing the table.
+    """
+    def __init__(self):
+        """Initializes an empty SymbolTable"""
+        self._codes = {}
+        self._symbols = []
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._codes
+
+    def __iter__(self):
+        return iter(self._symbols)
+
+    def intern(self, symbol):
+        """
+        :param str|unicode symbol: A string
+        :returns: The single stored copy of symbol, which is added to the table if it isn't there already
+        :rtype: str|unicode
+        """
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self.get_code(symbol)
+        return self._symbols[code]
+
+    def intern_all(self, symbols):
+        """
+        :param list symbols: A list of strings
+        :returns: The stored copy of each string in symbols, adding any that aren't in the table already
+        :rtype: list
+        """
+        return [self._symbols[code] for code in self.get_codes(symbols)]
+
+    def get_code(self, symbol):
+        """
+        :param str|unicode symbol: A string
+        :returns: The code of symbol, which is added to the table if it isn't there already
+        :rtype: int
+        """
+        code = self._codes.get(symbol)
+        if code is None:
+            code = self._codes[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+        return code
+
+    def get_codes(self, symbols):
+        """
+        :param list symbols: A list of strings
+        :returns: The code of each string in symbols, adding any that aren't in the table already
+        :rtype: :class:`array.array`
+        """
+        codes = self._codes
+        new_code = self.get_code
+        return array('l', [codes[x] if x in codes else new_code(x) for x in symbols])
+
+    def get_symbol(self, code):
+        """
+        :param int code: The code of a string in the table
+        :returns: The string with that code
+        :rtype: str|unicode
+        """
+        return self._symbols[code]
+
+    def get_symbols(self):
+        """
+        :returns: Every string in the table, in the order of their codes
+        :rtype: list
+        """
+        return self._symbols
@@ -9,6 +9,8 @@
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
 from dynetml2other import dynetml2other
+from dynetml2other import iter_metanetworks
+from dynetml2other import scan_dynetml
 
 from DynamicMetaNetwork import DynamicMetaNetwork
 
@@ -17,3 +19,13 @@ from MetaNetworkDict import MetaNetworkDict
 from MetaNetworkIGraph import MetaNetworkIG
 from MetaNetworkNetworkX import MetaNetworkNX
 
+from CSRNetwork import CSRNetwork
+from DeltaMetaNetworkStore import DeltaMetaNetworkStore
+from DyNetMLSummary import DyNetMLSummary
+from LazyNetworkDict import LazyNetworkDict
+from MetaNetworkIndex import MetaNetworkIndex
+from MetaNetworkList import MetaNetworkAttributes, MetaNetworkList
+from MetaNetworkView import MetaNetworkView
+from PropertyTable import PropertyTable
+from SymbolTable import SymbolTable
+
@@ -10,53 +10,224 @@ Imports a DyNetML file into a wrapper class that uses NetworkX, igraph, or Pytho
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
 from DynamicMetaNetwork import DynamicMetaNetwork
+import dynetmlparsingutils as dmlpu
+from DyNetMLSummary import DyNetMLSummary
 from lxml import etree
 import os
+from SymbolTable import SymbolTable
 
 
-def main(dynetml_path, network_format="dict"):
+def main(dynetml_path, network_format="dict", streaming=False, workers=None, properties_to_include=None,
+         properties_to_ignore=None, nodeclasses_to_include=None, nodeclasses_to_ignore=None, networks_to_include=None,
+         networks_to_ignore=None, start_date=None, end_date=None, cache_dir=None, cache_size_limit=1073741824):
     """
-    :param str|unicode dynetml_path: Path to a dynetml file
+    :param str|unicode dynetml_path: Path to a dynetml file, which may be compressed with gzip, bz2, xz, or zstd
     :param str|unicode network_format: The network format; we expect "networkx", "igraph", or nothing ("dict")
-    :returns: The data wrapped in the appropriate class and stored in the specified graph library
+    :param bool streaming: If True, dynamic meta-networks are parsed incrementally, one <MetaNetwork> at a time, \
+    rather than by loading the entire document into memory first
+    :param int|None workers: If more than one, dynamic meta-networks are streamed and their meta-networks are parsed \
+    by this many processes
+    :param list properties_to_include: a list of nodeclass properties that should be included
+    :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+    :param list nodeclasses_to_include: a list of nodeclasses that should be included
+    :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+    :param list networks_to_include: a list of networks that should be included
+    :param list networks_to_ignore: a list of networks that should be ignored
+    :param datetime.datetime start_date: MetaNetworks from before this datetime should not be imported
+    :param datetime.datetime end_date: MetaNetworks from after this datetime should not be imported
+    :param str|unicode|None cache_dir: If set, results are cached in this directory, keyed on the contents of the \
+    file, the network format and the filters, and are returned from the cache when the same file is loaded again
+    :param int cache_size_limit: The largest number of bytes the cache directory may hold
+    :returns: The data wrapped in the appropriate class and stored in the specified graph library, or None if the \
+    file is a lone meta-network from outside of start_date and end_date
     :rtype: DynamicMetaNetwork|MetaNetwork|None
+    :raises ValueError: if a date is given and the id of a lone meta-network isn't a timestamp
     """
-    if not isinstance(dynetml_path, (str, unicode)):
-        raise TypeError('dynetml_path must be str or unicode')
+    _check_arguments(dynetml_path, network_format)
 
-    if not isinstance(network_format, (str, unicode)):
-        raise TypeError('network_format must be str or unicode')
+    if not isinstance(streaming, bool):
+        raise TypeError('streaming must be a bool')
 
-    if network_format.lower() not in ('dict', 'igraph', 'networkx', ''):
-        raise ValueError('network_format must be blank, "dict", "igraph" or "networkx"; got {0}'.format(network_format))
+    if workers is not None:
+        streaming = True
 
-    if not os.path.isfile(dynetml_path):
-        raise IOError('{0} isn\'t a file'.format(dynetml_path))
+    load_args = (properties_to_include, properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore,
+                 networks_to_include, networks_to_ignore)
+
+    if cache_dir is None:
+        return _load(dynetml_path, network_format.lower(), streaming, workers, load_args, start_date, end_date)
+
+    from ParseCache import ParseCache
+    cache = ParseCache(cache_dir, cache_size_limit)
+    file_signature = cache.get_file_signature(dynetml_path)
+    file_hash = cache.get_file_hash(dynetml_path)
+    cache_key = cache.get_key(file_hash, network_format, load_args + (start_date, end_date))
+
+    outnetwork = cache.get(cache_key, network_format)
+    if outnetwork is None:
+        outnetwork = _load(dynetml_path, network_format.lower(), streaming, workers, load_args, start_date, end_date)
+        if outnetwork is not None:
+            cache.put(cache_key, outnetwork, dynetml_path, file_signature)
+
+    return outnetwork
+
+
+def _load(dynetml_path, network_format, streaming, workers, load_args, start_date, end_date):
+    """
+    Loads a DyNetML file; see :func:`main`
 
+    :param tuple load_args: The arguments to :meth:`MetaNetwork.load_from_tag`
+    :returns: The data wrapped in the appropriate class and stored in the specified graph library
+    :rtype: DynamicMetaNetwork|MetaNetwork|None
+    """
     try:
-        root = etree.parse(dynetml_path)
+        if streaming:
+            root = None
+            root_element = dmlpu.get_root_tag(dynetml_path)
+        else:
+            root = root_element = _parse(dynetml_path)
+        root_tag = root_element.tag
     except (etree.XMLSyntaxError, etree.XMLSchemaError, etree.XMLSchemaParseError, OSError):
         return None
 
     outnetwork = None
-    root_tag = root.getroot().tag
     if root_tag in ['DynamicMetaNetwork', 'DynamicNetwork']:
-        outnetwork = DynamicMetaNetwork(network_format.lower())
-        outnetwork.load_from_tag(root.getroot())
+        outnetwork = DynamicMetaNetwork(network_format)
+        if streaming:
+            try:
+                outnetwork.load_from_dynetml_file(dynetml_path, *(load_args + (start_date, end_date, workers)))
+            except (etree.XMLSyntaxError, OSError):
+                return None
+        else:
+            outnetwork.load_from_tag(root, *(load_args + (start_date, end_date)))
     elif root_tag == 'MetaNetwork':
-        if network_format.lower() == 'networkx':
+        if network_format == 'networkx':
             from MetaNetworkNetworkX import MetaNetworkNX as MetaNetwork
-        elif network_format.lower() == 'igraph':
+        elif network_format == 'igraph':
             from MetaNetworkIGraph import MetaNetworkIG as MetaNetwork
         else:
             from MetaNetwork import MetaNetwork
 
+        # A lone meta-network is only imported if its id is a timestamp between the dates, if any are given
+        if not DynamicMetaNetwork(network_format)._is_in_date_range(root_element.attrib.get('id', ''), start_date,
+                                                                    end_date):
+            return None
+
+        # A lone meta-network is a single snapshot, so there is nothing to gain from streaming it.
+        if root is None:
+            try:
+                root = _parse(dynetml_path)
+            except (etree.XMLSyntaxError, OSError):
+                return None
+
         outnetwork = MetaNetwork()
-        outnetwork.load_from_tag(root.getroot())
+        outnetwork.load_from_tag(root, *load_args)
 
     return outnetwork
 
+
+def _parse(dynetml_path):
+    """
+    :param str|unicode dynetml_path: Path to a dynetml file, which may be compressed
+    :returns: The root tag of the parsed file
+    :rtype: :class:`lxml._Element`
+    """
+    with dmlpu.open_dynetml(dynetml_path) as dynetml_file:
+        return etree.parse(dynetml_file).getroot()
+
+
+def iter_metanetworks(dynetml_path, network_format="dict", properties_to_include=None, properties_to_ignore=None,
+                      nodeclasses_to_include=None, nodeclasses_to_ignore=None, networks_to_include=None,
+                      networks_to_ignore=None, start_date=None, end_date=None, symbol_table=None):
+    """
+    Lazily loads the meta-networks in a DyNetML file, yielding each one as soon as it has been parsed. Nothing is kept \
+    after a meta-network has been yielded, so a pipeline can process and drop snapshots in constant memory: unless a \
+    symbol table is passed in, each meta-network interns its node ids in a table of its own. A file containing a lone \
+    meta-network yields just that meta-network, unless its id is a timestamp outside of start_date and end_date.
+
+    :param str|unicode dynetml_path: Path to a dynetml file
+    :param str|unicode network_format: The network format; we expect "networkx", "igraph", or nothing ("dict")
+    :param list properties_to_include: a list of nodeclass properties that should be included
+    :param list properties_to_ignore: a list of nodeclass properties that should be ignored
+    :param list nodeclasses_to_include: a list of nodeclasses that should be included
+    :param list nodeclasses_to_ignore: a list of nodeclasses that should be ignored
+    :param list networks_to_include: a list of networks that should be included
+    :param list networks_to_ignore: a list of networks that should be ignored
+    :param datetime.datetime start_date: MetaNetworks from before this datetime should not be yielded
+    :param datetime.datetime end_date: MetaNetworks from after this datetime should not be yielded
+    :param SymbolTable|None symbol_table: A table in which every meta-network should intern its node ids, so that \
+    ids share one copy and one code across snapshots. The table grows with every distinct id in the file.
+    :returns: The meta-networks in the file, in document order
+    :rtype: generator of :class:`MetaNetwork`
+    :raises ValueError: if a date is given and the id of a lone meta-network isn't a timestamp
+    """
+    _check_arguments(dynetml_path, network_format)
+    dmlpu.check_type(symbol_table, 'symbol_table', (SymbolTable, type(None)))
+
+    dmn = DynamicMetaNetwork(network_format.lower())
+    if symbol_table is not None:
+        dmn.symbol_table = symbol_table
+    if dmlpu.get_root_tag(dynetml_path).tag == 'MetaNetwork':
+        return _iter_lone_metanetwork(dmn, dynetml_path, symbol_table, start_date, end_date, properties_to_include,
+                                      properties_to_ignore, nodeclasses_to_include, nodeclasses_to_ignore,
+                                      networks_to_include, networks_to_ignore)
+
+    return dmn._iter_metanetworks_from_file(dynetml_path, properties_to_include, properties_to_ignore,
+                                            nodeclasses_to_include, nodeclasses_to_ignore, networks_to_include,
+                                            networks_to_ignore, start_date, end_date, symbol_table is not None)
+
+
+def scan_dynetml(dynetml_path):
+    """
+    Summarizes a DyNetML file without loading it: the file is streamed through a parser that only counts \
+    meta-networks, nodes, and links, so no nodes or networks are ever built.
+
+    :param str|unicode dynetml_path: Path to a dynetml file, which may be compressed with gzip, bz2, xz, or zstd
+    :returns: The number of meta-networks in the file and their ids, and the number of nodes in each nodeset and \
+    links in each network
+    :rtype: DyNetMLSummary
+    :raises ValueError: if the file isn't DyNetML
+    """
+    if not isinstance(dynetml_path, (str, unicode)):
+        raise TypeError('dynetml_path must be str or unicode')
+
+    if not os.path.isfile(dynetml_path):
+        raise IOError('{0} isn\'t a file'.format(dynetml_path))
+
+    return DyNetMLSummary.from_file(dynetml_path)
+
+
+def _iter_lone_metanetwork(dmn, dynetml_path, symbol_table, start_date, end_date, *args):
+    """Yields the meta-network in a DyNetML file whose root is a <MetaNetwork> tag, if it is between the dates"""
+    MetaNetwork = dmn._get_metanetwork_class()
+    for root_tag, mn_tag in dmlpu.iterparse_metanetworks(dynetml_path):
+        if not dmn._is_in_date_range(mn_tag.attrib.get('id', ''), start_date, end_date):
+            continue
+        mn = MetaNetwork(symbol_table)
+        mn.load_from_tag(mn_tag, *args)
+        yield mn
+
+
+def _check_arguments(dynetml_path, network_format):
+    """
+    Validates the arguments shared by :func:`main` and :func:`iter_metanetworks`
+
+    :param str|unicode dynetml_path: Path to a dynetml file
+    :param str|unicode network_format: The network format; we expect "networkx", "igraph", or nothing ("dict")
+    """
+    if not isinstance(dynetml_path, (str, unicode)):
+        raise TypeError('dynetml_path must be str or unicode')
+
+    if not isinstance(network_format, (str, unicode)):
+        raise TypeError('network_format must be str or unicode')
+
+    if network_format.lower() not in ('dict', 'igraph', 'networkx', ''):
+        raise ValueError('network_format must be blank, "dict", "igraph" or "networkx"; got {0}'.format(network_format))
+
+    if not os.path.isfile(dynetml_path):
+        raise IOError('{0} isn\'t a file'.format(dynetml_path))
+
 if __name__ == '__main__':
     import sys
-    if len(sys.argv) == 3:
-        main(sys.argv[1], sys.argv[2])
\ No newline at end of file
+    from dynetmlcli import main as cli_main
+    sys.exit(cli_main())
\ No newline at end of file
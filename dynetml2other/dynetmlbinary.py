@@ -0,0 +1,304 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: dynetmlbinary
+:synopsis: Reads and writes meta-networks in a compact, memory-mappable binary format.
+
+A binary file starts with a short preamble and a small pickled header holding the attributes and properties of the \
+meta-networks, the property identities of their nodesets, the attributes of their networks, and the location of \
+every column in the file. Everything else is stored as columns, each aligned to eight bytes so it can be used straight \
+out of a memory map of the file:
+
+* two string tables, one of the node ids shared by every network and nodeset in the file and one of every other \
+  string, each stored as a UTF-8 blob and an array of int64 offsets into it
+* for each nodeset, an int32 column of the node id code of each row, an int32 column of string codes for each node \
+  attribute, and a value column and a uint8 validity mask for each property column of its \
+  :class:`PropertyTable.PropertyTable`
+* for each network, int32 columns of source and target codes into the node id table and a column of float32 or \
+  float64 values
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from array import array
+import cPickle as pickle
+import dynetmlparsingutils as dmlpu
+from dynetmlrecords import Nodeset
+import mmap
+import numpy
+from PropertyTable import PropertyColumn, PropertyTable
+import struct
+from SymbolTable import SymbolTable
+
+MAGIC = b'DYNETMLB'
+VERSION = 2
+ALIGNMENT = 8
+PREAMBLE = struct.Struct('<IQ')  # version, header length
+
+NO_STRING = -1  # The string code of a missing value
+NODE_ID = -2  # The string code of an "id" attribute that is the id of its node
+
+
+def _get_padding(length):
+    """:returns: The number of bytes needed to align length to ALIGNMENT"""
+    return -length % ALIGNMENT
+
+
+def write_metanetwork_states(out_file_path, header, states):
+    """
+    Writes a set of meta-networks to a binary file
+
+    :param str|unicode out_file_path: The path of the file to be written
+    :param dict header: Additional picklable values to be stored in the header of the file
+    :param list states: Meta-networks in the form returned by :meth:`MetaNetwork._export_state`
+    """
+    node_ids = SymbolTable()
+    strings = SymbolTable()
+    arrays = []
+    data_length = [0]
+
+    def add_array(array):
+        """:returns: the offset, length, and dtype of an array once it has been added to the file"""
+        spec = data_length[0], len(array), array.dtype.str
+        arrays.append(array)
+        data_length[0] += array.nbytes + _get_padding(array.nbytes)
+        return spec
+
+    mn_entries = []
+    for attributes, properties, property_identities, node_tree, networks in states:
+        ns_entries = []
+        for nodeclass_key in node_tree:
+            for nodeset_key in node_tree[nodeclass_key]:
+                nodeset = node_tree[nodeclass_key][nodeset_key]
+                if not isinstance(nodeset, Nodeset):
+                    nodeset = Nodeset(*nodeset)
+                ns_entries.append((nodeclass_key, nodeset_key) +
+                                  _get_nodeset_entry(nodeset, node_ids, strings, add_array))
+
+        nk_entries = []
+        for nk_attributes, sources, targets, values in networks:
+            source_spec = add_array(numpy.array(node_ids.get_codes(sources), dtype=numpy.int32))
+            target_spec = add_array(numpy.array(node_ids.get_codes(targets), dtype=numpy.int32))
+
+            value_spec = None
+            if not nk_attributes['isBinary']:
+                value_array = numpy.array(values, dtype=numpy.float64)
+                if numpy.array_equal(value_array.astype(numpy.float32), value_array):
+                    value_array = value_array.astype(numpy.float32)
+                value_spec = add_array(value_array)
+
+            nk_entries.append((dict(nk_attributes), source_spec, target_spec, value_spec))
+
+        mn_entries.append((dict(attributes), properties, property_identities, ns_entries, nk_entries))
+
+    header = dict(header)
+    header['node_ids'] = _add_strings(node_ids.get_symbols(), add_array)
+    header['strings'] = _add_strings(strings.get_symbols(), add_array)
+    header['metanetworks'] = mn_entries
+    header_bytes = pickle.dumps(header, pickle.HIGHEST_PROTOCOL)
+
+    with open(out_file_path, 'wb') as outfile:
+        outfile.write(MAGIC)
+        outfile.write(PREAMBLE.pack(VERSION, len(header_bytes)))
+        outfile.write(header_bytes)
+        outfile.write(b'\0' * _get_padding(len(MAGIC) + PREAMBLE.size + len(header_bytes)))
+        for array in arrays:
+            outfile.write(array.tobytes())
+            outfile.write(b'\0' * _get_padding(array.nbytes))
+
+
+def read_metanetwork_states(in_file_path, symbol_table=None):
+    """
+    Reads a set of meta-networks from a binary file. The link columns of each network are left in the memory map of \
+    the file, as arrays of codes into the table of node ids, and nodesets are rebuilt from their columns.
+
+    :param str|unicode in_file_path: The path of a file written by :func:`write_metanetwork_states`
+    :param SymbolTable|None symbol_table: If set, the node ids in the file are interned in this table
+    :returns: The header of the file, an object array of the node ids in the file, and the meta-networks in the form \
+    used by :meth:`MetaNetwork._import_state` when it is given node ids
+    :rtype: :class:`tuple_(dict, numpy.ndarray, list)`
+    """
+    with open(in_file_path, 'rb') as infile:
+        if infile.read(len(MAGIC)) != MAGIC:
+            raise ValueError('{0} is not a binary meta-network file'.format(in_file_path))
+        version, header_length = PREAMBLE.unpack(infile.read(PREAMBLE.size))
+        if version != VERSION:
+            raise ValueError('{0} has binary format version {1}; expected {2}'.format(in_file_path, version, VERSION))
+        header = pickle.loads(infile.read(header_length))
+        data_map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data_offset = len(MAGIC) + PREAMBLE.size + header_length
+    data_offset += _get_padding(data_offset)
+
+    def get_array(spec):
+        """:returns: the array described by spec, backed by the memory map"""
+        return numpy.frombuffer(data_map, dtype=spec[2], count=spec[1], offset=data_offset + spec[0])
+
+    node_ids = _read_strings(header.pop('node_ids'), get_array)
+    if symbol_table is not None:
+        node_ids = symbol_table.intern_all(node_ids)
+    node_ids = numpy.array(node_ids, dtype=object)
+    strings = _read_strings(header.pop('strings'), get_array)
+
+    states = []
+    for attributes, properties, property_identities, ns_entries, nk_entries in header.pop('metanetworks'):
+        node_tree = dmlpu.node_tree()
+        for ns_entry in ns_entries:
+            node_tree[ns_entry[0]][ns_entry[1]] = _read_nodeset(ns_entry[2:], node_ids, strings, get_array)
+
+        networks = []
+        for nk_attributes, source_spec, target_spec, value_spec in nk_entries:
+            values = get_array(value_spec) if value_spec is not None else None
+            networks.append((nk_attributes, get_array(source_spec), get_array(target_spec), values))
+
+        states.append((attributes, properties, property_identities, node_tree, networks))
+
+    return header, node_ids, states
+
+
+def _add_strings(symbols, add_array):
+    """
+    :param list symbols: The strings in a string table, in the order of their codes
+    :param add_array: The function adding an array to the file
+    :returns: The specs of the UTF-8 blob of the strings and of the offset of each string in it
+    :rtype: tuple
+    """
+    encoded = [symbol.encode('utf8') if isinstance(symbol, unicode) else symbol for symbol in symbols]
+    offsets = numpy.zeros(len(encoded) + 1, dtype=numpy.int64)
+    numpy.cumsum([len(symbol) for symbol in encoded], out=offsets[1:])
+    return add_array(numpy.array(bytearray(b''.join(encoded)), dtype=numpy.uint8)), add_array(offsets)
+
+
+def _read_strings(spec, get_array):
+    """
+    :param tuple spec: The specs returned by :func:`_add_strings`
+    :param get_array: The function reading an array from the file
+    :returns: The strings in the table, in the order of their codes
+    :rtype: list
+    """
+    blob = get_array(spec[0]).tobytes()
+    offsets = get_array(spec[1]).tolist()
+    return [blob[offsets[i]:offsets[i + 1]].decode('utf8') for i in xrange(len(offsets) - 1)]
+
+
+def _get_string_codes(values, strings, extras):
+    """
+    :param list values: A column of values, which should be strings or None
+    :param SymbolTable strings: The string table of the file
+    :param dict extras: Values that aren't strings are added to this dictionary, keyed on row, to be pickled instead
+    :returns: The code of each value in the string table, or NO_STRING
+    :rtype: :class:`numpy.ndarray`
+    """
+    codes = numpy.empty(len(values), dtype=numpy.int32)
+    for row, value in enumerate(values):
+        if isinstance(value, basestring):
+            codes[row] = strings.get_code(value)
+        else:
+            codes[row] = NO_STRING
+            if value is not None:
+                extras[row] = value
+    return codes
+
+
+def _get_nodeset_entry(nodeset, node_ids, strings, add_array):
+    """
+    :param Nodeset nodeset: A nodeset
+    :param SymbolTable node_ids: The node id table of the file
+    :param SymbolTable strings: The string table of the file
+    :param add_array: The function adding an array to the file
+    :returns: The header entry of the nodeset: its property identities and the specs of its columns, followed by any \
+    values that had to be pickled because they aren't strings
+    :rtype: tuple
+    """
+    table = nodeset.property_table
+    rows = table.get_node_ids()
+    node_spec = add_array(numpy.array(node_ids.get_codes(rows), dtype=numpy.int32))
+
+    # The values of each attribute, and the rows whose "id" attribute is just the node id
+    attribute_columns = {}
+    for row, node_id in enumerate(rows):
+        for attribute_key, value in nodeset.nodes[node_id].attributes.iteritems():
+            column = attribute_columns.get(attribute_key)
+            if column is None:
+                column = attribute_columns[attribute_key] = [None] * len(rows), []
+            if attribute_key == 'id' and value == node_id:
+                column[1].append(row)
+            else:
+                column[0][row] = value
+
+    attribute_specs = {}
+    extras = {}
+    for attribute_key, (values, node_id_rows) in attribute_columns.iteritems():
+        column_extras = {}
+        codes = _get_string_codes(values, strings, column_extras)
+        codes[node_id_rows] = NODE_ID
+        attribute_specs[attribute_key] = add_array(codes)
+        if column_extras:
+            extras[('attribute', attribute_key)] = column_extras
+
+    property_specs = {}
+    for property_id, column in table.iter_columns():
+        categories_spec = None
+        if column.type_str in ('number', 'date'):
+            values_spec = add_array(numpy.array(column.values, dtype=numpy.float64))
+        elif column.type_str == 'bool':
+            values_spec = add_array(numpy.array(column.values, dtype=numpy.int8))
+        elif column.type_str == 'categoryText':
+            values_spec = add_array(numpy.array(column.values, dtype=numpy.int32))
+            categories_spec = add_array(numpy.array(strings.get_codes(column.categories), dtype=numpy.int32))
+        else:
+            column_extras = {}
+            values_spec = add_array(_get_string_codes(column.values, strings, column_extras))
+            if column_extras:
+                extras[('property', property_id)] = column_extras
+        mask_spec = add_array(numpy.array(column.mask, dtype=numpy.uint8))
+        property_specs[property_id] = column.type_str, values_spec, mask_spec, categories_spec
+
+    return nodeset.property_identities, node_spec, attribute_specs, property_specs, extras
+
+
+def _read_nodeset(entry, node_ids, strings, get_array):
+    """
+    :param tuple entry: A nodeset entry, as returned by :func:`_get_nodeset_entry`
+    :param numpy.ndarray node_ids: The node id table of the file
+    :param list strings: The string table of the file
+    :param get_array: The function reading an array from the file
+    :returns: The nodeset, rebuilt from its columns
+    :rtype: Nodeset
+    """
+    property_identities, node_spec, attribute_specs, property_specs, extras = entry
+    rows = node_ids[get_array(node_spec)].tolist()
+
+    node_attributes = [{} for node_id in rows]
+    for attribute_key, spec in attribute_specs.iteritems():
+        for row, code in enumerate(get_array(spec).tolist()):
+            if code >= 0:
+                node_attributes[row][attribute_key] = strings[code]
+            elif code == NODE_ID:
+                node_attributes[row][attribute_key] = rows[row]
+        for row, value in extras.get(('attribute', attribute_key), {}).iteritems():
+            node_attributes[row][attribute_key] = value
+
+    columns = {}
+    for property_id, (type_str, values_spec, mask_spec, categories_spec) in property_specs.iteritems():
+        values = get_array(values_spec)
+        categories = None
+        if type_str in ('number', 'date'):
+            values = array('d', values.tobytes())
+        elif type_str == 'bool':
+            values = array('b', values.tobytes())
+        elif type_str == 'categoryText':
+            values = array('i', values.tobytes())
+            categories = [strings[code] for code in get_array(categories_spec).tolist()]
+        else:
+            values = [strings[code] if code >= 0 else None for code in values.tolist()]
+            for row, value in extras.get(('property', property_id), {}).iteritems():
+                values[row] = value
+        columns[property_id] = PropertyColumn.from_values(type_str, values, bytearray(get_array(mask_spec).tobytes()),
+                                                          categories)
+
+    return Nodeset.from_property_table(PropertyTable.from_columns(property_identities, rows, columns),
+                                       node_attributes)
@@ -0,0 +1,340 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: dynetmlcli
+:synopsis: The dynetml2other command line tool.
+
+The convert command converts any number of DyNetML files, named directly, by glob, or by directory, using a pool of \
+worker processes. Each worker imports the library once when it starts and then converts one file after another, \
+so the cost of starting Python is paid once per worker rather than once per file. The scan command catalogues files \
+the same way, summarizing each with :func:`dynetml2other.scan_dynetml` rather than loading it.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+import argparse
+from collections import defaultdict
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+DYNETML_EXTENSIONS = ('.xml', '.dynetml')
+OUTPUT_EXTENSIONS = {'dynetml': '.xml', 'binary': '.dmlb'}
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst'}
+
+
+def main(argv=None):
+    """
+    Runs the command line tool
+
+    :param list|None argv: The command line arguments; defaults to sys.argv[1:]
+    :returns: The exit status: 0 if every file was converted, and 1 otherwise
+    :rtype: int
+    """
+    parser = get_parser()
+    args = parser.parse_args(argv)
+    if not hasattr(args, 'command_function'):
+        parser.print_usage(sys.stderr)
+        return 2
+    return args.command_function(args)
+
+
+def get_parser():
+    """
+    :returns: The parser for the command line arguments
+    :rtype: :class:`argparse.ArgumentParser`
+    """
+    parser = argparse.ArgumentParser(prog='dynetml2other', description='Convert and inspect DyNetML files.')
+    subparsers = parser.add_subparsers(title='commands')
+
+    convert_parser = subparsers.add_parser('convert', help='convert DyNetML files to another format')
+    convert_parser.add_argument('inputs', nargs='+', help='DyNetML files, globs, or directories of DyNetML files')
+    convert_parser.add_argument('-o', '--output-dir', required=True,
+                                help='the directory to write converted files to; inputs that would share an output '
+                                     'file are not converted')
+    convert_parser.add_argument('-t', '--to', dest='output_format', choices=sorted(OUTPUT_EXTENSIONS),
+                                default='dynetml', help='the format to convert to (default: %(default)s)')
+    convert_parser.add_argument('-f', '--network-format', choices=['dict', 'igraph', 'networkx'], default='dict',
+                                help='the library holding networks while they are converted (default: %(default)s)')
+    convert_parser.add_argument('-z', '--compress', choices=sorted(COMPRESSION_SUFFIXES),
+                                help='compress DyNetML output; not allowed with --to binary')
+    convert_parser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+                                help='the number of worker processes (default: %(default)s)')
+    convert_parser.add_argument('-r', '--recursive', action='store_true',
+                                help='search directories for DyNetML files recursively')
+    convert_parser.set_defaults(command_function=convert_command)
+
+    scan_parser = subparsers.add_parser('scan', help='summarize DyNetML files without loading them')
+    scan_parser.add_argument('inputs', nargs='+', help='DyNetML files, globs, or directories of DyNetML files')
+    scan_parser.add_argument('--json', action='store_true', help='print each summary as a line of JSON')
+    scan_parser.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+                             help='the number of worker processes (default: %(default)s)')
+    scan_parser.add_argument('-r', '--recursive', action='store_true',
+                             help='search directories for DyNetML files recursively')
+    scan_parser.set_defaults(command_function=scan_command)
+
+    return parser
+
+
+def convert_command(args):
+    """
+    Runs the convert command, printing the time taken to convert each file and any errors
+
+    :param argparse.Namespace args: The parsed command line arguments
+    :returns: The exit status
+    :rtype: int
+    """
+    if args.workers < 1:
+        sys.stderr.write('dynetml2other: --workers must be at least 1\n')
+        return 2
+
+    if args.compress is not None and args.output_format != 'dynetml':
+        sys.stderr.write('dynetml2other: --compress only applies to DyNetML output, not --to {0}\n'.format(
+            args.output_format))
+        return 2
+
+    input_paths = expand_input_paths(args.inputs, args.recursive)
+    if len(input_paths) == 0:
+        sys.stderr.write('dynetml2other: no DyNetML files found\n')
+        return 1
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    # Inputs with the same name in different directories, or differing only in compression, would overwrite each
+    # other's output, so none of them are converted
+    inputs_by_output = defaultdict(list)
+    for input_path in input_paths:
+        inputs_by_output[get_output_path(input_path, args.output_dir, args.output_format, args.compress)].append(
+            input_path)
+
+    tasks = []
+    failure_count = 0
+    for input_path in input_paths:
+        output_path = get_output_path(input_path, args.output_dir, args.output_format, args.compress)
+        other_inputs = [path for path in inputs_by_output[output_path] if path != input_path]
+        if len(other_inputs) == 0:
+            tasks.append((input_path, output_path, args.output_format, args.network_format, args.compress))
+        else:
+            failure_count += 1
+            sys.stdout.write('FAILED {0}: {1} would also be written by {2}\n'.format(input_path, output_path,
+                                                                                     ', '.join(other_inputs)))
+
+    start_time = time.time()
+    for input_path, output_path, seconds, error in iter_results(convert_file, tasks, args.workers):
+        if error is None:
+            sys.stdout.write('{0} -> {1} ({2:.2f}s)\n'.format(input_path, output_path, seconds))
+        else:
+            failure_count += 1
+            sys.stdout.write('FAILED {0} ({1:.2f}s): {2}\n'.format(input_path, seconds, error))
+        sys.stdout.flush()
+
+    sys.stdout.write('Converted {0} of {1} files in {2:.2f}s\n'.format(len(input_paths) - failure_count,
+                                                                      len(input_paths), time.time() - start_time))
+    return 1 if failure_count > 0 else 0
+
+
+def scan_command(args):
+    """
+    Runs the scan command, printing a summary of each file and any errors
+
+    :param argparse.Namespace args: The parsed command line arguments
+    :returns: The exit status
+    :rtype: int
+    """
+    if args.workers < 1:
+        sys.stderr.write('dynetml2other: --workers must be at least 1\n')
+        return 2
+
+    if args.compress is not None and args.output_format != 'dynetml':
+        sys.stderr.write('dynetml2other: --compress only applies to DyNetML output, not --to {0}\n'.format(
+            args.output_format))
+        return 2
+
+    input_paths = expand_input_paths(args.inputs, args.recursive)
+    if len(input_paths) == 0:
+        sys.stderr.write('dynetml2other: no DyNetML files found\n')
+        return 1
+
+    failure_count = 0
+    for input_path, summary, seconds, error in iter_results(scan_file, input_paths, args.workers):
+        if error is not None:
+            failure_count += 1
+            if args.json:
+                sys.stdout.write(json.dumps({'path': input_path, 'error': error}, sort_keys=True) + '\n')
+            else:
+                sys.stdout.write('FAILED {0} ({1:.2f}s): {2}\n'.format(input_path, seconds, error))
+        elif args.json:
+            sys.stdout.write(json.dumps(summary.to_dict(), sort_keys=True) + '\n')
+        else:
+            sys.stdout.write(get_summary_text(summary, seconds))
+        sys.stdout.flush()
+
+    return 1 if failure_count > 0 else 0
+
+
+def get_summary_text(summary, seconds):
+    """
+    :param DyNetMLSummary summary: A summary of a DyNetML file
+    :param float seconds: The number of seconds the file took to scan
+    :returns: The summary as indented lines of text
+    :rtype: str
+    """
+    lines = [u'{0} ({1:.2f}s): {2}, {3} meta-networks'.format(summary.path, seconds, summary.root_tag,
+                                                               summary.get_metanetwork_count())]
+    if summary.get_start() is not None:
+        lines.append(u'  from {0} to {1}'.format(summary.get_start(), summary.get_end()))
+    for (nodeclass_key, nodeset_key), node_count in summary.node_counts.items():
+        lines.append(u'  nodeset {0} {1}: {2} nodes'.format(nodeclass_key, nodeset_key, node_count))
+    for network_id, link_count in summary.link_counts.items():
+        lines.append(u'  network {0}: {1} links'.format(network_id, link_count))
+    return (u'\n'.join(lines) + u'\n').encode('utf8')
+
+
+def expand_input_paths(inputs, recursive=False):
+    """
+    :param list inputs: Paths to files or directories, or glob patterns
+    :param bool recursive: If True, directories are searched recursively
+    :returns: The files named by inputs, without duplicates; from directories, only files with a DyNetML extension, \
+    possibly followed by a compression extension, are included
+    :rtype: list
+    """
+    paths = []
+    seen = set()
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            matches = []
+            for dir_path, dir_names, file_names in os.walk(input_path):
+                matches.extend(os.path.join(dir_path, file_name) for file_name in file_names
+                               if _strip_compression_suffix(file_name).lower().endswith(DYNETML_EXTENSIONS))
+                if not recursive:
+                    break
+        else:
+            matches = [path for path in glob.glob(input_path) if os.path.isfile(path)]
+
+        for path in sorted(matches):
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+
+    return paths
+
+
+def get_output_path(input_path, output_dir, output_format, compress=None):
+    """
+    :param str input_path: The path to a DyNetML file
+    :param str output_dir: The directory converted files are written to
+    :param str output_format: The format to convert to; "dynetml" or "binary"
+    :param str|None compress: The compression of DyNetML output
+    :returns: The path the converted file is written to
+    :rtype: str
+    """
+    base_name = os.path.basename(_strip_compression_suffix(input_path))
+    for extension in DYNETML_EXTENSIONS:
+        if base_name.lower().endswith(extension):
+            base_name = base_name[:-len(extension)]
+            break
+
+    output_name = base_name + OUTPUT_EXTENSIONS[output_format]
+    if output_format == 'dynetml' and compress is not None:
+        output_name += COMPRESSION_SUFFIXES[compress]
+    return os.path.join(output_dir, output_name)
+
+
+def iter_results(function, tasks, workers=1):
+    """
+    Processes files, in worker processes if there is more than one worker
+
+    :param function: The function processing a single file, such as :func:`convert_file` or :func:`scan_file`
+    :param list tasks: The argument to function for each file
+    :param int workers: The number of worker processes
+    :returns: The result of each call to function, in the order they finish
+    :rtype: generator of tuple
+    """
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield function(task)
+        return
+
+    pool = multiprocessing.Pool(min(workers, len(tasks)), _init_worker)
+    try:
+        for result in pool.imap_unordered(function, tasks):
+            yield result
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def _init_worker():
+    """Imports the modules every conversion or scan uses, once per worker process"""
+    import DynamicMetaNetwork
+    import DyNetMLSummary
+    import dynetml2other
+    import dynetmlwriter
+
+
+def convert_file(task):
+    """
+    Converts a single DyNetML file
+
+    :param tuple task: The path to a DyNetML file, the path to write the converted file to, the output format, the \
+    network format, and the compression of DyNetML output
+    :returns: The input path, the output path, the number of seconds the conversion took, and an error message, or \
+    None if the conversion succeeded
+    :rtype: :class:`tuple_(str, str, float, str|None)`
+    """
+    from dynetml2other import main as load_dynetml
+
+    input_path, output_path, output_format, network_format, compress = task
+    start_time = time.time()
+    try:
+        network = load_dynetml(input_path, network_format, streaming=True)
+        if network is None:
+            raise ValueError('not a DyNetML file')
+
+        if output_format == 'binary':
+            network.save_binary(output_path)
+        else:
+            network.write_dynetml(output_path, compress=compress)
+    except Exception as e:
+        return input_path, output_path, time.time() - start_time, '{0}: {1}'.format(type(e).__name__, e)
+
+    return input_path, output_path, time.time() - start_time, None
+
+
+def scan_file(input_path):
+    """
+    Summarizes a single DyNetML file
+
+    :param str input_path: The path to a DyNetML file
+    :returns: The input path, the summary, or None if the scan failed, the number of seconds the scan took, and an \
+    error message, or None if the scan succeeded
+    :rtype: :class:`tuple_(str, DyNetMLSummary|None, float, str|None)`
+    """
+    from dynetml2other import scan_dynetml
+
+    start_time = time.time()
+    try:
+        summary = scan_dynetml(input_path)
+    except Exception as e:
+        return input_path, None, time.time() - start_time, '{0}: {1}'.format(type(e).__name__, e)
+
+    return input_path, summary, time.time() - start_time, None
+
+
+def _strip_compression_suffix(path):
+    """:returns: path without any compression extension"""
+    for suffix in COMPRESSION_SUFFIXES.values() + ['.gzip', '.zstd']:
+        if path.lower().endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: dynetmlcompression
+:synopsis: Transparent reading and writing of compressed DyNetML files.
+
+Files compressed with gzip, bz2, or xz can always be read and written; zstd is supported if the zstandard package is \
+installed, and xz needs the lzma module (part of the standard library from Python 3.3, or backports.lzma before it). \
+The compression of a file being read is detected from its first bytes, and the compression of a file being written \
+from its extension. Data is decompressed and compressed a block at a time as it is read or written, so nothing is \
+ever decompressed to a temporary file.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+import bz2
+import zlib
+
+COMPRESSION_MAGIC = [('gzip', b'\x1f\x8b'), ('bz2', b'BZh'), ('xz', b'\xfd7zXZ\x00'), ('zstd', b'\x28\xb5\x2f\xfd')]
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.gzip': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd',
+                          '.zstd': 'zstd'}
+BLOCK_SIZE = 1048576
+
+
+def get_compression(source):
+    """
+    :param str|unicode|file source: A path, or a seekable file-like object opened for reading bytes
+    :returns: The compression of the data, detected from its first bytes: "gzip", "bz2", "xz", "zstd", or None if it \
+    isn't compressed
+    :rtype: str|None
+    """
+    if hasattr(source, 'read'):
+        position = source.tell()
+        header = source.read(6)
+        source.seek(position)
+    else:
+        with open(source, 'rb') as source_file:
+            header = source_file.read(6)
+
+    for compression, magic in COMPRESSION_MAGIC:
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def get_compression_from_extension(path):
+    """
+    :param str|unicode path: A path
+    :returns: The compression implied by the path's extension, or None
+    :rtype: str|None
+    """
+    for extension in COMPRESSION_EXTENSIONS:
+        if path.lower().endswith(extension):
+            return COMPRESSION_EXTENSIONS[extension]
+    return None
+
+
+def open_dynetml(source, mode='rb', compression=None):
+    """
+    Opens a possibly compressed DyNetML file. A file opened for reading is decompressed as it is read, and a file \
+    opened for writing is compressed as it is written; closing the returned file closes source only if source is a \
+    path.
+
+    :param str|unicode|file source: A path, or a file-like object opened for reading or writing bytes
+    :param str mode: "rb" to read or "wb" to write
+    :param str|None compression: "gzip", "bz2", "xz", "zstd", or None. When reading, None means the compression is \
+    detected from the data, which requires a file-like source to be seekable; when writing, None means the \
+    compression is taken from the path's extension.
+    :returns: A file-like object
+    :raises ValueError: if the compression isn't supported
+    """
+    if mode not in ('rb', 'wb'):
+        raise ValueError('mode must be "rb" or "wb"; got {0}'.format(mode))
+    if compression is not None and compression not in COMPRESSION_EXTENSIONS.values():
+        raise ValueError('compression must be "gzip", "bz2", "xz", "zstd", or None; got {0}'.format(compression))
+
+    is_path = not hasattr(source, 'read' if mode == 'rb' else 'write')
+    if compression is None:
+        if mode == 'wb':
+            compression = get_compression_from_extension(source) if is_path else None
+        elif not is_path and not hasattr(source, 'seek'):
+            compression = None
+        else:
+            compression = get_compression(source)
+
+    if compression is None:
+        return open(source, mode) if is_path else source
+
+    raw_file = open(source, mode) if is_path else source
+    if mode == 'rb':
+        return DecompressingReader(raw_file, lambda: _get_decompressor(compression), is_path)
+    return CompressingWriter(raw_file, _get_compressor(compression), is_path)
+
+
+def _get_decompressor(compression):
+    """:returns: A new decompression object for data with this compression"""
+    if compression == 'gzip':
+        return zlib.decompressobj(16 + zlib.MAX_WBITS)
+    elif compression == 'bz2':
+        return bz2.BZ2Decompressor()
+    elif compression == 'xz':
+        return _import_lzma().LZMADecompressor()
+    return _import_zstandard().ZstdDecompressor().decompressobj()
+
+
+def _get_compressor(compression):
+    """:returns: A new compression object for this compression"""
+    if compression == 'gzip':
+        return zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif compression == 'bz2':
+        return bz2.BZ2Compressor()
+    elif compression == 'xz':
+        return _import_lzma().LZMACompressor()
+    return _import_zstandard().ZstdCompressor().compressobj()
+
+
+def _import_lzma():
+    """:returns: The lzma module"""
+    try:
+        import lzma
+    except ImportError:
+        try:
+            from backports import lzma
+        except ImportError:
+            raise ValueError('xz compression needs the lzma module; install backports.lzma')
+    return lzma
+
+
+def _import_zstandard():
+    """:returns: The zstandard module"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError('zstd compression needs the zstandard package')
+    return zstandard
+
+
+class DecompressingReader(object):
+    """
+    A read-only file that decompresses another file a block at a time. Concatenated compressed streams, such as the \
+    members of a gzip file, are read one after another. Seeking is only supported forward, by reading.
+    """
+    def __init__(self, raw_file, decompressor_factory, close_raw_file=True):
+        """
+        :param file raw_file: The compressed file, opened for reading bytes
+        :param decompressor_factory: A function returning a new decompression object
+        :param bool close_raw_file: If True, raw_file is closed when this file is
+        """
+        self._raw_file = raw_file
+        self._decompressor_factory = decompressor_factory
+        self._decompressor = decompressor_factory()
+        self._close_raw_file = close_raw_file
+        self._buffer = b''
+        self._buffer_offset = 0
+        self._position = 0
+        self._is_eof = False
+
+    def read(self, size=-1):
+        """
+        :param int size: The largest number of bytes to read, or -1 to read to the end
+        :returns: Decompressed bytes; an empty string only at the end of the file
+        :rtype: str
+        """
+        while (size < 0 or len(self._buffer) - self._buffer_offset < size) and not self._is_eof:
+            self._fill_buffer()
+
+        end = len(self._buffer) if size < 0 else min(len(self._buffer), self._buffer_offset + size)
+        data = self._buffer[self._buffer_offset:end]
+        self._buffer_offset = end
+        self._position += len(data)
+        return data
+
+    def _fill_buffer(self):
+        """Decompresses the next block of the raw file"""
+        pieces = [self._buffer[self._buffer_offset:]]
+        self._buffer_offset = 0
+
+        chunk = self._raw_file.read(BLOCK_SIZE)
+        if not chunk:
+            if hasattr(self._decompressor, 'flush'):
+                pieces.append(self._decompressor.flush())
+            self._is_eof = True
+
+        while chunk:
+            # A stream can end exactly at the end of a block, in which case the next block starts a new stream
+            if getattr(self._decompressor, 'eof', False):
+                self._decompressor = self._decompressor_factory()
+            try:
+                pieces.append(self._decompressor.decompress(chunk))
+            except EOFError:
+                # Decompressors without an eof attribute only report the end of their stream when given more data
+                self._decompressor = self._decompressor_factory()
+                continue
+            # Whatever follows the end of one compressed stream is the start of the next
+            chunk = getattr(self._decompressor, 'unused_data', b'')
+            if chunk:
+                self._decompressor = self._decompressor_factory()
+
+        self._buffer = b''.join(pieces)
+
+    def tell(self):
+        """:returns: The offset in the decompressed data"""
+        return self._position
+
+    def seek(self, offset, whence=0):
+        """
+        :param int offset: An offset in the decompressed data at or after the current position
+        :param int whence: Must be 0
+        """
+        if whence != 0 or offset < self._position:
+            raise IOError('compressed files can only be seeked forward')
+        while self._position < offset and self.read(min(BLOCK_SIZE, offset - self._position)):
+            pass
+        return self._position
+
+    def close(self):
+        if self._close_raw_file:
+            self._raw_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class CompressingWriter(object):
+    """A write-only file that compresses everything written to it into another file"""
+    def __init__(self, raw_file, compressor, close_raw_file=True):
+        """
+        :param file raw_file: The file to write compressed data to, opened for writing bytes
+        :param compressor: A compression object
+        :param bool close_raw_file: If True, raw_file is closed when this file is
+        """
+        self._raw_file = raw_file
+        self._compressor = compressor
+        self._close_raw_file = close_raw_file
+        self._is_closed = False
+
+    def write(self, data):
+        """:param str data: Bytes to be compressed and written"""
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self._raw_file.write(compressed)
+
+    def flush(self):
+        self._raw_file.flush()
+
+    def close(self):
+        """Writes the end of the compressed stream"""
+        if self._is_closed:
+            return
+        self._is_closed = True
+        self._raw_file.write(self._compressor.flush())
+        if self._close_raw_file:
+            self._raw_file.close()
+        else:
+            self._raw_file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -3,25 +3,51 @@
 
 __author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
 
+import codecs
 from collections import defaultdict
 from datetime import datetime
+from dynetmlcompression import get_compression, open_dynetml
+from dynetmlrecords import Node, Nodeset
 from lxml import etree
+import re
+
+DATE_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2}) ([0-9]{2}):([0-9]{2}):([0-9]{2})\Z')
+BOOL_VALUES = {'true': True, 'false': False}
+TIMESTAMP_PATTERN = re.compile(r'([0-9]{4})([0-9]{2})([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})\Z')
+TIMESTAMP_CACHE_SIZE = 65536
+ENCODING_BOMS = ((codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'), (codecs.BOM_UTF8, 'utf-8'),
+                 (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+ENCODING_HEAD_SIZE = 1024
+XML_DECLARATION_PATTERN = re.compile(br'<\?xml[^>]*?\sencoding\s*=\s*["\']([A-Za-z][A-Za-z0-9._-]*)["\']')
+
+_timestamp_cache = {}
+_fragment_parsers = {}
+
+# The markup scan_metanetworks looks for: the opening and closing tags of meta-networks, and the beginnings of the
+# sections that are skipped whole along with the text that ends them
+_SCAN_PATTERN = re.compile(br'<(/?MetaNetwork(?=[\s/>])|!--|!\[CDATA\[|\?)')
+_SCAN_LOOKBACK = len(b'</MetaNetwork')
+_SKIPPED_SECTIONS = {b'!--': b'-->', b'![CDATA[': b']]>', b'?': b'?>'}
+# The markup split_networks looks for in the text of a meta-network
+_NETWORK_SCAN_PATTERN = re.compile(br'<(/?network(?=[\s/>])|!--|!\[CDATA\[|\?)')
+# A whole tag, whose attribute values may contain >
+_TAG_PATTERN = re.compile(br'<[^>"\']*(?:(?:"[^"]*"|\'[^\']*\')[^>"\']*)*>')
 
 
 def node_tuple():
     """
-    :returns: The tuple that defines a node
-    :rtype: :class:`tuple_(dict, dict)`
+    :returns: An empty node; node[0] holds its attributes and node[1] its properties
+    :rtype: :class:`dynetmlrecords.Node`
     """
-    return {}, {}  # attrs, properties
+    return Node()
 
 
 def nodeset_tuple():
     """
-    :returns: The tuple that defines a nodeset
-    :rtype: :class:`tuple_(dict, defaultdict(node_tuple))`
+    :returns: An empty nodeset; nodeset[0] holds its property identities and nodeset[1] its nodes
+    :rtype: :class:`dynetmlrecords.Nodeset`
     """
-    return {}, defaultdict(node_tuple)  # property identities, list of nodes
+    return Nodeset()
 
 
 def nodeclass_dict():
@@ -37,7 +63,301 @@ def node_tree():
     :returns: The default dict that define
     :rtype: :class:`defaultdict(nodeclass_dict)`
     """
-    return defaultdict(nodeclass_dict())  # node tree
+    return defaultdict(nodeclass_dict)  # node tree
+
+
+def get_root_tag(source):
+    """
+    Reads the opening root tag of an XML file without parsing the rest of the file. The file may be compressed.
+
+    :param str|unicode|file source: a path to an XML file, or a file-like object containing one
+    :returns: the root tag, with its attributes but without any children
+    :rtype: :class:`lxml._Element`
+    """
+    dynetml_file = open_dynetml(source)
+    try:
+        for event, elem in etree.iterparse(dynetml_file, events=('start',)):
+            return elem
+    finally:
+        if dynetml_file is not source:
+            dynetml_file.close()
+
+
+def iterparse_metanetworks(source):
+    """
+    Incrementally parses a DyNetML file and yields each <MetaNetwork> tag as soon as its end tag has been read. Once \
+    the caller is finished with a tag it is cleared and removed from the document along with any earlier siblings, \
+    so only a single meta-network is held in memory at a time. The file may be compressed.
+
+    :param str|unicode|file source: a path to a DyNetML file, or a file-like object containing one
+    :returns: the root tag of the file and the tag of each meta-network, in document order
+    :rtype: generator of :class:`tuple_(lxml._Element, lxml._Element)`
+    """
+    root_tag = None
+    dynetml_file = open_dynetml(source)
+    try:
+        for event, elem in etree.iterparse(dynetml_file, events=('start', 'end'), huge_tree=True,
+                                           tag=('DynamicMetaNetwork', 'DynamicNetwork', 'MetaNetwork')):
+            if event == 'start':
+                if root_tag is None:
+                    root_tag = elem
+                continue
+
+            if elem.tag != 'MetaNetwork':
+                continue
+
+            yield root_tag, elem
+
+            elem.clear()
+            parent = elem.getparent()
+            if parent is not None:
+                while elem.getprevious() is not None:
+                    del parent[0]
+    finally:
+        if dynetml_file is not source:
+            dynetml_file.close()
+
+
+def get_encoding(source):
+    """
+    Reads the encoding of an XML file from its byte order mark or XML declaration. The file may be compressed.
+
+    :param str|unicode|file source: a path to an XML file, or a file-like object containing one
+    :returns: the name of the encoding, or "utf-8" if the file doesn't declare one
+    :rtype: str
+    """
+    dynetml_file = open_dynetml(source)
+    try:
+        return _detect_encoding(dynetml_file.read(ENCODING_HEAD_SIZE))
+    finally:
+        if dynetml_file is not source:
+            dynetml_file.close()
+
+
+def can_scan_encoding(encoding):
+    """
+    :param str encoding: the name of the encoding of an XML file
+    :returns: True if the markup of a file in this encoding can be found by :func:`scan_metanetworks`, which looks \
+    for its ASCII bytes; False for encodings such as UTF-16
+    :rtype: bool
+    """
+    try:
+        return u'<MetaNetwork>'.encode(encoding) == b'<MetaNetwork>'
+    except LookupError:
+        return False
+
+
+def parse_fragment(text, encoding='utf-8'):
+    """
+    Parses an element cut out of the middle of an XML file, such as the text of a <MetaNetwork> returned by \
+    :func:`scan_metanetworks`. The element doesn't carry the file's XML declaration, so the encoding it declared is \
+    passed in instead.
+
+    :param str text: the text of the element
+    :param str encoding: the encoding of the file, as returned by :func:`get_encoding`
+    :returns: the element
+    :rtype: :class:`lxml._Element`
+    """
+    parser = _fragment_parsers.get(encoding)
+    if parser is None:
+        parser = _fragment_parsers[encoding] = etree.XMLParser(encoding=encoding, huge_tree=True)
+    return etree.fromstring(text, parser)
+
+
+def scan_metanetworks(source, inclusion_test=None, offset=0, chunk_size=1048576, encoding=None):
+    """
+    Scans the raw bytes of a DyNetML file for <MetaNetwork> elements without parsing them. Only the opening tag of each \
+    meta-network is examined: if inclusion_test accepts the meta-network's id its text is collected, and otherwise the \
+    rest of the element is skipped over without being kept or parsed. Comments, CDATA sections, processing \
+    instructions, and quoted attribute values are skipped as a whole, so markup inside them is never mistaken for a tag.
+
+    :param file source: a DyNetML file opened in binary mode
+    :param lambda inclusion_test: Test for whether a meta-network should be collected, given its id. Defaults to \
+    collecting all meta-networks.
+    :param int offset: the offset in the file of the current position of source
+    :param int chunk_size: the number of bytes read from source at a time
+    :param str|None encoding: the encoding of the file, as returned by :func:`get_encoding`. If None, it is read from \
+    the beginning of the file when offset is 0, and is otherwise taken to be UTF-8.
+    :returns: the id of each meta-network, the offsets at which its element starts and ends, and the text of the \
+    element, or None if it was skipped. Text is left in the file's encoding; see :func:`parse_fragment`.
+    :rtype: generator of :class:`tuple_(str, int, int, str|None)`
+    :raises ValueError: if the file's encoding can't be scanned; see :func:`can_scan_encoding`
+    """
+    if inclusion_test is None:
+        inclusion_test = lambda x: True
+
+    buf = b''
+    if encoding is None:
+        if offset == 0:
+            buf = source.read(ENCODING_HEAD_SIZE)
+            encoding = _detect_encoding(buf)
+        else:
+            encoding = 'utf-8'
+    if not can_scan_encoding(encoding):
+        raise ValueError('DyNetML files encoded as {0} can\'t be scanned'.format(encoding))
+
+    buf_offset = offset
+    pos = 0
+    skip_to = None  # the end of the comment, CDATA section, or processing instruction being skipped
+    metanetwork = None  # the id, offset, and inclusion of the meta-network being scanned
+    pieces = []
+    segment_start = 0
+    while True:
+        if skip_to is not None:
+            skip_end = buf.find(skip_to, pos)
+            if skip_end != -1:
+                pos = skip_end + len(skip_to)
+                skip_to = None
+                continue
+            # Only keep the bytes that could hold the beginning of the end of the section
+            keep_from = max(pos, len(buf) - len(skip_to) + 1)
+        else:
+            match = _SCAN_PATTERN.search(buf, pos)
+            if match is None:
+                keep_from = max(pos, len(buf) - _SCAN_LOOKBACK)
+            elif match.group(1) in _SKIPPED_SECTIONS:
+                skip_to = _SKIPPED_SECTIONS[match.group(1)]
+                pos = match.end()
+                continue
+            else:
+                tag_match = _TAG_PATTERN.match(buf, match.start())
+                if tag_match is None:
+                    # The rest of the tag hasn't been read yet
+                    keep_from = match.start()
+                elif match.group(1).startswith(b'/'):
+                    pos = tag_match.end()
+                    if metanetwork is not None:
+                        mn_id, mn_offset, include = metanetwork
+                        mn_text = None
+                        if include:
+                            pieces.append(buf[segment_start:pos])
+                            mn_text = b''.join(pieces)
+                        yield mn_id, mn_offset, buf_offset + pos, mn_text
+                        metanetwork = None
+                    continue
+                else:
+                    pos = tag_match.end()
+                    if metanetwork is not None:
+                        raise ValueError('<MetaNetwork> found inside another <MetaNetwork> at offset {0}'.format(
+                            buf_offset + match.start()))
+
+                    opening = tag_match.group()
+                    is_empty = opening.endswith(b'/>')
+                    mn_id = parse_fragment(opening if is_empty else opening + b'</MetaNetwork>',
+                                           encoding).attrib['id']
+                    include = inclusion_test(mn_id)
+                    if is_empty:
+                        yield mn_id, buf_offset + match.start(), buf_offset + pos, opening if include else None
+                    else:
+                        metanetwork = (mn_id, buf_offset + match.start(), include)
+                        pieces = []
+                        segment_start = match.start()
+                    continue
+
+        chunk = source.read(chunk_size)
+        if not chunk:
+            # A <MetaNetwork> that hasn't been closed yet is left for a later scan
+            return
+        if metanetwork is not None and metanetwork[2]:
+            pieces.append(buf[segment_start:keep_from])
+            segment_start = 0
+        buf_offset += keep_from
+        buf = buf[keep_from:] + chunk
+        pos = max(pos - keep_from, 0)
+
+
+def split_networks(mn_text):
+    """
+    Cuts the links out of the text of a <MetaNetwork> element without parsing them, so that the rest of the \
+    meta-network can be parsed on its own. Like :func:`scan_metanetworks`, this only looks for tags in the raw bytes, \
+    skipping over comments, CDATA sections, and processing instructions.
+
+    :param str mn_text: the text of a <MetaNetwork> element, in an encoding accepted by :func:`can_scan_encoding`
+    :returns: mn_text with each <network> element emptied, leaving only its opening tag, and the offsets in mn_text \
+    at which each <network> element starts and ends, in document order
+    :rtype: :class:`tuple_(str, list)`
+    :raises ValueError: if a <network> tag is cut off or isn't closed
+    """
+    pieces = []
+    spans = []
+    network_start = None
+    segment_start = 0
+    pos = 0
+    while True:
+        match = _NETWORK_SCAN_PATTERN.search(mn_text, pos)
+        if match is None:
+            break
+        if match.group(1) in _SKIPPED_SECTIONS:
+            skip_to = _SKIPPED_SECTIONS[match.group(1)]
+            skip_end = mn_text.find(skip_to, match.end())
+            if skip_end == -1:
+                break
+            pos = skip_end + len(skip_to)
+            continue
+
+        tag_match = _TAG_PATTERN.match(mn_text, match.start())
+        if tag_match is None:
+            raise ValueError('<network> tag cut off at offset {0}'.format(match.start()))
+        pos = tag_match.end()
+        if match.group(1).startswith(b'/'):
+            if network_start is not None:
+                spans.append((network_start, pos))
+                network_start = None
+                segment_start = pos
+        elif tag_match.group().endswith(b'/>'):
+            spans.append((match.start(), pos))
+        elif network_start is None:
+            # The opening tag is kept, closed as an empty element, and everything up to its closing tag is dropped
+            pieces.append(mn_text[segment_start:pos - 1])
+            pieces.append(b'/>')
+            network_start = match.start()
+
+    if network_start is not None:
+        raise ValueError('<network> at offset {0} isn\'t closed'.format(network_start))
+    pieces.append(mn_text[segment_start:])
+    return b''.join(pieces), spans
+
+
+def _detect_encoding(head):
+    """
+    :param str head: the first bytes of an XML file
+    :returns: the encoding given by the file's byte order mark or XML declaration, or "utf-8" if there is neither
+    :rtype: str
+    """
+    for bom, bom_encoding in ENCODING_BOMS:
+        if head.startswith(bom):
+            return bom_encoding
+
+    match = XML_DECLARATION_PATTERN.match(head)
+    return match.group(1).decode('ascii').lower() if match is not None else 'utf-8'
+
+
+def parse_timestamp(mn_id):
+    """
+    Parses the id of a meta-network, formatted as a '%Y%m%dT%H:%M:%S' timestamp. Ids in exactly that form are split up \
+    by a fixed-width parser rather than strptime, and each distinct id is only parsed once.
+
+    :param str|unicode mn_id: The id of a meta-network
+    :returns: The datetime in the id
+    :rtype: datetime.datetime
+    :raises ValueError: if mn_id isn't a timestamp
+    """
+    mn_date = _timestamp_cache.get(mn_id)
+    if mn_date is not None:
+        return mn_date
+
+    match = TIMESTAMP_PATTERN.match(mn_id)
+    try:
+        mn_date = datetime(*[int(field) for field in match.groups()]) if match is not None else None
+    except ValueError:
+        mn_date = None
+    if mn_date is None:
+        mn_date = datetime.strptime(mn_id, '%Y%m%dT%H:%M:%S')
+
+    if len(_timestamp_cache) >= TIMESTAMP_CACHE_SIZE:
+        _timestamp_cache.clear()
+    _timestamp_cache[mn_id] = mn_date
+    return mn_date
 
 
 def check_key(var, var_name, used_map, map_name, check_if_in_map=True):
@@ -142,6 +462,79 @@ def format_prop(prop_str, prop_type=str()):
     return prop_str  # 'text', 'categoryText', and 'URI' caught here
 
 
+def format_prop_column(prop_strs, prop_type=str(), as_array=False):
+    """
+    Converts a whole column of property values at once. The results are the same as calling :func:`format_prop` on \
+    each value, but "number" and "date" columns are parsed in a single pass by NumPy (when it is available), dates \
+    in the standard '%Y-%m-%d %H:%M:%S' form are otherwise split up by a fixed-format parser instead of strptime, and \
+    bools are looked up in a table. Any value the fast paths can't handle is passed to :func:`format_prop`, so malformed \
+    values raise the same errors they always have.
+
+    :param list prop_strs: the properties to be converted
+    :param str|unicode prop_type: str or unicode specifying the type of the properties
+    :param bool as_array: If True, "number" and "date" columns parsed by NumPy are returned as NumPy arrays of \
+    float64 and datetime64[s] values, which :meth:`PropertyTable.PropertyTable.set_values` stores without creating \
+    a Python object per value
+    :returns: the property values, converted to the appropriate type
+    :rtype: list|numpy.ndarray
+    """
+    if not isinstance(prop_type, (unicode, str)):
+        raise TypeError('prop_type must be unicode or str')
+
+    if prop_type == 'number':
+        try:
+            import numpy
+            values = numpy.array(prop_strs, dtype=object).astype(numpy.float64)
+            return values if as_array else values.tolist()
+        except (ImportError, ValueError, TypeError):
+            return [format_prop(prop_str, prop_type) for prop_str in prop_strs]
+
+    elif prop_type == 'date':
+        try:
+            import numpy
+            prop_array = numpy.array(prop_strs)
+            # Only values as long as the standard form are given to NumPy, so that one value in another form doesn't
+            # stop the rest from being parsed together
+            is_parsed = numpy.char.str_len(prop_array) == len('0000-00-00 00:00:00')
+            dates = numpy.zeros(len(prop_array), dtype='datetime64[s]')
+            dates[is_parsed] = prop_array[is_parsed].astype('datetime64[s]')
+            # NumPy also accepts dates format_prop doesn't, such as ones with a 'T' before the time, so only values
+            # that format back to themselves are taken from it
+            is_parsed &= (numpy.char.replace(numpy.datetime_as_string(dates, unit='s'), 'T', ' ') == prop_array) & \
+                (dates >= numpy.datetime64('0001-01-01T00:00:00'))
+        except (ImportError, ValueError, TypeError):
+            dates = None
+        if dates is not None:
+            for i in numpy.flatnonzero(~is_parsed):
+                dates[i] = format_prop(prop_strs[i], prop_type)
+            return dates if as_array else dates.tolist()
+
+        dates = {}
+        values = []
+        for prop_str in prop_strs:
+            value = dates.get(prop_str)
+            if value is None:
+                match = DATE_PATTERN.match(prop_str)
+                try:
+                    value = datetime(*[int(field) for field in match.groups()]) if match is not None else None
+                except ValueError:
+                    value = None
+                if value is None:
+                    value = format_prop(prop_str, prop_type)
+                dates[prop_str] = value
+            values.append(value)
+        return values
+
+    elif prop_type == 'bool':
+        values = []
+        for prop_str in prop_strs:
+            value = BOOL_VALUES.get(prop_str.lower())
+            values.append(value if value is not None else format_prop(prop_str, prop_type))
+        return values
+
+    return list(prop_strs)  # 'text', 'categoryText', and 'URI' caught here
+
+
 def unformat_prop(prop):
     """
     A method for un-formatting properties back to strings. Currently covers dates and bools.
@@ -256,34 +649,117 @@ def get_properties_tag(properties_dict):
     return properties_tag
 
 
-def get_nodeset_tuple(nodeclass_tag, property_inclusion_test=None):
+def get_network_attributes(network_tag):
+    """
+    :param lxml._Element network_tag: An lxml._Element extracted from a <network> tag in a DyNetML file
+    :returns: A dictionary of the attributes that define the network
+    :rtype: dict
+    """
+    return {'sourceType': network_tag.attrib['sourceType'],
+            'source': network_tag.attrib['source'],
+            'targetType': network_tag.attrib['targetType'],
+            'target': network_tag.attrib['target'],
+            'id': network_tag.attrib['id'],
+            'isDirected': network_tag.attrib['isDirected'] == 'true',
+            'allowSelfLoops': network_tag.attrib['allowSelfLoops'] == 'true',
+            'isBinary': network_tag.attrib['isBinary'] == 'true'}
+
+
+def get_link_columns(network_tag, symbol_table=None):
+    """
+    Reads the <link> tags in a <network> tag into three parallel lists. Links without a value are given a value of 1.0.
+
+    :param lxml._Element network_tag: An lxml._Element extracted from a <network> tag in a DyNetML file
+    :param SymbolTable symbol_table: If set, node ids are interned in this table
+    :returns: The sources, targets, and values of the network's links
+    :rtype: :class:`tuple_(list, list, list)`
+    """
+    sources = []
+    targets = []
+    values = []
+    for link in network_tag.iterfind('link'):
+        sources.append(link.attrib['source'])
+        targets.append(link.attrib['target'])
+        values.append(float(link.attrib['value']) if 'value' in link.attrib else 1.0)
+
+    if symbol_table is not None:
+        sources = symbol_table.intern_all(sources)
+        targets = symbol_table.intern_all(targets)
+
+    return sources, targets, values
+
+
+def get_sparse_matrix(sources, targets, values, row_labels, col_labels, is_symmetric=False, sparse_format='csr'):
+    """
+    Builds a sparse matrix from the columns of a network's links without looping over the links in Python
+
+    :param list sources: The source of each link
+    :param list targets: The target of each link
+    :param list values: The value of each link
+    :param numpy.ndarray row_labels: The sorted labels of the rows; every source must be among them
+    :param numpy.ndarray col_labels: The sorted labels of the columns; every target must be among them
+    :param bool is_symmetric: If True, every link is also added in the opposite direction
+    :param str sparse_format: The format of the matrix; "csr", "csc", or "coo"
+    :returns: A matrix in which entry [i, j] holds the summed values of the links from row_labels[i] to col_labels[j]
+    :rtype: :class:`scipy.sparse.spmatrix`
+    """
+    import numpy
+    from scipy import sparse
+
+    rows = numpy.searchsorted(row_labels, numpy.array(sources, dtype=row_labels.dtype))
+    cols = numpy.searchsorted(col_labels, numpy.array(targets, dtype=col_labels.dtype))
+    data = numpy.array(values, dtype=numpy.float64)
+
+    if is_symmetric:
+        off_diagonal = rows != cols
+        rows, cols, data = numpy.concatenate((rows, cols[off_diagonal])), \
+            numpy.concatenate((cols, rows[off_diagonal])), numpy.concatenate((data, data[off_diagonal]))
+
+    matrix = sparse.coo_matrix((data, (rows, cols)), shape=(len(row_labels), len(col_labels)))
+    return matrix.asformat(sparse_format)
+
+
+def get_nodeset_tuple(nodeclass_tag, property_inclusion_test=None, symbol_table=None):
     """
     :param nodeclass_tag: An lxml._Element extracted from the <nodeclass> tag in a DyNetML file
     :param lambda property_inclusion_test: Test for whether a node property should be included
-    :returns: :class:`dict`, :class:`Collections.defaultdict(node_tuple)`
+    :param SymbolTable symbol_table: If set, node ids are interned in this table
+    :returns: The nodeset, which unpacks to its property identities and a dictionary of its nodes
+    :rtype: :class:`dynetmlrecords.Nodeset`
     """
     if property_inclusion_test is None:
         property_inclusion_test = lambda x: True
 
     p_i_dict = get_property_identities_dict(nodeclass_tag.find('propertyIdentities'), property_inclusion_test)
-    node_tuples = defaultdict(node_tuple)
+    nodeset = Nodeset(p_i_dict)
 
+    # Raw property values are collected by property, and each property is converted as a column once all are read
+    prop_columns = defaultdict(lambda: ([], []))
     for node in nodeclass_tag.iterfind('node'):
-        for attrib_key in node.attrib:
-            node_tuples[node.attrib['id']][0][attrib_key] = format_prop(node.attrib[attrib_key])
-        for prop in node.iterfind('property'):
+        node_id = node.attrib['id'] if symbol_table is None else symbol_table.intern(node.attrib['id'])
+        # Attributes have no type, so format_prop would return them unchanged
+        attributes = dict(node.attrib)
+        attributes['id'] = node_id
+        nodeset.add_node(node_id, attributes)
+        for prop in node.iterfind('.//property'):
             if property_inclusion_test(prop.attrib['id']):
-                node_tuples[node.attrib['id']][1][prop.attrib['id']] = \
-                    format_prop(prop.attrib['value'], p_i_dict[prop.attrib['id']][0])
+                node_ids, prop_strs = prop_columns[prop.attrib['id']]
+                node_ids.append(node_id)
+                prop_strs.append(prop.attrib['value'])
+
+    for prop_id in prop_columns:
+        node_ids, prop_strs = prop_columns[prop_id]
+        nodeset.set_property_values(prop_id, node_ids, format_prop_column(prop_strs, p_i_dict[prop_id][0], True))
 
-    return p_i_dict, node_tuples
+    return nodeset
 
 
-def get_nodeclass_dict(nodes_tag, prop_inclusion_test=None, nodeclass_inclusion_test=None):
+def get_nodeclass_dict(nodes_tag, prop_inclusion_test=None, nodeclass_inclusion_test=None, symbol_table=None):
     """
     :param lxml._Element nodes_tag: An lxml._Element extracted from the  <nodes> tag in a DynetML file
     :param lambda prop_inclusion_test: Test for whether a node property should be included
     :param lambda nodeclass_inclusion_test: Test for whether a nodeclass should be included
+    :param SymbolTable symbol_table: If set, node ids are interned in this table
     :returns: A dictionary defining a nodeclass
     :rtype: :class:`Collections.defaultdict(dict)`
     """
@@ -294,6 +770,7 @@ def get_nodeclass_dict(nodes_tag, prop_inclusion_test=None, nodeclass_inclusion_
     for nc_tag in nodes_tag.iterfind('nodeclass'):
         if not nodeclass_inclusion_test(nc_tag.attrib['id']):
             continue
-        new_nodeclass_dict[nc_tag.attrib['type']][nc_tag.attrib['id']] = get_nodeset_tuple(nc_tag, prop_inclusion_test)
+        new_nodeclass_dict[nc_tag.attrib['type']][nc_tag.attrib['id']] = \
+            get_nodeset_tuple(nc_tag, prop_inclusion_test, symbol_table)
 
     return new_nodeclass_dict
@@ -1,6 +1,17 @@
 from dynetmlparsingutils import node_tuple
 from dynetmlparsingutils import nodeset_tuple
 from dynetmlparsingutils import nodeclass_dict
+from dynetmlparsingutils import node_tree
+
+from dynetmlparsingutils import get_compression
+from dynetmlparsingutils import open_dynetml
+from dynetmlparsingutils import get_root_tag
+from dynetmlparsingutils import iterparse_metanetworks
+from dynetmlparsingutils import get_encoding
+from dynetmlparsingutils import can_scan_encoding
+from dynetmlparsingutils import parse_fragment
+from dynetmlparsingutils import scan_metanetworks
+from dynetmlparsingutils import parse_timestamp
 
 from dynetmlparsingutils import check_key
 from dynetmlparsingutils import check_type
@@ -8,6 +19,7 @@ from dynetmlparsingutils import check_contained_types
 from dynetmlparsingutils import validate_and_get_inclusion_test
 
 from dynetmlparsingutils import format_prop
+from dynetmlparsingutils import format_prop_column
 from dynetmlparsingutils import unformat_prop
 
 from dynetmlparsingutils import get_property_identities_dict
@@ -15,5 +27,9 @@ from dynetmlparsingutils import get_property_identities_tag
 
 from dynetmlparsingutils import get_properties_tag
 
+from dynetmlparsingutils import get_network_attributes
+from dynetmlparsingutils import get_link_columns
+from dynetmlparsingutils import get_sparse_matrix
+
 from dynetmlparsingutils import get_nodeset_tuple
 from dynetmlparsingutils import get_nodeclass_dict
\ No newline at end of file
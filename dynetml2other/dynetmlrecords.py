@@ -0,0 +1,315 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: dynetmlrecords
+:synopsis: Compact record types for the nodes, nodesets and networks of a meta-network.
+
+Each record declares __slots__, so it carries no per-instance dictionary. For backward compatibility, nodes and \
+nodesets can still be indexed like the tuples they replace: node[0] is a node's attributes and node[1] its properties, \
+while nodeset[0] is a nodeset's property identities and nodeset[1] its nodes. The properties of the nodes in a \
+nodeset are stored in columns rather than in a dictionary per node.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+from PropertyTable import PropertyRow, PropertyTable
+
+
+class Node(object):
+    """
+    A node in a nodeset. The properties of a node that belongs to a nodeset are kept in a row of the nodeset's \
+    :class:`PropertyTable.PropertyTable`, and node.properties is a mapping that reads and writes that row. A node that \
+    isn't part of a nodeset's table only gets a dictionary of properties once it has a property.
+
+    :ivar attributes: A dictionary of the node's attributes, such as its id and title
+    """
+    __slots__ = ('attributes', '_properties', '_table', '_row')
+
+    def __init__(self, attributes=None, properties=None, table=None, row=None):
+        """
+        :param dict|None attributes: The node's attributes
+        :param dict|None properties: The node's properties
+        :param PropertyTable|None table: The property table of the nodeset containing the node
+        :param int|None row: The index of the node's row in table
+        """
+        self.attributes = attributes if attributes is not None else {}
+        self._properties = None
+        self._table = table
+        self._row = row
+        if properties:
+            self.properties.update(properties)
+
+    @property
+    def properties(self):
+        """A mapping of the node's properties to their values"""
+        if self._table is not None:
+            return PropertyRow(self._table, self._row)
+        if self._properties is None:
+            self._properties = {}
+        return self._properties
+
+    def has_properties(self):
+        """:returns: True if the node has at least one property"""
+        if self._table is not None:
+            return self._table.has_values(self._row)
+        return bool(self._properties)
+
+    def iter_properties(self):
+        """:returns: The ids and values of the node's properties, without allocating a dictionary for them"""
+        if self._table is not None:
+            return self._table.iter_row(self._row)
+        return iter(self._properties.items()) if self._properties else iter(())
+
+    def __getitem__(self, i):
+        return (self.attributes, self.properties)[i]
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.attributes
+        yield self.properties
+
+    def __eq__(self, other):
+        if isinstance(other, Node):
+            return self.attributes == other.attributes and \
+                dict(self.iter_properties()) == dict(other.iter_properties())
+        if isinstance(other, tuple):
+            return (self.attributes, dict(self.iter_properties())) == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return 'Node({0!r}, {1!r})'.format(self.attributes, dict(self.iter_properties()))
+
+    def __getstate__(self):
+        return self.attributes, self._properties, self._table, self._row
+
+    def __setstate__(self, state):
+        self.attributes, self._properties, self._table, self._row = state
+
+
+class Nodeset(object):
+    """
+    A nodeset, containing nodes of a single nodeclass. The properties of its nodes are stored in columns in a \
+    :class:`PropertyTable.PropertyTable`.
+
+    :ivar nodes: A dictionary of the :class:`Node` records in the nodeset, keyed on node id
+    :ivar property_table: The table holding the properties of the nodes
+    """
+    __slots__ = ('nodes', 'property_table')
+
+    def __init__(self, property_identities=None, nodes=None):
+        """
+        :param dict|None property_identities: The property identities of the nodeset
+        :param dict|None nodes: The nodes of the nodeset. Nodes that aren't part of the nodeset's property table are \
+        added to it.
+        """
+        self.property_table = PropertyTable(property_identities)
+        self.nodes = {}
+        if nodes:
+            for node_id in nodes:
+                node = nodes[node_id]
+                if not isinstance(node, Node):
+                    node = Node(*node)
+                if node._table is self.property_table:
+                    self.nodes[node_id] = node
+                else:
+                    self.add_node(node_id, node.attributes, dict(node.iter_properties()))
+
+    @classmethod
+    def from_property_table(cls, property_table, node_attributes):
+        """
+        :param PropertyTable property_table: A table with a row for each node of the nodeset
+        :param list node_attributes: The attributes of the node in each row of the table
+        :returns: A nodeset whose nodes are the rows of the table
+        :rtype: Nodeset
+        """
+        nodeset = cls()
+        nodeset.property_table = property_table
+        for row, node_id in enumerate(property_table.get_node_ids()):
+            nodeset.nodes[node_id] = Node(node_attributes[row], None, property_table, row)
+        return nodeset
+
+    @property
+    def property_identities(self):
+        """A dictionary of the type and single-valuedness of each property of the nodes"""
+        return self.property_table.property_identities
+
+    @property_identities.setter
+    def property_identities(self, property_identities):
+        self.property_table.property_identities = property_identities
+
+    def add_node(self, node_id, attributes=None, properties=None):
+        """
+        Adds a node to the nodeset, giving it a row in the property table. If the nodeset already has a node with the \
+        same id, that node is updated instead.
+
+        :param str|unicode node_id: The id of the node
+        :param dict|None attributes: The node's attributes
+        :param dict|None properties: The node's properties, already converted to the types of their identities
+        :returns: The node
+        :rtype: Node
+        """
+        node = self.nodes.get(node_id)
+        if node is None:
+            node = Node(attributes, None, self.property_table, self.property_table.add_row(node_id))
+            self.nodes[node_id] = node
+        elif attributes:
+            node.attributes.update(attributes)
+
+        if properties:
+            for property_id in properties:
+                self.property_table.set(node._row, property_id, properties[property_id])
+
+        return node
+
+    def set_property_values(self, property_id, node_ids, values):
+        """
+        Sets the value of a property for a number of nodes at once
+
+        :param str|unicode property_id: The id of the property
+        :param list node_ids: The ids of the nodes, which must be in the nodeset
+        :param list|numpy.ndarray values: The value for each node, already converted to the type of the property's \
+        identity, as returned by :func:`dynetmlparsingutils.format_prop_column`
+        """
+        self.property_table.set_values(property_id, [self.nodes[node_id]._row for node_id in node_ids], values)
+
+    def rename_node(self, node_id, new_node_id):
+        """
+        :param str|unicode node_id: The current id of a node
+        :param str|unicode new_node_id: The new id of the node
+        """
+        node = self.nodes.pop(node_id)
+        self.nodes[new_node_id] = node
+        if node._table is self.property_table:
+            self.property_table.rename_row(node._row, new_node_id)
+
+    def intern_node_ids(self, symbol_table):
+        """
+        Replaces the id of every node with its interned copy
+
+        :param SymbolTable symbol_table: The table in which the ids should be interned
+        """
+        nodes = {}
+        for node_id in self.nodes:
+            node = self.nodes[node_id]
+            interned_id = symbol_table.intern(node_id)
+            if node.attributes.get('id') == interned_id:
+                node.attributes['id'] = interned_id
+            if node._table is self.property_table:
+                self.property_table.rename_row(node._row, interned_id)
+            nodes[interned_id] = node
+        self.nodes = nodes
+
+    def __getitem__(self, i):
+        return (self.property_identities, self.nodes)[i]
+
+    def __len__(self):
+        return 2
+
+    def __iter__(self):
+        yield self.property_identities
+        yield self.nodes
+
+    def __eq__(self, other):
+        if isinstance(other, (Nodeset, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return 'Nodeset({0!r}, <{1} nodes>)'.format(self.property_identities, len(self.nodes))
+
+    def __getstate__(self):
+        return self.nodes, self.property_table
+
+    def __setstate__(self, state):
+        self.nodes, self.property_table = state
+
+
+class NetworkAttributes(object):
+    """
+    The attributes that define a network. They are read like the dictionary they replace, but the set of keys is \
+    fixed: values can be changed, but keys cannot be added or removed.
+    """
+    __slots__ = ('sourceType', 'source', 'targetType', 'target', 'id', 'isDirected', 'allowSelfLoops', 'isBinary')
+
+    def __init__(self, sourceType, source, targetType, target, id, isDirected, allowSelfLoops, isBinary):
+        self.sourceType = sourceType
+        self.source = source
+        self.targetType = targetType
+        self.target = target
+        self.id = id
+        self.isDirected = isDirected
+        self.allowSelfLoops = allowSelfLoops
+        self.isBinary = isBinary
+
+    @classmethod
+    def from_dict(cls, nk_attributes):
+        """
+        :param dict nk_attributes: The attributes of a network, as returned by \
+        :func:`dynetmlparsingutils.get_network_attributes`
+        :returns: The attributes as a record
+        :rtype: NetworkAttributes
+        """
+        return cls(*[nk_attributes[key] for key in cls.__slots__])
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def values(self):
+        return [getattr(self, key) for key in self.__slots__]
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __eq__(self, other):
+        if isinstance(other, (NetworkAttributes, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __repr__(self):
+        return 'NetworkAttributes({0!r})'.format(dict(self.items()))
+
+    def __getstate__(self):
+        return self.values()
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            setattr(self, key, value)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+.. module:: dynetmlwriter
+:synopsis: Writes meta-networks to DyNetML incrementally, without building an element tree.
+
+Each element is written as soon as it is reached, straight from the node tree and networks of a meta-network, using \
+:class:`lxml.etree.xmlfile`. Only a single node or link is ever held as an element, so memory use doesn't depend on \
+the size of the networks being written.
+
+.. moduleauthor:: Peter M. Landwehr <plandweh@cs.cmu.edu>
+
+"""
+
+__author__ = 'Peter M. Landwehr <plandweh@cs.cmu.edu>'
+
+import dynetmlparsingutils as dmlpu
+from dynetmlrecords import NetworkAttributes
+from lxml import etree
+import os
+
+
+def write_dynetml(target, metanetworks, dmn_attributes=None, pretty_print=True, compress=None):
+    """
+    Writes one or more meta-networks to DyNetML
+
+    :param str|unicode|file target: A path, or a file-like object opened for writing bytes
+    :param list metanetworks: The meta-networks to be written. If dmn_attributes is None, this must hold a single \
+    meta-network, which becomes the root of the document.
+    :param dict|None dmn_attributes: If set, the meta-networks are written inside a <DynamicMetaNetwork> tag with \
+    these attributes
+    :param bool pretty_print: If True, elements are indented and placed on their own lines
+    :param bool|str|None compress: The compression of the output: "gzip", "bz2", "xz", or "zstd". True means gzip \
+    and False no compression; None means the compression is taken from the extension of a target path.
+    """
+    if not hasattr(target, 'write'):
+        dmlpu.check_type(target, 'target', (str, unicode))
+        if os.path.isdir(target):
+            raise IOError('target cannot be a directory')
+    if dmn_attributes is None and len(metanetworks) != 1:
+        raise ValueError('A single meta-network must be written without dmn_attributes; got {0}'.
+                         format(len(metanetworks)))
+
+    if compress is False:
+        outfile = target if hasattr(target, 'write') else open(target, 'wb')
+    else:
+        outfile = dmlpu.open_dynetml(target, 'wb', 'gzip' if compress is True else compress)
+
+    try:
+        with etree.xmlfile(outfile, encoding='utf-8') as xf:
+            xf.write_declaration(standalone=True)
+            if dmn_attributes is None:
+                write_metanetwork(xf, metanetworks[0], pretty_print, 0)
+            else:
+                with xf.element('DynamicMetaNetwork', _get_attrib(dmn_attributes)):
+                    for mn in metanetworks:
+                        _newline(xf, pretty_print, 1)
+                        write_metanetwork(xf, mn, pretty_print, 1)
+                    _newline(xf, pretty_print, 0)
+    finally:
+        # Closing a compressed file that wraps target writes the end of the stream without closing target
+        if outfile is not target:
+            outfile.close()
+
+
+def write_metanetwork(xf, mn, pretty_print=True, depth=0):
+    """
+    Writes a <MetaNetwork> element
+
+    :param lxml.etree.xmlfile xf: The incremental writer to write the element to
+    :param MetaNetwork mn: The meta-network to be written
+    :param bool pretty_print: If True, elements are indented and placed on their own lines
+    :param int depth: The depth of the <MetaNetwork> element in the document, used for indentation
+    """
+    with xf.element('MetaNetwork', _get_attrib(mn.attributes)):
+        _newline(xf, pretty_print, depth + 1)
+        xf.write(dmlpu.get_property_identities_tag(mn.propertyIdentities))
+        _newline(xf, pretty_print, depth + 1)
+        xf.write(dmlpu.get_properties_tag(mn.properties))
+
+        _newline(xf, pretty_print, depth + 1)
+        with xf.element('nodes'):
+            node_tree = mn.get_node_tree()
+            for class_type in node_tree:
+                for class_id in node_tree[class_type]:
+                    nodeset = node_tree[class_type][class_id]
+                    _newline(xf, pretty_print, depth + 2)
+                    with xf.element('nodeclass', {'type': class_type, 'id': class_id}):
+                        _newline(xf, pretty_print, depth + 3)
+                        xf.write(dmlpu.get_property_identities_tag(nodeset.property_identities))
+                        for node_id in nodeset.nodes:
+                            _newline(xf, pretty_print, depth + 3)
+                            xf.write(_get_node_tag(node_id, nodeset.nodes[node_id]))
+                        _newline(xf, pretty_print, depth + 2)
+            _newline(xf, pretty_print, depth + 1)
+
+        _newline(xf, pretty_print, depth + 1)
+        with xf.element('networks'):
+            for network_id in mn.networks:
+                nk_attributes = mn._get_network_attributes(network_id)
+                _newline(xf, pretty_print, depth + 2)
+                with xf.element('network', _get_attrib(NetworkAttributes.from_dict(nk_attributes))):
+                    is_binary = nk_attributes['isBinary']
+                    for source, target, value in mn._iter_network_links(network_id):
+                        _newline(xf, pretty_print, depth + 3)
+                        if is_binary:
+                            xf.write(etree.Element('link', source=source, target=target))
+                        else:
+                            xf.write(etree.Element('link', source=source, target=target,
+                                                   value=dmlpu.unformat_prop(value)))
+                    _newline(xf, pretty_print, depth + 2)
+            _newline(xf, pretty_print, depth + 1)
+        _newline(xf, pretty_print, depth)
+
+
+def _get_node_tag(node_id, node):
+    """
+    :param str|unicode node_id: The id of a node
+    :param Node node: The node
+    :returns: A <node> tag holding the node's attributes and properties
+    :rtype: :class:`lxml._Element`
+    """
+    node_tag = etree.Element('node', _get_attrib(node.attributes))
+    node_tag.attrib['id'] = node_id
+    if node.has_properties():
+        properties_tag = etree.SubElement(node_tag, 'properties')
+        for property_id, value in node.iter_properties():
+            etree.SubElement(properties_tag, 'property', id=property_id, value=dmlpu.unformat_prop(value))
+    return node_tag
+
+
+def _get_attrib(attributes):
+    """:returns: A dictionary of attributes with each value converted back to a DyNetML string"""
+    return dict((key, dmlpu.unformat_prop(attributes[key])) for key in attributes)
+
+
+def _newline(xf, pretty_print, depth):
+    """Starts a new, indented line if pretty_print is True"""
+    if pretty_print:
+        xf.write(u'\n' + u'  ' * depth)
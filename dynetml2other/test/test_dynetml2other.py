@@ -3,11 +3,32 @@
 
 __author__ = 'plandweh'
 
+import bz2
+from CSRNetwork import CSRNetwork
+from datetime import datetime, timedelta
 from dynetml2other import dynetml2other
+from dynetml2other import iter_metanetworks
+from dynetml2other import scan_dynetml
 from DynamicMetaNetwork import DynamicMetaNetwork
+import dynetmlcli
+import dynetmlcompression
+import dynetmlparsingutils as dmlpu
+from dynetmlrecords import NetworkAttributes, Node, Nodeset
+import gzip
+from io import BytesIO
+from itertools import izip
+from LazyNetworkDict import LazyNetworkDict
+from lxml import etree
+from MetaNetwork import MetaNetwork
 from MetaNetworkIGraph import MetaNetworkIG
+from MetaNetworkIndex import MetaNetworkIndex
+from MetaNetworkList import MetaNetworkAttributes
 from MetaNetworkNetworkX import MetaNetworkNX
 import os
+from ParseCache import ParseCache
+from PropertyTable import PropertyTable
+import shutil
+from SymbolTable import SymbolTable
 import unittest
 
 
@@ -49,8 +70,10 @@ class UnitTests(unittest.TestCase):
         self.assertEqual(len(networks), len(expected_networks))
         if network_format == 'networkx':
             edges_and_nodes = lambda x: (x.number_of_edges(), x.number_of_nodes())
+        elif network_format == 'dict':
+            edges_and_nodes = lambda x: (x[1].get_link_count(), len(x[1].get_node_ids()))
         else:
-            edges_and_nodes = lambda x: (len(x[1].es), len(x[1].vs))
+            edges_and_nodes = lambda x: (len(x.es), len(x.vs))
 
         for e_n in expected_networks:
             self.assertTrue(e_n[0] in networks)
@@ -135,6 +158,823 @@ class UnitTests(unittest.TestCase):
         for network_format in ('networkx', 'igraph'):
             self.eval_format(network_format)
 
+    def test_dict_format(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+        self.assertEqual(len(dmn.metanetworks), 23)
+
+        mn = dmn.metanetworks[-1]
+        self.eval_networks(mn.networks, [('Agent x Tweet - Sender', 870, 1566),
+                                         ('Tweet x Agent - Mentions', 590, 806),
+                                         ('Tweet x Concept', 211, 245),
+                                         ('Tweet x Location', 250, 451),
+                                         ('Tweet x Tweet - Retweeted-By', 131, 201)], 'dict')
+
+        links = mn.networks['Agent x Tweet - Sender'][1]
+        for source in links:
+            for target in links[source]:
+                self.assertTrue(isinstance(links[source][target], float))
+
+    def test_csr_network(self):
+        links = CSRNetwork(['a', 'b', 'c', 'a'], ['b', 'a', 'c', 'c'], [1.0, 2.0, 3.0, 4.0], is_directed=False)
+        self.assertEqual(links['a']['b'], 2.0)
+        self.assertEqual(links['b']['a'], 2.0)
+        self.assertEqual(links['c']['a'], 4.0)
+        self.assertEqual(links['c']['c'], 3.0)
+        self.assertEqual(links.get_link_count(), 3)
+
+        links = CSRNetwork(['a', 'b', 'a'], ['b', 'a', 'b'], [1.0, 2.0, 4.0])
+        self.assertEqual(links['a']['b'], 4.0)
+        self.assertEqual(links['b']['a'], 2.0)
+        self.assertEqual(links.get_link_count(), 2)
+
+    def test_igraph_format(self):
+        dict_mn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict').metanetworks[-1]
+        mn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph').metanetworks[-1]
+
+        for network_id in dict_mn.networks:
+            g = mn.networks[network_id]
+            self.assertEqual(len(set(g.vs['name'])), len(g.vs))
+            self.assertEqual(g['isDirected'], g.is_directed())
+            self.assertEqual(sorted(izip(*mn._get_network_columns(network_id))),
+                             sorted(izip(*dict_mn._get_network_columns(network_id))))
+
+        g = mn.networks['Agent x Tweet - Sender']
+        node_id = g.vs[0]['name']
+        mn.rename_node('Agent', 'Agent', node_id, 'renamed node')
+        self.assertEqual(g.vs[0]['name'], 'renamed node')
+        self.assertFalse(node_id in g.vs['name'])
+
+    def test_networkx_nodes(self):
+        with self.assertRaises(TypeError):
+            DynamicMetaNetwork('networkx', include_nodes=1)
+
+        with self.assertRaises(ValueError):
+            DynamicMetaNetwork('igraph', include_nodes=True)
+
+        dmn = DynamicMetaNetwork('networkx', include_nodes=True)
+        dmn.load_from_dynetml_file(working_path('test_dynetml', 'files_2014022423.xml'))
+        mn = dmn.metanetworks[-1]
+        self.assertTrue(mn.include_nodes)
+
+        g = mn.networks['Agent x Tweet - Sender']
+        agents = mn.get_nodeset('Agent', 'Agent').nodes
+        tweets = mn.get_nodeset('Event', 'Tweet').nodes
+        self.assertEqual(g.number_of_edges(), 870)
+        self.assertEqual(g.number_of_nodes(), len(set(agents) | set(tweets) | set(g.nodes())))
+        for node_id in agents:
+            self.assertTrue(g.node[node_id] is agents[node_id].attributes)
+
+    def test_lazy_networks(self):
+        with self.assertRaises(TypeError):
+            MetaNetwork(lazy_networks='yes')
+
+        eager_mn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph').metanetworks[-1]
+        dmn = DynamicMetaNetwork('igraph', lazy_networks=True)
+        get_link_columns = dmlpu.get_link_columns
+        parsed_ids = []
+        dmlpu.get_link_columns = lambda nk_tag, symbol_table=None: \
+            parsed_ids.append(nk_tag.attrib['id']) or get_link_columns(nk_tag, symbol_table)
+        try:
+            dmn.load_from_dynetml_file(working_path('test_dynetml', 'files_2014022423.xml'))
+            self.assertEqual(parsed_ids, [])
+            for network_id in dmn.metanetworks[-1].networks:
+                self.assertTrue(dmn.metanetworks[-1].networks._networks[network_id].network_text is None)
+            network_id = sorted(dmn.metanetworks[0].networks)[0]
+            dmn.metanetworks[0].networks[network_id]
+            self.assertEqual(parsed_ids, [network_id])
+        finally:
+            dmlpu.get_link_columns = get_link_columns
+        mn = dmn.metanetworks[-1]
+        self.assertTrue(isinstance(mn.networks, LazyNetworkDict))
+        self.assertEqual(sorted(mn.networks), sorted(eager_mn.networks))
+        self.assertEqual(sorted(mn.networks.get_unbuilt_ids()), sorted(eager_mn.networks))
+
+        self.assertTrue('Agent x Tweet - Sender' in mn.networks)
+        self.assertEqual(mn.networks.get_unbuilt_attributes('Agent x Tweet - Sender'),
+                         eager_mn._get_network_attributes('Agent x Tweet - Sender'))
+        self.assertFalse(mn.networks.is_built('Agent x Tweet - Sender'))
+
+        g = mn.networks['Agent x Tweet - Sender']
+        self.assertTrue(mn.networks.is_built('Agent x Tweet - Sender'))
+        self.assertTrue(mn.networks['Agent x Tweet - Sender'] is g)
+        self.assertEqual(len(mn.networks.get_unbuilt_ids()), len(mn.networks) - 1)
+        with self.assertRaises(ValueError):
+            mn.networks.get_unbuilt_attributes('Agent x Tweet - Sender')
+
+        for network_id in eager_mn.networks:
+            self.assertEqual(mn._get_network_columns(network_id), eager_mn._get_network_columns(network_id))
+        self.assertEqual(mn.networks.get_unbuilt_ids(), [])
+
+        skeleton_text, spans = dmlpu.split_networks(b'<MetaNetwork><networks><!-- <network> -->'
+                                                    b'<network id="a"><link source="x" target="y"/></network>'
+                                                    b'<network id="b"/></networks></MetaNetwork>')
+        self.assertEqual(skeleton_text, b'<MetaNetwork><networks><!-- <network> --><network id="a"/>'
+                                        b'<network id="b"/></networks></MetaNetwork>')
+        self.assertEqual(spans, [(41, 96), (96, 113)])
+
+        changed_path = os.path.join(self.test_dir_name, 'changed.xml')
+        shutil.copy(working_path('test_dynetml', 'files_2014022423.xml'), changed_path)
+        changed_dmn = DynamicMetaNetwork('dict', lazy_networks=True)
+        changed_dmn.load_from_dynetml_file(changed_path)
+        with open(changed_path, 'wb') as changed_file:
+            changed_file.write(b'<DynamicMetaNetwork/>')
+        with self.assertRaises(ValueError):
+            changed_dmn.metanetworks[-1].networks['Agent x Tweet - Sender']
+        os.remove(changed_path)
+
+    def test_symbol_table(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+        for mn in dmn.metanetworks:
+            self.assertTrue(mn.symbol_table is dmn.symbol_table)
+
+        first_nodes = dmn.metanetworks[0].get_nodeset('Agent', 'Agent')[1]
+        last_nodes = dmn.metanetworks[-1].get_nodeset('Agent', 'Agent')[1]
+        shared_ids = set(first_nodes) & set(last_nodes)
+        self.assertTrue(len(shared_ids) > 0)
+        for node_id in shared_ids:
+            self.assertTrue(dmn.symbol_table.intern(node_id) is node_id)
+            self.assertTrue([x for x in last_nodes if x == node_id][0] is node_id)
+
+        code_count = len(dmn.symbol_table)
+        for source in dmn.metanetworks[-1].networks['Agent x Tweet - Sender'][1]:
+            self.assertTrue(source in dmn.symbol_table)
+            self.assertEqual(dmn.symbol_table.get_symbol(dmn.symbol_table.get_code(source)), source)
+        self.assertEqual(len(dmn.symbol_table), code_count)
+
+        parallel_dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph', workers=2)
+        first_ids = parallel_dmn.metanetworks[0].networks['Agent x Tweet - Sender'].vs['name']
+        last_ids = parallel_dmn.metanetworks[-1].networks['Agent x Tweet - Sender'].vs['name']
+        for node_id in set(first_ids) & set(last_ids):
+            self.assertTrue([x for x in first_ids if x == node_id][0] is [x for x in last_ids if x == node_id][0])
+
+    def test_node_records(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+        mn = dmn.metanetworks[-1]
+
+        nodeset = mn.get_nodeset('Agent', 'Agent')
+        self.assertTrue(isinstance(nodeset, Nodeset))
+        self.assertTrue(nodeset[0] is nodeset.property_identities)
+        self.assertTrue(nodeset[1] is nodeset.nodes)
+        self.assertEqual(len(nodeset[1]), 923)
+
+        node_id = sorted(nodeset[1])[0]
+        node = mn.get_node('Agent', 'Agent', node_id)
+        self.assertTrue(isinstance(node, Node))
+        self.assertFalse(hasattr(node, '__dict__'))
+        self.assertTrue(node[0] is node.attributes)
+        self.assertEqual(node[0]['id'], node_id)
+        attributes, properties = node
+        self.assertTrue(isinstance(properties, dict))
+
+        nk_attributes = mn.networks['Agent x Tweet - Sender'][0]
+        self.assertTrue(isinstance(nk_attributes, NetworkAttributes))
+        self.assertEqual(nk_attributes['source'], 'Agent')
+        self.assertEqual(sorted(dict(nk_attributes)), ['allowSelfLoops', 'id', 'isBinary', 'isDirected', 'source',
+                                                       'sourceType', 'target', 'targetType'])
+        with self.assertRaises(KeyError):
+            nk_attributes['blah'] = 1
+
+        mn.create_node('Agent', 'Agent', 'new node', {})
+        self.assertFalse(mn.get_node('Agent', 'Agent', 'new node').has_properties())
+        mn.rename_node('Agent', 'Agent', 'new node', 'renamed node')
+        self.assertEqual(mn.get_node('Agent', 'Agent', 'renamed node')[0]['id'], 'renamed node')
+
+    def test_property_columns(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+        mn = dmn.metanetworks[-1]
+        nodeset = mn.get_nodeset('Agent', 'Agent')
+
+        with self.assertRaises(KeyError):
+            mn.get_property_column('Agent', 'Agent', 'blah')
+
+        for property_name in nodeset[0]:
+            node_ids, values, mask = mn.get_property_column('Agent', 'Agent', property_name)
+            self.assertEqual(len(node_ids), 923)
+            self.assertEqual(len(values), 923)
+            self.assertEqual(len(mask), 923)
+            for node_id, has_value in zip(node_ids, mask):
+                self.assertEqual(has_value, property_name in nodeset[1][node_id][1])
+
+        node_id = sorted(nodeset[1])[0]
+        mn.create_nodeset_property('Agent', 'Agent', 'score', 'number', True)
+        mn.set_node_property('Agent', 'Agent', node_id, 'score', '2.5')
+        self.assertEqual(mn.get_node('Agent', 'Agent', node_id)[1]['score'], 2.5)
+
+        node_ids, values, mask = mn.get_property_column('Agent', 'Agent', 'score')
+        self.assertEqual(values[node_ids.index(node_id)], 2.5)
+        self.assertEqual(sum(mask), 1)
+
+        del mn.get_node('Agent', 'Agent', node_id)[1]['score']
+        self.assertFalse('score' in mn.get_node('Agent', 'Agent', node_id)[1])
+
+    def test_format_prop_column(self):
+        test_values = [('number', ['1', ' 2.5 ', '1e3', '-0']),
+                       ('date', ['2014-02-24 23:00:00', '2014-2-4 3:00:00']),
+                       ('bool', ['true', 'False']),
+                       ('text', ['blah'])]
+        for prop_type, prop_strs in test_values:
+            self.assertEqual(dmlpu.format_prop_column(prop_strs, prop_type),
+                             [dmlpu.format_prop(prop_str, prop_type) for prop_str in prop_strs])
+
+        for prop_type, prop_str in [('number', 'blah'), ('date', '2014-02-30 23:00:00'), ('bool', 'yes')]:
+            with self.assertRaises(ValueError):
+                dmlpu.format_prop_column([prop_str], prop_type)
+
+        for prop_type, prop_strs in test_values[:2]:
+            table = PropertyTable({'p': (prop_type, None)})
+            for prop_str in prop_strs:
+                table.add_row(prop_str)
+            table.set_values('p', range(len(prop_strs)), dmlpu.format_prop_column(prop_strs, prop_type, True))
+            self.assertEqual(table.get_values('p'), dmlpu.format_prop_column(prop_strs, prop_type))
+
+        with self.assertRaises(TypeError):
+            dmlpu.format_prop_column(['1'], 1)
+
+    def test_time_index(self):
+        self.assertEqual(dmlpu.parse_timestamp('20140224T23:00:00'), datetime(2014, 2, 24, 23))
+        with self.assertRaises(ValueError):
+            dmlpu.parse_timestamp('2014-02-24 11 PM')
+
+        dmn = DynamicMetaNetwork('dict')
+        for hour in [3, 0, 2, 1, 4]:
+            dmn.metanetworks.append(MetaNetwork(dmn.symbol_table))
+            dmn.metanetworks[-1].attributes['id'] = '20140224T{0:02d}:00:00'.format(hour)
+        get_hours = lambda x: [mn.get_timestamp().hour for mn in x]
+
+        self.assertEqual(get_hours(dmn.get_metanetworks_between(datetime(2014, 2, 24, 1), datetime(2014, 2, 24, 3))),
+                         [3, 2, 1])
+
+        dmn.drop_metanetworks_before(datetime(2014, 2, 24, 1))
+        self.assertEqual(get_hours(dmn.metanetworks), [3, 2, 1, 4])
+        dmn.drop_metanetworks_after(datetime(2014, 2, 24, 3))
+        self.assertEqual(get_hours(dmn.metanetworks), [3, 2, 1])
+        dmn.drop_metanetworks_for_ranges([(datetime(2014, 2, 24, 2), datetime(2014, 2, 24, 2))], False)
+        self.assertEqual(get_hours(dmn.metanetworks), [3, 1])
+        dmn.drop_metanetworks_for_ranges([(datetime(2014, 2, 24, 3), datetime(2014, 2, 24, 5))])
+        self.assertEqual(get_hours(dmn.metanetworks), [3])
+
+        dmn.metanetworks[0].attributes['id'] = '20140224T05:00:00'
+        self.assertEqual(get_hours(dmn.get_metanetworks_between(datetime(2014, 2, 24, 4))), [5])
+
+        with self.assertRaises(TypeError):
+            dmn.drop_metanetworks_for_ranges([datetime(2014, 2, 24, 2)])
+
+    def test_time_views(self):
+        dmn = DynamicMetaNetwork('dict')
+        for hour in [3, 0, 2, 1, 4, 2]:
+            dmn.metanetworks.append(MetaNetwork(dmn.symbol_table))
+            dmn.metanetworks[-1].attributes['id'] = '20140224T{0:02d}:00:00'.format(hour)
+        get_hours = lambda x: [mn.get_timestamp().hour for mn in x]
+        hour = lambda h, m=0: datetime(2014, 2, 24, h, m)
+
+        self.assertEqual(len(dmn.at(hour(2))), 2)
+        self.assertEqual(len(dmn.at(hour(5))), 0)
+
+        view = dmn.between(hour(1), hour(3))
+        self.assertEqual(get_hours(view), [1, 2, 2, 3])
+        self.assertEqual(get_hours(view[1:]), [2, 2, 3])
+        self.assertIs(view[-1], dmn.metanetworks[0])
+        self.assertEqual(get_hours(view.between(end_date=hour(2))), [1, 2, 2])
+        self.assertEqual((view.get_start(), view.get_end()), (hour(1), hour(3)))
+
+        self.assertIs(dmn.nearest(hour(3, 20)), dmn.metanetworks[0])
+        self.assertIs(dmn.nearest(hour(3, 30)), dmn.metanetworks[0])
+        self.assertIs(dmn.nearest(hour(9)), dmn.metanetworks[4])
+
+        windows = dmn.resample(timedelta(hours=2))
+        self.assertEqual([start.hour for start, window in windows], [0, 2, 4])
+        self.assertEqual([get_hours(window) for start, window in windows], [[0, 1], [2, 2, 3], [4]])
+
+        with self.assertRaises(ValueError):
+            dmn.resample(timedelta(0))
+
+        # Views hold on to their meta-networks when meta-networks are dropped
+        full_view = dmn.get_view()
+        dmn.drop_metanetworks_before(hour(3))
+        self.assertEqual(len(dmn.metanetworks), 2)
+        self.assertEqual(get_hours(view), [1, 2, 2, 3])
+        self.assertEqual(get_hours(full_view[-2:]), [3, 4])
+        self.assertIs(full_view[-1], dmn.metanetworks[1])
+
+    def test_time_index_versions(self):
+        dmn = DynamicMetaNetwork('dict')
+        for hour in xrange(6):
+            dmn.metanetworks.append(MetaNetwork(dmn.symbol_table))
+            dmn.metanetworks[-1].attributes['id'] = '20140224T{0:02d}:00:00'.format(hour)
+        hour = lambda h: datetime(2014, 2, 24, h)
+        self.assertEqual(len(dmn.get_view()), 6)
+
+        # Once the index is built, queries must not look at any snapshot
+        def fail_on_scan(*args):
+            raise AssertionError('a query scanned the meta-networks')
+
+        for mn in dmn.metanetworks:
+            mn.get_timestamp = fail_on_scan
+        self.assertEqual(len(dmn.at(hour(2))), 1)
+        self.assertEqual(len(dmn.between(hour(1), hour(3))), 3)
+        self.assertEqual(len(dmn.get_metanetworks_between(hour(4))), 2)
+        self.assertIs(dmn.nearest(hour(5)), dmn.metanetworks[5])
+        self.assertEqual(len(dmn.resample(timedelta(hours=3))), 2)
+        for mn in dmn.metanetworks:
+            del mn.get_timestamp
+
+        dmn.metanetworks.append(MetaNetwork(dmn.symbol_table))
+        dmn.metanetworks[-1].attributes['id'] = '20140224T06:00:00'
+        self.assertIs(dmn.nearest(hour(7)), dmn.metanetworks[-1])
+        dmn.metanetworks[0].attributes.update(id='20140224T08:00:00')
+        self.assertIs(dmn.nearest(hour(9)), dmn.metanetworks[0])
+
+        # Assigning a plain dictionary replaces the attributes, and so the index, too
+        dmn.metanetworks[2].attributes = {'id': '20140224T09:00:00'}
+        self.assertIsInstance(dmn.metanetworks[2].attributes, MetaNetworkAttributes)
+        self.assertIs(dmn.nearest(hour(10)), dmn.metanetworks[2])
+        self.assertEqual(list(dmn.between(hour(9), hour(10))), [dmn.metanetworks[2]])
+        dmn.drop_metanetworks_after(hour(5))
+        self.assertEqual(len(dmn.metanetworks), 4)
+
+        # Changing the id of a meta-network elsewhere leaves the index alone
+        other_dmn = DynamicMetaNetwork('dict')
+        other_dmn.metanetworks.append(MetaNetwork(other_dmn.symbol_table))
+        other_dmn.metanetworks[0].attributes['id'] = '20140224T00:00:00'
+        dmn.nearest(hour(1))
+        for mn in dmn.metanetworks:
+            mn.get_timestamp = fail_on_scan
+        other_dmn.metanetworks[0].attributes['id'] = '20140224T01:00:00'
+        self.assertIs(dmn.nearest(hour(1)), dmn.metanetworks[0])
+        for mn in dmn.metanetworks:
+            del mn.get_timestamp
+
+        dmn.metanetworks = dmn.metanetworks[1:]
+        self.assertEqual(len(dmn.get_view()), 3)
+
+    def test_aggregate(self):
+        dmn = DynamicMetaNetwork('dict')
+        nk_attributes = {'sourceType': 'Agent', 'source': 'Agent', 'targetType': 'Agent', 'target': 'Agent',
+                         'id': 'Agent x Agent', 'isDirected': False, 'allowSelfLoops': False, 'isBinary': False}
+        links = [[('a', 'b', 1.0), ('b', 'c', 2.0)], [('b', 'a', 3.0)], [('a', 'b', 1.0), ('c', 'd', 4.0)]]
+        for hour, hour_links in enumerate(links):
+            dmn.metanetworks.append(MetaNetwork(dmn.symbol_table))
+            dmn.metanetworks[-1].attributes['id'] = '20140224T{0:02d}:00:00'.format(hour)
+            dmn.metanetworks[-1]._add_network(nk_attributes, *[list(column) for column in izip(*hour_links)])
+        get_links = lambda x: dict((frozenset((source, target)), value)
+                                   for source, target, value in izip(*x[1].get_columns()))
+        pair = lambda x, y: frozenset((x, y))
+
+        with self.assertRaises(ValueError):
+            dmn.aggregate('Agent x Agent', 'max')
+            dmn.aggregate('Agent x Agent', 'decay')
+
+        self.assertTrue(dmn.aggregate('Agent x Tweet') is None)
+        self.assertEqual(get_links(dmn.aggregate('Agent x Agent')), {pair('a', 'b'): 5.0, pair('b', 'c'): 2.0,
+                                                                     pair('c', 'd'): 4.0})
+        self.assertEqual(get_links(dmn.aggregate('Agent x Agent', 'count')), {pair('a', 'b'): 3.0, pair('b', 'c'): 1.0,
+                                                                              pair('c', 'd'): 1.0})
+        union = dmn.aggregate('Agent x Agent', 'union')
+        self.assertTrue(union[0]['isBinary'])
+        self.assertEqual(set(get_links(union).values()), set([1.0]))
+        self.assertEqual(get_links(dmn.aggregate('Agent x Agent', 'decay', half_life=timedelta(hours=1))),
+                         {pair('a', 'b'): 2.75, pair('b', 'c'): 0.5, pair('c', 'd'): 4.0})
+        self.assertEqual(get_links(dmn.aggregate('Agent x Agent', start_date=datetime(2014, 2, 24, 1))),
+                         {pair('a', 'b'): 4.0, pair('c', 'd'): 4.0})
+
+        windows = dmn.aggregate_windows('Agent x Agent', timedelta(hours=2))
+        self.assertEqual([get_links(network) for window_start, network in windows],
+                         [{pair('a', 'b'): 4.0, pair('b', 'c'): 2.0}, {pair('a', 'b'): 1.0, pair('c', 'd'): 4.0}])
+
+        g = dmn.aggregate('Agent x Agent', network_format='networkx')
+        self.assertFalse(g.is_directed())
+        self.assertEqual(g['b']['a']['weight'], 5.0)
+        g = dmn.aggregate('Agent x Agent', network_format='igraph')
+        self.assertEqual(sorted(g.vs['name']), ['a', 'b', 'c', 'd'])
+        self.assertEqual(sorted(g.es['weight']), [2.0, 4.0, 5.0])
+
+    def test_to_sparse(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx')
+        mn = dmn.metanetworks[-1]
+
+        with self.assertRaises(KeyError):
+            mn.to_sparse('blah')
+
+        with self.assertRaises(ValueError):
+            mn.to_sparse('Agent x Tweet - Sender', 'blah')
+
+        matrix, row_labels, col_labels = mn.to_sparse('Agent x Tweet - Sender')
+        self.assertEqual(matrix.shape, (len(row_labels), len(col_labels)))
+        self.assertEqual(matrix.nnz, 870)
+        self.assertTrue(len(row_labels) >= 923)
+
+        matrices, row_labels, col_labels = dmn.to_sparse_stack('Agent x Tweet - Sender')
+        self.assertEqual(len(matrices), 23)
+        for matrix in matrices:
+            self.assertEqual(matrix.shape, (len(row_labels), len(col_labels)))
+        self.assertEqual(matrices[-1].nnz, 870)
+
+    def test_streaming(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx')
+        streamed_dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx', True)
+        self.assertTrue(isinstance(streamed_dmn, DynamicMetaNetwork))
+        self.assertEqual(len(streamed_dmn.metanetworks), len(dmn.metanetworks))
+        self.assertEqual(streamed_dmn.attributes, dmn.attributes)
+
+        for mn, streamed_mn in zip(dmn.metanetworks, streamed_dmn.metanetworks):
+            self.assertEqual(streamed_mn.attributes, mn.attributes)
+            self.assertEqual(sorted(streamed_mn.networks), sorted(mn.networks))
+
+        with self.assertRaises(TypeError):
+            dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx', 'yes')
+
+    def test_streaming_writer(self):
+        out_path = self.test_xml_name + '.out.xml'
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph')
+
+        for compress in (False, True):
+            dmn.write_dynetml(out_path, compress=compress)
+            written_dmn = DynamicMetaNetwork('dict')
+            if compress:
+                with gzip.open(out_path, 'rb') as infile:
+                    written_dmn.load_from_dynetml_file(infile)
+            else:
+                written_dmn.load_from_dynetml_file(out_path)
+
+            self.assertEqual(written_dmn.attributes, dmn.attributes)
+            self.assertEqual(len(written_dmn.metanetworks), 23)
+            mn = written_dmn.metanetworks[-1]
+            self.assertEqual(mn.get_node_tree(), dmn.metanetworks[-1].get_node_tree())
+            self.eval_networks(mn.networks, [('Agent x Tweet - Sender', 870, 1566),
+                                             ('Tweet x Agent - Mentions', 590, 806),
+                                             ('Tweet x Concept', 211, 245),
+                                             ('Tweet x Location', 250, 451),
+                                             ('Tweet x Tweet - Retweeted-By', 131, 201)], 'dict')
+
+        out_file = BytesIO()
+        dmn.metanetworks[-1].write_dynetml(out_file, pretty_print=False)
+        self.assertEqual(etree.fromstring(out_file.getvalue()).attrib['id'], '2014-02-24 11 PM')
+
+        os.remove(out_path)
+
+    def test_compression(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+
+        for extension, compression in [('.gz', 'gzip'), ('.bz2', 'bz2')]:
+            out_path = self.test_xml_name + extension
+            dmn.write_dynetml(out_path)
+            self.assertEqual(dmlpu.get_compression(out_path), compression)
+
+            for streaming in (False, True):
+                compressed_dmn = dynetml2other(out_path, 'dict', streaming)
+                self.assertEqual(len(compressed_dmn.metanetworks), 23)
+                self.assertEqual(compressed_dmn.metanetworks[-1].get_node_tree(),
+                                 dmn.metanetworks[-1].get_node_tree())
+
+            window_dmn = DynamicMetaNetwork('dict')
+            window_dmn.load_time_window(out_path)
+            self.assertEqual(len(window_dmn.metanetworks), 23)
+            os.remove(out_path)
+
+        # Two bz2 streams, the first of which ends exactly at the end of a block
+        with open(working_path('test_dynetml', 'files_2014022423.xml'), 'rb') as dynetml_file:
+            dynetml_text = dynetml_file.read()
+        first_stream = bz2.compress(dynetml_text[:1000])
+        block_size = dynetmlcompression.BLOCK_SIZE
+        dynetmlcompression.BLOCK_SIZE = len(first_stream)
+        try:
+            with dmlpu.open_dynetml(BytesIO(first_stream + bz2.compress(dynetml_text[1000:])), 'rb', 'bz2') as infile:
+                self.assertEqual(infile.read(), dynetml_text)
+        finally:
+            dynetmlcompression.BLOCK_SIZE = block_size
+
+        with self.assertRaises(ValueError):
+            dmlpu.open_dynetml(self.test_xml_name, 'rb', 'blah')
+
+    def test_cli(self):
+        out_dir = os.path.join(self.test_dir_name, 'converted')
+        self.assertEqual(dynetmlcli.main(['convert', working_path('test_dynetml', 'files_2014022423.xml'),
+                                          self.test_xml_name, '-o', out_dir, '-z', 'gzip', '-j', '2']), 1)
+
+        converted_path = os.path.join(out_dir, 'files_2014022423.xml.gz')
+        dmn = dynetml2other(converted_path, 'dict')
+        self.assertEqual(len(dmn.metanetworks), 23)
+        self.assertFalse(os.path.exists(os.path.join(out_dir, self.test_xml_name + '.gz')))
+
+        self.assertEqual(dynetmlcli.main(['convert', out_dir, '-o', out_dir, '-t', 'binary', '-z', 'gzip']), 2)
+        self.assertFalse(os.path.exists(os.path.join(out_dir, 'files_2014022423.dmlb')))
+        self.assertEqual(dynetmlcli.main(['convert', out_dir, '-o', out_dir, '-t', 'binary', '-j', '1']), 0)
+        binary_dmn = DynamicMetaNetwork('dict')
+        binary_dmn.load_binary(os.path.join(out_dir, 'files_2014022423.dmlb'))
+        self.assertEqual(len(binary_dmn.metanetworks), 23)
+
+        self.assertEqual(dynetmlcli.expand_input_paths([os.path.join(out_dir, '*.gz'), converted_path]),
+                         [converted_path])
+
+        copy_dir = os.path.join(out_dir, 'copy')
+        os.makedirs(copy_dir)
+        shutil.copy(converted_path, copy_dir)
+        os.remove(os.path.join(out_dir, 'files_2014022423.dmlb'))
+        self.assertEqual(dynetmlcli.main(['convert', out_dir, '-r', '-o', out_dir, '-t', 'binary']), 1)
+        self.assertFalse(os.path.exists(os.path.join(out_dir, 'files_2014022423.dmlb')))
+
+        shutil.rmtree(out_dir)
+
+    def test_scan_dynetml(self):
+        with self.assertRaises(TypeError):
+            scan_dynetml(1)
+
+        with self.assertRaises(IOError):
+            scan_dynetml('bad_path')
+
+        with self.assertRaises(ValueError):
+            scan_dynetml(self.test_xml_name)
+
+        dynetml_path = working_path('test_dynetml', 'files_2014022423.xml')
+        summary = scan_dynetml(dynetml_path)
+        self.assertEqual(summary.root_tag, 'DynamicMetaNetwork')
+        self.assertEqual(summary.get_metanetwork_count(), 23)
+        self.assertEqual(summary.metanetwork_ids,
+                         [mn_tag.attrib['id'] for root_tag, mn_tag in dmlpu.iterparse_metanetworks(dynetml_path)])
+
+        dmn = dynetml2other(dynetml_path, 'dict')
+        for nodeclass_key, nodeset_key in summary.node_counts:
+            self.assertEqual(summary.node_counts[nodeclass_key, nodeset_key],
+                             sum(len(mn.get_nodeset(nodeclass_key, nodeset_key).nodes) for mn in dmn.metanetworks
+                                 if nodeset_key in mn.get_node_tree()[nodeclass_key]))
+        self.assertEqual(sorted(summary.link_counts),
+                         sorted(set(network_id for mn in dmn.metanetworks for network_id in mn.networks)))
+
+        compressed_path = os.path.join(self.test_dir_name, 'files_2014022423.xml.gz')
+        with open(dynetml_path, 'rb') as infile:
+            outfile = gzip.open(compressed_path, 'wb')
+            outfile.write(infile.read())
+            outfile.close()
+        compressed_summary = scan_dynetml(compressed_path)
+        self.assertEqual(compressed_summary.metanetwork_ids, summary.metanetwork_ids)
+        self.assertEqual(compressed_summary.node_counts, summary.node_counts)
+        self.assertEqual(compressed_summary.link_counts, summary.link_counts)
+
+        self.assertEqual(dynetmlcli.main(['scan', dynetml_path, compressed_path, '-j', '2']), 0)
+        self.assertEqual(dynetmlcli.main(['scan', dynetml_path, self.test_xml_name, '--json', '-j', '1']), 1)
+        os.remove(compressed_path)
+
+    def test_parallel_loading(self):
+        with self.assertRaises(ValueError):
+            DynamicMetaNetwork('networkx').load_from_dynetml_file(
+                working_path('test_dynetml', 'files_2014022423.xml'), workers=0)
+
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx')
+        parallel_dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx', workers=2)
+        self.assertEqual([mn.attributes['id'] for mn in parallel_dmn.metanetworks],
+                         [mn.attributes['id'] for mn in dmn.metanetworks])
+        self.assertEqual(parallel_dmn.attributes, dmn.attributes)
+
+        gzip_path = self.test_xml_name + '.gz'
+        with open(working_path('test_dynetml', 'files_2014022423.xml'), 'rb') as dynetml_file:
+            with gzip.open(gzip_path, 'wb') as outfile:
+                outfile.write(dynetml_file.read())
+        gzip_dmn = DynamicMetaNetwork('dict')
+        gzip_dmn.load_from_dynetml_file(gzip_path, workers=2)
+        self.assertEqual(gzip_dmn.attributes, dmn.attributes)
+        self.assertEqual([mn.attributes['id'] for mn in gzip_dmn.metanetworks],
+                         [mn.attributes['id'] for mn in dmn.metanetworks])
+        os.remove(gzip_path)
+
+        mn = parallel_dmn.metanetworks[-1]
+        self.assertTrue(isinstance(mn, MetaNetworkNX))
+        self.eval_node_tree(mn.get_node_tree(), [('Agent', 'Agent', 923), ('Knowledge', 'Concept', 103),
+                                                 ('Location', 'Location', 201), ('Event', 'Tweet', 870)])
+        self.eval_networks(mn.networks, [('Agent x Tweet - Sender', 870, 1566),
+                                         ('Tweet x Agent - Mentions', 590, 806),
+                                         ('Tweet x Concept', 211, 245),
+                                         ('Tweet x Location', 250, 451),
+                                         ('Tweet x Tweet - Retweeted-By', 131, 201)], 'networkx')
+
+    def test_time_window(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx')
+
+        window_dmn = DynamicMetaNetwork('networkx')
+        with self.assertRaises(TypeError):
+            window_dmn.load_time_window(working_path('test_dynetml', 'files_2014022423.xml'), 'yes')
+
+        window_dmn.load_time_window(working_path('test_dynetml', 'files_2014022423.xml'))
+        self.assertEqual(window_dmn.attributes, dmn.attributes)
+        self.assertEqual([mn.attributes['id'] for mn in window_dmn.metanetworks],
+                         [mn.attributes['id'] for mn in dmn.metanetworks])
+        self.eval_networks(window_dmn.metanetworks[-1].networks, [('Agent x Tweet - Sender', 870, 1566),
+                                                                  ('Tweet x Agent - Mentions', 590, 806),
+                                                                  ('Tweet x Concept', 211, 245),
+                                                                  ('Tweet x Location', 250, 451),
+                                                                  ('Tweet x Tweet - Retweeted-By', 131, 201)],
+                           'networkx')
+
+        dynetml_text = (u'<?xml version="1.0" encoding="ISO-8859-1"?>\n<DynamicMetaNetwork id="dmn">'
+                        u'<!-- <MetaNetwork id="comment"> --><?pi <MetaNetwork id="pi"/> ?>'
+                        u'<MetaNetwork id="first" note="caf\xe9 > bar"><![CDATA[</MetaNetwork>]]></MetaNetwork >'
+                        u'<MetaNetwork id="second"/></DynamicMetaNetwork>').encode('latin-1')
+        self.assertEqual(dmlpu.get_encoding(BytesIO(dynetml_text)), 'iso-8859-1')
+        for chunk_size in (1, 7, 1048576):
+            scanned = list(dmlpu.scan_metanetworks(BytesIO(dynetml_text), chunk_size=chunk_size))
+            self.assertEqual([mn_id for mn_id, mn_start, mn_end, mn_text in scanned], ['first', 'second'])
+            for mn_id, mn_start, mn_end, mn_text in scanned:
+                self.assertEqual(dynetml_text[mn_start:mn_end], mn_text)
+        self.assertEqual(dmlpu.parse_fragment(scanned[0][3], 'iso-8859-1').attrib['note'], u'caf\xe9 > bar')
+
+        with self.assertRaises(ValueError):
+            list(dmlpu.scan_metanetworks(BytesIO(dynetml_text.decode('latin-1').encode('utf-16'))))
+
+    def test_refresh(self):
+        refresh_path = self.test_xml_name + '.refresh.xml'
+        with open(working_path('test_dynetml', 'files_2014022423.xml'), 'rb') as dynetml_file:
+            dynetml_text = dynetml_file.read()
+        last_start = dynetml_text.rfind(b'<MetaNetwork')
+
+        with open(refresh_path, 'wb') as outfile:
+            outfile.write(dynetml_text[:last_start + 100].replace(b'<DynamicMetaNetwork',
+                                                                  b'<DynamicMetaNetwork stale="true"', 1))
+
+        dmn = DynamicMetaNetwork('dict')
+        self.assertEqual(dmn.refresh(refresh_path), 22)
+        self.assertEqual(dmn.attributes['stale'], 'true')
+        self.assertEqual(dmn.refresh(refresh_path), 0)
+
+        with open(refresh_path, 'ab') as outfile:
+            outfile.write(dynetml_text[last_start + 100:])
+        self.assertEqual(dmn.refresh(refresh_path), 1)
+        self.assertEqual(len(dmn.metanetworks), 23)
+        self.assertEqual(dmn.metanetworks[-1].attributes['id'], '2014-02-24 11 PM')
+
+        with open(refresh_path, 'wb') as outfile:
+            outfile.write(dynetml_text[:last_start].replace(b'<MetaNetwork', b'<!-- --><MetaNetwork', 1))
+        self.assertEqual(dmn.refresh(refresh_path), 22)
+        self.assertEqual(len(dmn.metanetworks), 22)
+        self.assertFalse('stale' in dmn.attributes)
+
+        loaded_dmn = DynamicMetaNetwork('dict')
+        loaded_dmn.load_from_dynetml_file(refresh_path)
+        with self.assertRaises(ValueError):
+            loaded_dmn.refresh(refresh_path)
+        self.assertEqual(len(loaded_dmn.metanetworks), 22)
+
+        os.remove(refresh_path)
+
+    def test_metanetwork_index(self):
+        index_path = self.test_xml_name + '.mnidx'
+        index = MetaNetworkIndex(working_path('test_dynetml', 'files_2014022423.xml'), index_path)
+        self.assertFalse(index.load())
+
+        index.load_or_build()
+        self.assertEqual(len(index.entries), 23)
+        self.assertEqual(index.root_tag, 'DynamicMetaNetwork')
+        self.assertTrue(MetaNetworkIndex(working_path('test_dynetml', 'files_2014022423.xml'), index_path).load())
+
+        mn_texts = list(index.iter_texts(index.select([index.entries[-1][0]])))
+        self.assertEqual(len(mn_texts), 1)
+        self.assertTrue(mn_texts[0].startswith('<MetaNetwork'))
+        self.assertTrue(mn_texts[0].endswith('</MetaNetwork>'))
+
+        os.remove(index_path)
+
+    def test_binary(self):
+        binary_path = self.test_xml_name + '.bin'
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'networkx')
+
+        with self.assertRaises(IOError):
+            dmn.save_binary(self.test_dir_name)
+
+        dmn.save_binary(binary_path)
+        for network_format in ('dict', 'networkx', 'igraph'):
+            binary_dmn = DynamicMetaNetwork(network_format)
+            binary_dmn.load_binary(binary_path)
+            self.assertEqual(binary_dmn.attributes, dmn.attributes)
+            self.assertEqual(len(binary_dmn.metanetworks), 23)
+
+            mn = binary_dmn.metanetworks[-1]
+            self.assertEqual(mn.attributes['id'], '2014-02-24 11 PM')
+            self.assertEqual(mn.get_node_tree(), dmn.metanetworks[-1].get_node_tree())
+            self.eval_networks(mn.networks, [('Agent x Tweet - Sender', 870, 1566),
+                                             ('Tweet x Agent - Mentions', 590, 806),
+                                             ('Tweet x Concept', 211, 245),
+                                             ('Tweet x Location', 250, 451),
+                                             ('Tweet x Tweet - Retweeted-By', 131, 201)], network_format)
+
+        with self.assertRaises(ValueError):
+            MetaNetworkNX().load_binary(binary_path)
+
+        os.remove(binary_path)
+
+    def test_delta_store(self):
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'dict')
+
+        with self.assertRaises(ValueError):
+            dmn.to_delta_store(0)
+
+        store = dmn.to_delta_store(keyframe_interval=5, cache_size=2)
+        self.assertEqual(len(store), 23)
+        self.assertTrue(store.is_keyframe(20) and not store.is_keyframe(22))
+
+        for i in [22, 3, 0, 22]:
+            mn = store[i]
+            self.assertEqual(mn.attributes, dmn.metanetworks[i].attributes)
+            self.assertEqual(mn.get_node_tree(), dmn.metanetworks[i].get_node_tree())
+            self.assertEqual(sorted(mn.networks), sorted(dmn.metanetworks[i].networks))
+        self.assertFalse(store[22] is store[-1])
+        self.assertEqual(store[22].get_node_tree(), store[-1].get_node_tree())
+        store[-1].attributes['id'] = 'changed'
+        self.assertEqual(store[-1].attributes['id'], dmn.metanetworks[-1].attributes['id'])
+
+        self.eval_networks(store[-1].networks, [('Agent x Tweet - Sender', 870, 1566),
+                                                ('Tweet x Agent - Mentions', 590, 806),
+                                                ('Tweet x Concept', 211, 245),
+                                                ('Tweet x Location', 250, 451),
+                                                ('Tweet x Tweet - Retweeted-By', 131, 201)], 'dict')
+
+        igraph_dmn = DynamicMetaNetwork('igraph')
+        igraph_store = igraph_dmn.load_delta_store(working_path('test_dynetml', 'files_2014022423.xml'))
+        self.assertEqual(len(igraph_store), 23)
+        self.assertEqual(len(igraph_dmn.metanetworks), 0)
+        self.assertTrue(isinstance(igraph_store[-1], MetaNetworkIG))
+
+    def test_parse_cache(self):
+        cache_dir = os.path.join(self.test_dir_name, 'cache')
+        dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph', cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        cached_dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph', cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertEqual(len(cached_dmn.metanetworks), len(dmn.metanetworks))
+        self.assertEqual(cached_dmn.metanetworks[-1].get_node_tree(), dmn.metanetworks[-1].get_node_tree())
+
+        filtered_dmn = dynetml2other(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph',
+                                     networks_to_include=['Tweet x Concept'], cache_dir=cache_dir)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        self.assertEqual(filtered_dmn.metanetworks[-1].networks.keys(), ['Tweet x Concept'])
+
+        # A file rewritten with the same size and modification time is still hashed anew
+        cache = ParseCache(cache_dir)
+        file_hash = cache.get_file_hash(self.test_xml_name)
+        file_stat = os.stat(self.test_xml_name)
+        with open(self.test_xml_name, 'rb') as infile:
+            xml_text = infile.read()
+        with open(self.test_xml_name, 'wb') as outfile:
+            outfile.write(xml_text.replace(b'1.0', b'2.0'))
+        os.utime(self.test_xml_name, (file_stat.st_atime, file_stat.st_mtime))
+        self.assertNotEqual(cache.get_file_hash(self.test_xml_name), file_hash)
+        file_signature = cache.get_file_signature(self.test_xml_name)
+
+        with open(self.test_xml_name, 'ab') as outfile:
+            outfile.write(b' ')
+        cache.put('changed', filtered_dmn, self.test_xml_name, file_signature)
+        self.assertEqual(len(os.listdir(cache_dir)), 2)
+        cache.put('unchanged', filtered_dmn, self.test_xml_name, cache.get_file_signature(self.test_xml_name))
+        self.assertEqual(len(os.listdir(cache_dir)), 3)
+
+        for file_name in os.listdir(cache_dir):
+            os.remove(os.path.join(cache_dir, file_name))
+        os.rmdir(cache_dir)
+
+    def test_iter_metanetworks(self):
+        with self.assertRaises(TypeError):
+            iter_metanetworks(1, 'networkx')
+
+        with self.assertRaises(IOError):
+            iter_metanetworks('bad_path', 'networkx')
+
+        mn_count = 0
+        for mn in iter_metanetworks(working_path('test_dynetml', 'files_2014022423.xml'), 'igraph',
+                                    networks_to_include=['Agent x Tweet - Sender']):
+            self.assertTrue(isinstance(mn, MetaNetworkIG))
+            self.assertEqual(mn.networks.keys(), ['Agent x Tweet - Sender'])
+            mn_count += 1
+        self.assertEqual(mn_count, 23)
+
+        symbol_tables = [mn.symbol_table for mn in iter_metanetworks(working_path('test_dynetml',
+                                                                                  'files_2014022423.xml'))]
+        self.assertEqual(len(set(id(table) for table in symbol_tables)), len(symbol_tables))
+
+        symbol_table = SymbolTable()
+        for mn in iter_metanetworks(working_path('test_dynetml', 'files_2014022423.xml'), symbol_table=symbol_table):
+            self.assertIs(mn.symbol_table, symbol_table)
+        self.assertGreater(len(symbol_table), 0)
+
+    def test_lone_metanetwork_dates(self):
+        lone_path = os.path.join(self.test_dir_name, 'lone.xml')
+        with open(lone_path, 'w') as outfile:
+            outfile.write('<MetaNetwork id="20140224T02:00:00"><nodes/><networks/></MetaNetwork>')
+
+        for streaming in [False, True]:
+            self.assertTrue(isinstance(dynetml2other(lone_path, streaming=streaming,
+                                                     start_date=datetime(2014, 2, 24, 1)), MetaNetwork))
+            self.assertIsNone(dynetml2other(lone_path, streaming=streaming, end_date=datetime(2014, 2, 24, 1)))
+        self.assertEqual(len(list(iter_metanetworks(lone_path, end_date=datetime(2014, 2, 24, 3)))), 1)
+        self.assertEqual(len(list(iter_metanetworks(lone_path, start_date=datetime(2014, 2, 24, 3)))), 0)
+
+        with open(lone_path, 'w') as outfile:
+            outfile.write('<MetaNetwork id="not a timestamp"><nodes/><networks/></MetaNetwork>')
+        self.assertTrue(isinstance(dynetml2other(lone_path), MetaNetwork))
+        with self.assertRaises(ValueError):
+            dynetml2other(lone_path, start_date=datetime(2014, 2, 24, 1))
+        with self.assertRaises(ValueError):
+            list(iter_metanetworks(lone_path, start_date=datetime(2014, 2, 24, 1)))
+
+        os.remove(lone_path)
+
     def tearDown(self):
         os.rmdir(self.test_dir_name)
         os.remove(self.test_xml_name)
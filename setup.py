@@ -3,7 +3,10 @@
 __author__ = 'plandweh'
 
 
-from distutils.core import setup
+try:
+    from setuptools import setup
+except ImportError:
+    from distutils.core import setup
 
 setup(name='dynetml2other',
       version='0.1',
@@ -13,5 +16,6 @@ setup(name='dynetml2other',
       author_email='plandweh@cs.cmu.edu',
       url='http://pmlandwehr.github.com/dynetml2other',
       requires=['lxml'],
-      packages=['dynetml2other']
-     )
\ No newline at end of file
+      packages=['dynetml2other'],
+      entry_points={'console_scripts': ['dynetml2other = dynetml2other.dynetmlcli:main']}
+     )